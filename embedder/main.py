@@ -1,18 +1,63 @@
+import os
 from contextlib import asynccontextmanager
+from typing import Any
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from sentence_transformers import CrossEncoder, SentenceTransformer
+
+EMBED_MODEL = "all-MiniLM-L6-v2"
+RERANK_MODEL = os.environ.get("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# "torch", or "onnx" to run the cross-encoder with onnxruntime (needs
+# optimum[onnxruntime]); RERANK_ONNX_FILE picks the export, e.g. one of
+# the quantized onnx/model_qint8_*.onnx files in the model repo
+RERANK_BACKEND = os.environ.get("RERANK_BACKEND", "torch")
+RERANK_ONNX_FILE = os.environ.get("RERANK_ONNX_FILE", "onnx/model.onnx")
+RERANK_BATCH_SIZE = int(os.environ.get("RERANK_BATCH_SIZE", "32"))
+RERANK_MAX_PASSAGES = int(os.environ.get("RERANK_MAX_PASSAGES", "256"))
 
 model: SentenceTransformer | None = None
+reranker: Any = None
+
+
+class OnnxCrossEncoder:
+    """``CrossEncoder.predict`` on an ONNX export of the same model."""
+
+    def __init__(self, name: str, file_name: str):
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(name)
+        self.model = ORTModelForSequenceClassification.from_pretrained(name, file_name=file_name)
+
+    def predict(self, pairs: list[tuple[str, str]], batch_size: int = 32) -> list[float]:
+        scores: list[float] = []
+        for i in range(0, len(pairs), batch_size):
+            queries, passages = zip(*pairs[i:i + batch_size])
+            inputs = self.tokenizer(
+                list(queries), list(passages),
+                padding=True, truncation=True, max_length=512, return_tensors="np",
+            )
+            logits = self.model(**inputs).logits
+            scores.extend(float(row[0]) for row in logits)
+        return scores
+
+
+def _load_reranker() -> Any:
+    if RERANK_BACKEND == "onnx":
+        return OnnxCrossEncoder(RERANK_MODEL, RERANK_ONNX_FILE)
+    return CrossEncoder(RERANK_MODEL, device="cpu")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global model
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    global model, reranker
+    model = SentenceTransformer(EMBED_MODEL)
+    reranker = _load_reranker()
     yield
     model = None
+    reranker = None
 
 
 app = FastAPI(title="kaiwa-embedder", lifespan=lifespan)
@@ -26,6 +71,17 @@ class EmbedResponse(BaseModel):
     embeddings: list[list[float]]
 
 
+class RerankRequest(BaseModel):
+    query: str
+    passages: list[str] = Field(max_length=RERANK_MAX_PASSAGES)
+
+
+class RerankResponse(BaseModel):
+    # Relevance of each passage to the query, in request order; higher is
+    # more relevant (raw cross-encoder logits)
+    scores: list[float]
+
+
 @app.post("/embed", response_model=EmbedResponse)
 async def embed(req: EmbedRequest):
     if not model:
@@ -36,6 +92,24 @@ async def embed(req: EmbedRequest):
     return EmbedResponse(embeddings=embeddings.tolist())
 
 
+@app.post("/rerank", response_model=RerankResponse)
+async def rerank(req: RerankRequest):
+    if not reranker:
+        raise HTTPException(status_code=503, detail="Reranker not loaded")
+    if not req.passages:
+        return RerankResponse(scores=[])
+    pairs = [(req.query, passage) for passage in req.passages]
+    # Scoring takes a few hundred ms on CPU; keep /embed and /health served
+    scores = await run_in_threadpool(reranker.predict, pairs, batch_size=RERANK_BATCH_SIZE)
+    return RerankResponse(scores=[float(s) for s in scores])
+
+
 @app.get("/health")
 async def health():
-    return {"status": "ok", "model": "all-MiniLM-L6-v2", "dimensions": 384}
+    return {
+        "status": "ok",
+        "model": EMBED_MODEL,
+        "dimensions": 384,
+        "rerank_model": RERANK_MODEL,
+        "rerank_backend": RERANK_BACKEND,
+    }
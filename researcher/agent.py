@@ -1,19 +1,61 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import logging
+import math
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import date
-from typing import Any, TypedDict
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Sequence, TypedDict
 
+from langchain_core.runnables import RunnableConfig
+from langgraph.channels.delta import DeltaChannel
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, START, StateGraph
 from langchain_openai import ChatOpenAI
 
 from config import (
+    CONTEXT_BUDGET_ANALYZE,
+    CONTEXT_BUDGET_COMPILE,
+    CONTEXT_BUDGET_PLAN,
+    CONTEXT_WEB_SHARE,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PRUNE_EVERY,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_MAX_TOKENS_ANALYZE,
+    LLM_MAX_TOKENS_COMPILE,
+    LLM_MAX_TOKENS_PLAN,
+    LLM_MODEL_ANALYZE,
+    LLM_MODEL_COMPILE,
+    LLM_MODEL_PLAN,
+    LLM_TIMEOUT_ANALYZE,
+    LLM_TIMEOUT_COMPILE,
+    LLM_TIMEOUT_PLAN,
     OPENROUTER_API_KEY,
+    PROGRESS_FLUSH_CHARS,
+    PROGRESS_FLUSH_INTERVAL,
+    PROGRESS_SNAPSHOT_INTERVAL,
+    RESEARCH_COMPILE_RESERVE_SECONDS,
+    RESEARCH_DEADLINE_SECONDS,
+    RESEARCH_DEDUPE_ENABLED,
+    RESEARCH_FALLBACK_MODELS,
     RESEARCH_MAX_ITERATIONS,
-    RESEARCH_MODEL,
+    RESEARCH_NOVELTY_ENABLED,
+    RESEARCH_NOVELTY_MIN_ITERATIONS,
+    RESEARCH_NOVELTY_SHIFT_SCALE,
+    RESEARCH_NOVELTY_THRESHOLD,
+    RERANK_DB_TOP_N,
+    RERANK_ENABLED,
+    RERANK_WEB_CANDIDATES,
+    RRF_K,
     WEB_SEARCH_ENABLED,
+    WEB_PREFETCH_ENABLED,
+    WEB_PREFETCH_TOP_K,
     WEB_READ_MAX_PAGES,
 )
 from models import (
@@ -23,69 +65,599 @@ from models import (
     SearchQuery,
     WebSearchQuery,
 )
+import batch
+import context
 import db
+import dedupe
+import rerank
 import web
+from checkpoint import PostgresCheckpointer
+from json_stream import ArrayItemParser
 
 logger = logging.getLogger(__name__)
 
+LLM_TEMPERATURE = 0.3
+# Results per DB search
+DB_SEARCH_LIMIT = 50
+# Shortest LLM timeout a tight budget cuts planning/analysis down to
+_MIN_LLM_TIMEOUT = 5.0
+# Cached responses are replayed in chunks of roughly streamed-token size
+_CACHE_REPLAY_CHUNK = 16
+
 
 # ── State ─────────────────────────────────────────────────────────────
+#
+# Collections that grow over the run are DeltaChannels: nodes return only
+# what they add, the reducers fold that into the accumulated value in
+# place, and checkpoints store each step's additions rather than the
+# whole collection again. In-place folding is safe because DeltaChannel
+# copies its container whenever LangGraph copies the channel (e.g. for
+# the fresh state a conditional edge reads).
+
+def _extend(current: list, updates: Sequence[list]) -> list:
+    for update in updates:
+        current.extend(update)
+    return current
+
+
+def _merge(current: dict, updates: Sequence[dict]) -> dict:
+    for update in updates:
+        current.update(update)
+    return current
+
+
+def _add_scores(current: dict[int, float], updates: Sequence[dict[int, float]]) -> dict[int, float]:
+    for update in updates:
+        for key, score in update.items():
+            current[key] = current.get(key, 0.0) + score
+    return current
+
+
+def _merge_per_iteration(
+    current: dict[int, dict[str, Any]], updates: Sequence[dict[int, dict[str, Any]]]
+) -> dict[int, dict[str, Any]]:
+    for update in updates:
+        for iteration, values in update.items():
+            # Inner dicts are replaced, never mutated: channel copies share them
+            current[iteration] = {**current.get(iteration, {}), **values}
+    return current
+
 
 class ResearchState(TypedDict):
     original_query: str
     filters: dict[str, Any]
-    found_article_ids: list[int]
-    read_summaries: dict[int, dict[str, Any]]
-    queries_tried: list[str]
+    found_article_ids: Annotated[list[int], DeltaChannel(_extend)]
+    # Reciprocal-rank search score per article, summed over searches
+    article_scores: Annotated[dict[int, float], DeltaChannel(_add_scores)]
+    # Representative articles only; near-duplicates are listed in their
+    # representative's "duplicates" and mapped to it in duplicate_of
+    read_summaries: Annotated[dict[int, dict[str, Any]], DeltaChannel(_merge)]
+    duplicate_of: Annotated[dict[int, int], DeltaChannel(_merge)]
+    # New articles the reranker ranked below the cut; never read, and
+    # excluded from later searches like found ones
+    rerank_dropped: Annotated[list[int], DeltaChannel(_extend)]
+    queries_tried: Annotated[list[str], DeltaChannel(_extend)]
     iteration: int
     report: dict[str, Any] | None
     top_articles: list[dict[str, Any]] | None
-    search_log: list[dict[str, Any]]
+    search_log: Annotated[list[dict[str, Any]], DeltaChannel(_extend)]
+    # Prompt size per node, by iteration; folded into search_log at the end
+    prompt_tokens: Annotated[dict[int, dict[str, int]], DeltaChannel(_merge_per_iteration)]
+    # Model, latency and fallbacks of each node's LLM call, likewise
+    llm_calls: Annotated[dict[int, dict[str, dict[str, Any]]], DeltaChannel(_merge_per_iteration)]
+    # What each iteration added and whether that was worth analyzing
+    novelty: Annotated[dict[int, dict[str, Any]], DeltaChannel(_merge_per_iteration)]
+    # Speculative page reads used per iteration; started/wasted at the end
+    web_prefetch: Annotated[dict[int, dict[str, int]], DeltaChannel(_merge_per_iteration)]
+    # Seconds each node took per iteration, the time left after it and
+    # why the budget forced a compile, if it did
+    budget: Annotated[dict[int, dict[str, Any]], DeltaChannel(_merge_per_iteration)]
+    # Articles fetched and collapsed into earlier or sibling stories
+    dedupe: Annotated[dict[int, dict[str, int]], DeltaChannel(_merge_per_iteration)]
+    # Candidates reranked / kept and the /rerank latency, per iteration
+    rerank: Annotated[dict[int, dict[str, int]], DeltaChannel(_merge_per_iteration)]
     # Web search state
-    web_search_results: list[dict[str, Any]]
-    web_page_summaries: dict[str, dict[str, Any]]
-    urls_tried: list[str]
+    web_search_results: Annotated[list[dict[str, Any]], DeltaChannel(_extend)]
+    web_page_summaries: Annotated[dict[str, dict[str, Any]], DeltaChannel(_merge)]
+    urls_tried: Annotated[list[str], DeltaChannel(_extend)]
     web_available: bool
-    # Event queue reference (set externally before invoke)
-    _event_queue: asyncio.Queue | None
-    # Internal keys passed between nodes
-    _planned_db_searches: list[Any]
-    _planned_web_searches: list[Any]
+    # Internal keys passed between nodes; planned searches are stored as
+    # plain dicts so checkpoints hold no model classes
+    _planned_db_searches: list[dict[str, Any]]
+    _planned_web_searches: list[dict[str, Any]]
     _decision: str
     _new_angles: list[str]
 
 
-def _get_llm() -> ChatOpenAI:
+@dataclass
+class RunContext:
+    """Per-run objects that don't belong in graph state, passed to nodes
+    through the LangGraph config as ``configurable["run_context"]``.
+
+    None of it is checkpointed; a resumed run starts with a fresh one.
+    """
+
+    # Where progress events go (the task runner's queue)
+    event_queue: asyncio.Queue | None = None
+    # Rendered prompt lines + token counts, reused across iterations
+    context_cache: dict[tuple[str, Any], Any] = field(default_factory=dict)
+    # Searches started while the plan was still streaming, keyed by
+    # ("db", query, mode, region) / ("web", query, language), and
+    # speculative page reads keyed by ("read", url)
+    searches: dict[tuple, asyncio.Task] = field(default_factory=dict)
+    # Per-request opt-out of the LLM response cache
+    use_llm_cache: bool = True
+    # Page reads started speculatively over the run
+    prefetches: int = 0
+    # time.monotonic() the run should be done by; None for no limit
+    deadline: float | None = None
+    # Shared lookups of the batch the task belongs to, and this task's
+    # hits/misses in it
+    batch_cache: batch.BatchCache | None = None
+    batch_stats: Counter = field(default_factory=Counter)
+
+    def remaining(self) -> float:
+        return math.inf if self.deadline is None else self.deadline - time.monotonic()
+
+    def dispatch(self, key: tuple, start: Callable[[], Awaitable[Any]]) -> bool:
+        if key in self.searches:
+            return False
+        self.searches[key] = asyncio.create_task(start())
+        return True
+
+    def take(self, key: tuple) -> asyncio.Task | None:
+        return self.searches.pop(key, None)
+
+    def discard(self, kind: str | None = None) -> int:
+        """Cancel started work of ``kind`` (all of it by default) that
+        nothing is going to take; returns how much was dropped."""
+        keys = [k for k in self.searches if kind is None or k[0] == kind]
+        for key in keys:
+            self.searches.pop(key).cancel()
+        return len(keys)
+
+
+def _run_context(config: RunnableConfig | None) -> RunContext:
+    ctx = ((config or {}).get("configurable") or {}).get("run_context")
+    return ctx if ctx is not None else RunContext()
+
+
+@dataclass(frozen=True)
+class LLMProfile:
+    model: str
+    max_tokens: int
+    # Seconds before the call is abandoned for the next fallback model
+    timeout: float
+
+    def chain(self) -> list[str]:
+        return [self.model] + [m for m in RESEARCH_FALLBACK_MODELS if m != self.model]
+
+
+# Keyed by progress node name: short JSON answers get small caps and
+# tight timeouts, the report the room it needs
+LLM_PROFILES: dict[str, LLMProfile] = {
+    "planning": LLMProfile(LLM_MODEL_PLAN, LLM_MAX_TOKENS_PLAN, LLM_TIMEOUT_PLAN),
+    "analyzing": LLMProfile(LLM_MODEL_ANALYZE, LLM_MAX_TOKENS_ANALYZE, LLM_TIMEOUT_ANALYZE),
+    "compiling": LLMProfile(LLM_MODEL_COMPILE, LLM_MAX_TOKENS_COMPILE, LLM_TIMEOUT_COMPILE),
+}
+
+
+@dataclass
+class LLMCall:
+    """Outcome of one node's LLM call, as recorded in search_log."""
+
+    text: str
+    model: str
+    latency_ms: int
+    cached: bool = False
+    # Models that timed out or errored before ``model`` answered
+    failed: list[str] = field(default_factory=list)
+
+    def log(self) -> dict[str, Any]:
+        entry: dict[str, Any] = {
+            "model": self.model,
+            "latency_ms": self.latency_ms,
+            "cached": self.cached,
+        }
+        if self.failed:
+            entry["failed"] = self.failed
+        return entry
+
+
+def _get_llm(model: str, max_tokens: int) -> ChatOpenAI:
     return ChatOpenAI(
-        model=RESEARCH_MODEL,
+        model=model,
         api_key=OPENROUTER_API_KEY,
         base_url="https://openrouter.ai/api/v1",
-        temperature=0.3,
-        max_tokens=4096,
+        temperature=LLM_TEMPERATURE,
+        max_tokens=max_tokens,
     )
 
 
-async def _emit(state: ResearchState, event_type: str, data: dict[str, Any]) -> None:
-    q = state.get("_event_queue")
+# ── LLM Response Cache ────────────────────────────────────────────────
+
+_cache_writes = 0
+
+
+def _llm_cache_key(prompt: str, model: str, max_tokens: int) -> str:
+    """Everything that determines the response: model, sampling settings
+    and the prompt itself."""
+    prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+    ident = json.dumps([model, LLM_TEMPERATURE, max_tokens, prompt_hash])
+    return hashlib.sha256(ident.encode()).hexdigest()
+
+
+async def _cache_lookup(key: str) -> str | None:
+    try:
+        return await db.get_cached_llm_response(key, LLM_CACHE_TTL_SECONDS)
+    except Exception:
+        logger.exception("LLM cache lookup failed")
+        return None
+
+
+async def _cache_store(key: str, model: str, response: str) -> None:
+    global _cache_writes
+    try:
+        await db.put_cached_llm_response(key, model, response)
+        _cache_writes += 1
+        if _cache_writes % LLM_CACHE_PRUNE_EVERY == 0:
+            pruned = await db.prune_llm_cache(LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES)
+            logger.info("LLM cache pruned %d entries", pruned)
+    except Exception:
+        logger.exception("LLM cache store failed")
+
+
+async def _replay_tokens(text: str) -> AsyncIterator[str]:
+    for start in range(0, len(text), _CACHE_REPLAY_CHUNK):
+        yield text[start:start + _CACHE_REPLAY_CHUNK]
+
+
+async def _model_tokens(prompt: str, model: str, max_tokens: int) -> AsyncIterator[str]:
+    async for chunk in _get_llm(model, max_tokens).astream(prompt):
+        yield chunk.content or ""
+
+
+async def _emit(ctx: RunContext, event_type: str, data: dict[str, Any]) -> None:
+    q = ctx.event_queue
     if q:
         await q.put({"event": event_type, "data": data})
 
 
-async def _stream_llm(state: ResearchState, node: str, prompt: str) -> str:
-    """Stream LLM output, emitting progress events with accumulated text."""
-    llm = _get_llm()
-    accumulated = ""
-    async for chunk in llm.astream(prompt):
-        token = chunk.content or ""
+async def _relay(
+    ctx: RunContext,
+    node: str,
+    tokens: AsyncIterator[str],
+    on_token: Callable[[str], None] | None,
+) -> str:
+    """Forward ``tokens`` as coalesced progress events; returns the text."""
+    parts: list[str] = []
+    length = 0
+    pending: list[str] = []
+    pending_len = 0
+    last_flush = last_snapshot = time.monotonic()
+
+    async def _flush(now: float) -> None:
+        nonlocal length, pending, pending_len, last_flush, last_snapshot
+        if not pending:
+            return
+        delta = "".join(pending)
+        parts.append(delta)
+        if now - last_snapshot >= PROGRESS_SNAPSHOT_INTERVAL:
+            parts[:] = ["".join(parts)]
+            await _emit(ctx, "progress", {"node": node, "offset": 0, "text": parts[0]})
+            last_snapshot = now
+        else:
+            await _emit(ctx, "progress", {"node": node, "offset": length, "delta": delta})
+        length += pending_len
+        pending, pending_len = [], 0
+        last_flush = now
+
+    async for token in tokens:
         if token:
-            accumulated += token
-            await _emit(state, "progress", {"node": node, "text": accumulated})
-    return accumulated
+            if on_token is not None:
+                on_token(token)
+            pending.append(token)
+            pending_len += len(token)
+            now = time.monotonic()
+            if pending_len >= PROGRESS_FLUSH_CHARS or now - last_flush >= PROGRESS_FLUSH_INTERVAL:
+                await _flush(now)
+    await _flush(time.monotonic())
+    return "".join(parts)
+
+
+async def _stream_llm(
+    ctx: RunContext,
+    node: str,
+    prompt: str,
+    on_token: Callable[[str], None] | None = None,
+    on_restart: Callable[[], None] | None = None,
+) -> LLMCall:
+    """Stream LLM output as coalesced progress deltas.
+
+    Tokens are batched into ``{node, offset, delta}`` events every
+    PROGRESS_FLUSH_INTERVAL seconds or PROGRESS_FLUSH_CHARS characters;
+    ``offset`` is where the delta starts in the node's text, so a client
+    can tell when it missed one. A full ``{node, offset: 0, text}``
+    snapshot replaces a delta every PROGRESS_SNAPSHOT_INTERVAL seconds
+    for clients that joined late. ``on_token`` sees every token as it
+    arrives.
+
+    The node's ``LLM_PROFILES`` entry sets model, output cap and timeout;
+    the timeout shrinks as the run's deadline nears. A call that times
+    out or fails is retried on the next model of the fallback chain:
+    clients get an empty snapshot to clear the partial text and
+    ``on_restart`` is called so token consumers can start over.
+
+    Responses are cached by model, sampling settings and prompt. The
+    chain's keys are tried in order, so a response stored after a
+    fallback is served too. A hit is replayed through the same token
+    path, so callers and clients can't tell it apart from a live call.
+    """
+    profile = LLM_PROFILES[node]
+    use_cache = LLM_CACHE_ENABLED and ctx.use_llm_cache
+    started = time.monotonic()
+
+    def _elapsed_ms() -> int:
+        return round((time.monotonic() - started) * 1000)
+
+    if use_cache:
+        for model in profile.chain():
+            cached = await _cache_lookup(_llm_cache_key(prompt, model, profile.max_tokens))
+            if cached is not None:
+                logger.info("LLM cache hit for %s on %s (%d chars)", node, model, len(cached))
+                text = await _relay(ctx, node, _replay_tokens(cached), on_token)
+                return LLMCall(text, model, _elapsed_ms(), cached=True)
+
+    failed: list[str] = []
+    error: Exception | None = None
+    for model in profile.chain():
+        if failed:
+            await _emit(ctx, "progress", {"node": node, "offset": 0, "text": ""})
+            if on_restart is not None:
+                on_restart()
+        try:
+            async with asyncio.timeout(_llm_timeout(ctx, node, profile)):
+                text = await _relay(
+                    ctx, node, _model_tokens(prompt, model, profile.max_tokens), on_token
+                )
+        except Exception as e:
+            logger.warning(
+                "LLM call for %s on %s failed after %dms: %r",
+                node, model, _elapsed_ms(), e,
+            )
+            failed.append(model)
+            error = e
+            continue
+        if use_cache and text:
+            await _cache_store(_llm_cache_key(prompt, model, profile.max_tokens), model, text)
+        return LLMCall(text, model, _elapsed_ms(), failed=failed)
+    assert error is not None
+    raise error
+
+
+# ── Time Budget ───────────────────────────────────────────────────────
+#
+# A run's deadline lives on its RunContext. Every node's wall time is
+# recorded in the ``budget`` channel, which is also how a resumed run
+# knows how much of its budget is gone.
+
+def _llm_timeout(ctx: RunContext, node: str, profile: LLMProfile) -> float:
+    """The profile's timeout, cut to fit the deadline. Other nodes leave
+    the compile reserve untouched; compiling may always use it."""
+    remaining = ctx.remaining()
+    if node == "compiling":
+        return min(profile.timeout, max(remaining, RESEARCH_COMPILE_RESERVE_SECONDS))
+    return min(profile.timeout, max(_MIN_LLM_TIMEOUT, remaining - RESEARCH_COMPILE_RESERVE_SECONDS))
+
+
+def _node_seconds(nodes: dict[str, Any]) -> float:
+    return sum(v for k, v in nodes.items() if k not in ("remaining", "forced_compile"))
+
+
+def _budget_spent(state: dict[str, Any]) -> float:
+    return sum(_node_seconds(nodes) for nodes in (state.get("budget") or {}).values())
+
+
+def _budget_exhausted(state: ResearchState, ctx: RunContext) -> str | None:
+    """Why another iteration doesn't fit the deadline, or None if it does.
+
+    An iteration is expected to take as long as the finished ones did on
+    average (or the current one so far, before any has finished).
+    """
+    remaining = ctx.remaining()
+    if math.isinf(remaining):
+        return None
+    budget = state.get("budget") or {}
+    iteration = state["iteration"]
+    finished = [_node_seconds(budget[i]) for i in budget if 1 <= i < iteration]
+    expected = sum(finished) / len(finished) if finished else _node_seconds(budget.get(iteration, {}))
+    if remaining < expected + RESEARCH_COMPILE_RESERVE_SECONDS:
+        return (
+            f"deadline: {max(remaining, 0):.0f}s left, next iteration needs ~{expected:.0f}s "
+            f"plus {RESEARCH_COMPILE_RESERVE_SECONDS:.0f}s to compile"
+        )
+    return None
+
+
+NodeFn = Callable[[ResearchState, RunnableConfig], Awaitable[dict[str, Any]]]
+
+
+def _timed(name: str, node: NodeFn) -> NodeFn:
+    """Record ``node``'s wall time under its iteration in ``budget``."""
+
+    async def run(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
+        started = time.monotonic()
+        update = await node(state, config)
+        iteration = update.get("iteration", state["iteration"])
+        spent: dict[str, Any] = {name: round(time.monotonic() - started, 3)}
+        remaining = _run_context(config).remaining()
+        if not math.isinf(remaining):
+            spent["remaining"] = round(remaining, 1)
+        own = (update.get("budget") or {}).get(iteration, {})
+        return {**update, "budget": {iteration: {**own, **spent}}}
+
+    return run
+
+
+# ── Prompt Context ────────────────────────────────────────────────────
+
+def _title(s: dict[str, Any]) -> str:
+    return s.get("translated_title") or s.get("original_title", "?")
+
+
+def _plan_article(aid: int, s: dict[str, Any]) -> str:
+    return f"- [{s.get('feed_region_id', '?')}] {_title(s)}: {s.get('summary_tldr', 'no summary')}"
+
+
+def _plan_web(url: str, s: dict[str, Any]) -> str:
+    return f"- [WEB] {s.get('title', '?')}: {(s.get('summary') or 'no summary')[:100]}"
+
+
+def _regions(s: dict[str, Any]) -> str:
+    return ", ".join(dedupe.regions(s)) or "?"
+
+
+def _analyze_article(aid: int, s: dict[str, Any]) -> str:
+    return f"[ID:{aid}] [{_regions(s)}] {_title(s)}\n  TLDR: {s.get('summary_tldr', 'N/A')}\n  Tags: {s.get('summary_tags', [])}\n  Sentiment: {s.get('summary_sentiment', '?')}"
+
+
+def _analyze_web(url: str, s: dict[str, Any]) -> str:
+    return f"[WEB: {url}] {s.get('title', '?')}\n  Summary: {s.get('summary', 'N/A')}"
+
+
+def _compile_article(aid: int, s: dict[str, Any]) -> str:
+    return f"[ID:{aid}] [{_regions(s)}] {_title(s)}\n  TLDR: {s.get('summary_tldr', 'N/A')}\n  Tags: {json.dumps(s.get('summary_tags', []))}\n  Sentiment: {s.get('summary_sentiment', '?')}\n  Source: {', '.join(dedupe.sources(s)) or '?'}\n  Published: {s.get('published_at', '?')}"
+
+
+def _compile_web(url: str, s: dict[str, Any]) -> str:
+    return f"[WEB: {url}] {s.get('title', '?')}\n  Summary: {s.get('summary', 'N/A')}\n  Key points: {json.dumps(s.get('key_points', []))}"
+
+
+def _article_fingerprint(s: dict[str, Any]) -> str:
+    return f"{_title(s)} {s.get('summary_tldr') or ''}"
+
+
+def _web_fingerprint(s: dict[str, Any]) -> str:
+    return f"{s.get('title') or ''} {s.get('summary') or ''}"
+
+
+def _pack_sources(
+    state: ResearchState,
+    ctx: RunContext,
+    budget: int,
+    render_article: Any,
+    render_web: Any,
+) -> tuple[context.Packed, context.Packed]:
+    """Pack web pages (up to CONTEXT_WEB_SHARE of ``budget``) then articles."""
+    cache = ctx.context_cache
+    positions = {r["url"]: i for i, r in enumerate(state.get("web_search_results", []))}
+    web_items = sorted(
+        ((url, s) for url, s in state.get("web_page_summaries", {}).items() if s.get("success", False)),
+        key=lambda item: positions.get(item[0], len(positions)),
+    )
+    web = context.pack(
+        web_items, render_web, _web_fingerprint, int(budget * CONTEXT_WEB_SHARE), cache
+    )
+    articles = context.pack(
+        context.rank_articles(state["read_summaries"], state.get("article_scores", {})),
+        render_article,
+        _article_fingerprint,
+        budget - web.tokens,
+        cache,
+    )
+    return articles, web
+
+
+# Per-iteration state channels and the search_log key each is filed under
+_ITERATION_STATS = (
+    ("prompt_tokens", "prompt_tokens"),
+    ("llm_calls", "llm"),
+    ("novelty", "novelty"),
+    ("web_prefetch", "web_prefetch"),
+    ("budget", "budget"),
+    ("dedupe", "dedupe"),
+    ("rerank", "rerank"),
+)
+
+
+def _with_node_stats(state: ResearchState) -> ResearchState:
+    """Final state with each search_log entry's prompt sizes, LLM calls
+    (model, latency, fallbacks), novelty verdict, prefetch use, time
+    spent, duplicates collapsed and reranking filled in."""
+    stats = [(state.get(channel) or {}, key) for channel, key in _ITERATION_STATS]
+    search_log = []
+    for entry in state.get("search_log", []):
+        iteration = entry.get("iteration")
+        extra = {key: values[iteration] for values, key in stats if iteration in values}
+        search_log.append({**entry, **extra} if extra else entry)
+    return {**state, "search_log": search_log}
+
+
+# ── Novelty ───────────────────────────────────────────────────────────
+#
+# Whether an iteration turned up enough that's new to be worth an
+# analyze_and_decide call, judged without an LLM. Each signal is in
+# [0, 1]: the share of DB result slots filled by articles not found
+# before, the share of web results with unseen URLs, and how far the new
+# articles move the embedding centroid of everything read so far (which
+# shrinks as the collection grows unless they open new ground).
+# Signals that don't apply (no web searches, nothing earlier to compare
+# with) are left out.
+
+def _ratio(new: int, returned: int) -> float:
+    return new / returned if returned else 0.0
+
+
+async def _assess_novelty(state: ResearchState, new_article_ids: list[int]) -> dict[str, Any]:
+    iteration = state["iteration"]
+    stats = (state.get("novelty") or {}).get(iteration, {})
+    signals: dict[str, float] = {}
+    if "db_slots" in stats:
+        signals["db_new_ratio"] = _ratio(stats["db_new"], stats["db_slots"])
+    if "web_returned" in stats:
+        signals["web_new_share"] = _ratio(stats["web_new"], stats["web_returned"])
+    # read_sources hasn't merged this iteration's summaries yet
+    previous_ids = list(state["read_summaries"])
+    if previous_ids:
+        shift: float | None = 0.0
+        if new_article_ids:
+            try:
+                shift = await db.get_centroid_shift(previous_ids, new_article_ids)
+            except Exception:
+                logger.exception("Centroid shift query failed")
+                shift = None
+        if shift is not None:
+            signals["topic_shift"] = min(1.0, shift / RESEARCH_NOVELTY_SHIFT_SCALE)
+
+    score = sum(signals.values()) / len(signals) if signals else None
+    verdict: dict[str, Any] = {
+        **stats,
+        **{k: round(v, 3) for k, v in signals.items()},
+        "score": round(score, 3) if score is not None else None,
+        "threshold": RESEARCH_NOVELTY_THRESHOLD,
+        "decision": "analyze",
+    }
+    if iteration >= RESEARCH_MAX_ITERATIONS:
+        # analyze_and_decide would be forced to compile anyway
+        verdict.update(decision="compile", reason="iteration limit reached")
+    elif not RESEARCH_NOVELTY_ENABLED or iteration < RESEARCH_NOVELTY_MIN_ITERATIONS:
+        verdict["reason"] = "novelty check not applied"
+    elif score is None:
+        verdict["reason"] = "no novelty signals"
+    elif score < RESEARCH_NOVELTY_THRESHOLD:
+        detail = ", ".join(f"{k} {v:.2f}" for k, v in signals.items())
+        verdict.update(
+            decision="compile",
+            reason=f"novelty {score:.2f} < {RESEARCH_NOVELTY_THRESHOLD} ({detail})",
+        )
+    else:
+        verdict["reason"] = f"novelty {score:.2f} >= {RESEARCH_NOVELTY_THRESHOLD}"
+    return verdict
 
 
 # ── Nodes ─────────────────────────────────────────────────────────────
 
-async def check_web_availability(state: ResearchState) -> dict[str, Any]:
+async def check_web_availability(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
     """Probe SearXNG + webreader health at startup."""
     if not WEB_SEARCH_ENABLED:
         logger.info("Web search disabled by config")
@@ -103,8 +675,125 @@ async def check_web_availability(state: ResearchState) -> dict[str, Any]:
     return {"web_available": available}
 
 
-async def plan_search(state: ResearchState) -> dict[str, Any]:
-    """LLM decides which DB and web search queries to run."""
+async def _db_search(sq: SearchQuery, filters: dict[str, Any], exclude: set[int]) -> list[dict[str, Any]]:
+    region = sq.region or filters.get("region")
+    date_from = filters.get("date_from")
+    date_to = filters.get("date_to")
+    try:
+        if sq.mode == "keyword":
+            results = await db.keyword_search(sq.query, DB_SEARCH_LIMIT, region, date_from, date_to, exclude)
+        elif sq.mode == "semantic":
+            results = await db.semantic_search(sq.query, DB_SEARCH_LIMIT, region, date_from, date_to, exclude)
+        else:
+            results = await db.hybrid_search(sq.query, DB_SEARCH_LIMIT, region, date_from, date_to, exclude)
+        logger.info("DB search '%s' (%s): %d results", sq.query, sq.mode, len(results))
+        return results
+    except Exception as e:
+        logger.error("DB search '%s' (%s) failed: %s", sq.query, sq.mode, e)
+        return []
+
+
+async def _shared(
+    ctx: RunContext,
+    kind: str,
+    keys: list[str],
+    compute: Callable[[list[str]], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    """``compute(keys)``, through the batch cache when the task has one."""
+    if ctx.batch_cache is None:
+        return await compute(keys)
+    return await ctx.batch_cache.get_many(kind, keys, compute, ctx.batch_stats)
+
+
+async def _fetch_summaries(keys: list[str]) -> dict[str, Any]:
+    rows = await db.get_article_summaries([int(k) for k in keys])
+    return {str(aid): row for aid, row in rows.items()}
+
+
+async def _embed(texts: list[str]) -> dict[str, Any]:
+    return {text: list(embedding) for text, embedding in (await db.embed_queries(texts)).items()}
+
+
+async def _read_pages(
+    ctx: RunContext, urls: list[str], query: str, timeout: float | None = None
+) -> dict[str, dict[str, Any]]:
+    # Webreader summarizes a page for the question it is sent with, so
+    # siblings only share pages read for the same question
+    keys = {f"{query}\n{url}": url for url in urls}
+
+    async def read(missing: list[str]) -> dict[str, Any]:
+        pages = await web.read_web_pages(
+            [{"url": keys[key], "query": query} for key in missing], max_pages=len(missing), timeout=timeout
+        )
+        return {key: pages.get(keys[key]) for key in missing}
+
+    pages = await _shared(ctx, "webreader", list(keys), read)
+    return {keys[key]: page for key, page in pages.items() if page}
+
+
+def _seen_article_ids(state: ResearchState) -> set[int]:
+    """Articles DB searches exclude: found ones and ones reranking dropped."""
+    return {*state["found_article_ids"], *(state.get("rerank_dropped") or [])}
+
+
+def _passage(r: dict[str, Any]) -> str:
+    """What the reranker judges a search result by."""
+    return f"{_title(r)}. {r.get('summary_tldr') or ''}"
+
+
+def _web_passage(r: dict[str, Any]) -> str:
+    return f"{r.get('title') or ''}. {r.get('content') or ''}"
+
+
+def _done_urls(state: ResearchState) -> set[str]:
+    """URLs read_sources won't read again."""
+    return set(state.get("web_page_summaries", {})) | set(state.get("urls_tried", []))
+
+
+async def _read_page(ctx: RunContext, url: str, query: str) -> dict[str, Any] | None:
+    return (await _read_pages(ctx, [url], query)).get(url)
+
+
+def _prefetch_pages(ctx: RunContext, urls: list[str], query: str) -> None:
+    """Start webreader reads of ``urls`` ahead of read_sources."""
+    if not WEB_PREFETCH_ENABLED:
+        return
+    for url in urls:
+        if ctx.dispatch(("read", url), lambda url=url: _read_page(ctx, url, query)):
+            ctx.prefetches += 1
+
+
+async def _web_search(
+    ctx: RunContext, wsq: WebSearchQuery, query: str, done: set[str]
+) -> list[dict[str, Any]]:
+    """SearXNG search that starts reading its top new pages right away."""
+    key = f"{wsq.language}:{wsq.query}"
+
+    async def search(_: list[str]) -> dict[str, Any]:
+        return {key: await web.searxng_search(wsq.query, language=wsq.language)}
+
+    results = (await _shared(ctx, "searxng", [key], search)).get(key) or []
+    fresh = [r["url"] for r in results if r["url"] not in done]
+    _prefetch_pages(ctx, fresh[:WEB_PREFETCH_TOP_K], query)
+    return results
+
+
+def _db_search_key(sq: SearchQuery) -> tuple:
+    return ("db", sq.query, sq.mode, sq.region)
+
+
+def _web_search_key(wsq: WebSearchQuery) -> tuple:
+    return ("web", wsq.query, wsq.language)
+
+
+async def plan_search(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
+    """LLM decides which DB and web search queries to run.
+
+    Each search is started as soon as its element of ``db_searches`` /
+    ``web_searches`` is complete in the stream; the execute nodes pick
+    the running tasks up from the RunContext.
+    """
+    ctx = _run_context(config)
     iteration = state["iteration"] + 1
     today = date.today().isoformat()
     web_available = state.get("web_available", False)
@@ -113,21 +802,9 @@ async def plan_search(state: ResearchState) -> dict[str, Any]:
     found_count = len(state["found_article_ids"])
     web_results_count = len(state.get("web_search_results", []))
 
-    summaries_preview = ""
-    if state["read_summaries"]:
-        items = list(state["read_summaries"].values())[:10]
-        summaries_preview = "\n".join(
-            f"- [{s.get('feed_region_id', '?')}] {s.get('translated_title') or s.get('original_title', '?')}: {s.get('summary_tldr', 'no summary')}"
-            for s in items
-        )
-
-    web_preview = ""
-    if state.get("web_page_summaries"):
-        items = list(state["web_page_summaries"].values())[:5]
-        web_preview = "\n".join(
-            f"- [WEB] {s.get('title', '?')}: {(s.get('summary') or 'no summary')[:100]}"
-            for s in items
-        )
+    articles, web_pages = _pack_sources(state, ctx, CONTEXT_BUDGET_PLAN, _plan_article, _plan_web)
+    summaries_preview = articles.text
+    web_preview = web_pages.text
 
     web_instructions = ""
     if web_available:
@@ -162,9 +839,44 @@ Respond with ONLY a JSON object (no markdown):
 {{"db_searches": [{{"query": "...", "mode": "hybrid", "region": null}}], {'"web_searches": [{"query": "...", "language": "en"}], ' if web_available else ''}"reasoning": "..."}}
 """
 
-    await _emit(state, "status", {"type": "planning", "iteration": iteration})
-
-    content = (await _stream_llm(state, "planning", prompt)).strip()
+    prompt_tokens = context.count_tokens(prompt)
+
+    await _emit(ctx, "status", {"type": "planning", "iteration": iteration})
+
+    # Every search in an iteration excludes the same set, so early and
+    # late starts return the same results
+    exclude = frozenset(_seen_article_ids(state))
+    done_urls = _done_urls(state)
+    parser = ArrayItemParser(("db_searches", "web_searches"))
+
+    def _reset_parser() -> None:
+        # A fallback model streams its plan from the start; searches the
+        # failed attempt dispatched stay keyed and are reused if replanned
+        nonlocal parser
+        parser = ArrayItemParser(("db_searches", "web_searches"))
+
+    def _dispatch_ready(token: str) -> None:
+        for key, _, item in parser.feed(token):
+            try:
+                if key == "db_searches":
+                    sq = SearchQuery(**item)
+                    ctx.dispatch(
+                        _db_search_key(sq),
+                        lambda sq=sq: _db_search(sq, state["filters"], set(exclude)),
+                    )
+                elif web_available:
+                    wsq = WebSearchQuery(**item)
+                    ctx.dispatch(
+                        _web_search_key(wsq),
+                        lambda wsq=wsq: _web_search(ctx, wsq, state["original_query"], done_urls),
+                    )
+            except Exception as e:
+                logger.debug("Skipping unusable streamed %s item %s: %s", key, item, e)
+
+    call = await _stream_llm(
+        ctx, "planning", prompt, on_token=_dispatch_ready, on_restart=_reset_parser
+    )
+    content = call.text.strip()
     if content.startswith("```"):
         content = content.split("\n", 1)[1].rsplit("```", 1)[0].strip()
 
@@ -184,170 +896,327 @@ Respond with ONLY a JSON object (no markdown):
         new_queries = [state["original_query"]]
         plan.db_searches = [SearchQuery(query=state["original_query"], mode="hybrid")]
 
+    # Embed the vector queries not already started in one round trip
+    # before the rest of the searches fan out
+    to_embed = [
+        s.query for s in plan.db_searches
+        if s.mode in ("semantic", "hybrid") and _db_search_key(s) not in ctx.searches
+    ]
+    if ctx.batch_cache is not None:
+        # Take what sibling tasks already embedded into the local cache
+        shared = await _shared(ctx, "embedding", db.uncached_queries(to_embed), _embed)
+        db.cache_query_embeddings({text: e for text, e in shared.items() if e})
+    embedding_stats = await db.prefetch_embeddings(to_embed)
+    logger.info(
+        "Iteration %d embeddings: %d queries, %d cache hits, %d embedder calls saved",
+        iteration,
+        embedding_stats["requested"],
+        embedding_stats["cache_hits"],
+        embedding_stats["calls_saved"],
+    )
+
     return {
         "iteration": iteration,
-        "queries_tried": already_tried + new_queries,
-        "search_log": state["search_log"] + [
+        "queries_tried": new_queries,
+        "search_log": [
             {
                 "iteration": iteration,
                 "db_planned": [s.model_dump() for s in plan.db_searches],
                 "web_planned": [s.model_dump() for s in plan.web_searches],
                 "reasoning": plan.reasoning,
+                "embeddings": embedding_stats,
             }
         ],
-        "_planned_db_searches": plan.db_searches,
-        "_planned_web_searches": plan.web_searches if web_available else [],
+        "prompt_tokens": {iteration: {"plan_search": prompt_tokens}},
+        "llm_calls": {iteration: {"plan_search": call.log()}},
+        "_planned_db_searches": [s.model_dump() for s in plan.db_searches],
+        "_planned_web_searches": [s.model_dump() for s in plan.web_searches] if web_available else [],
     }
 
 
-async def execute_db_searches(state: ResearchState) -> dict[str, Any]:
-    """Run the planned DB search queries."""
-    planned: list[SearchQuery] = state.get("_planned_db_searches", [])
+async def execute_db_searches(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
+    """Run the planned DB search queries.
+
+    Searches already started by plan_search are awaited rather than
+    rerun; results are merged in plan order, so the outcome does not
+    depend on which finished first. If more than RERANK_DB_TOP_N new
+    articles turn up, only the cross-encoder's top ones are kept.
+    """
+    ctx = _run_context(config)
+    planned = [SearchQuery(**s) for s in state.get("_planned_db_searches", [])]
     logger.info("execute_db_searches: %d planned queries", len(planned))
     filters = state["filters"]
-    exclude = set(state["found_article_ids"])
+    exclude = _seen_article_ids(state)
+    scores: dict[int, float] = {}
     new_ids: list[int] = []
+    rows: dict[int, dict[str, Any]] = {}
 
+    tasks = {}
     for sq in planned:
-        await _emit(state, "status", {
+        key = _db_search_key(sq)
+        if key not in tasks:
+            tasks[key] = ctx.take(key) or asyncio.create_task(
+                _db_search(sq, filters, _seen_article_ids(state))
+            )
+    ctx.discard("db")
+
+    for sq in planned:
+        await _emit(ctx, "status", {
             "type": "searching",
             "query": sq.query,
             "mode": sq.mode,
             "iteration": state["iteration"],
         })
 
-        region = sq.region or filters.get("region")
-        date_from = filters.get("date_from")
-        date_to = filters.get("date_to")
+        results = await tasks[_db_search_key(sq)]
 
-        try:
-            if sq.mode == "keyword":
-                results = await db.keyword_search(sq.query, 50, region, date_from, date_to, exclude)
-            elif sq.mode == "semantic":
-                results = await db.semantic_search(sq.query, 50, region, date_from, date_to, exclude)
-            else:
-                results = await db.hybrid_search(sq.query, 50, region, date_from, date_to, exclude)
-            logger.info("DB search '%s' (%s): %d results", sq.query, sq.mode, len(results))
-        except Exception as e:
-            logger.error("DB search '%s' (%s) failed: %s", sq.query, sq.mode, e)
-            results = []
+        for pos, r in enumerate(results, start=1):
+            scores[r["id"]] = scores.get(r["id"], 0.0) + 1.0 / (RRF_K + pos)
 
         batch_ids = [r["id"] for r in results if r["id"] not in exclude]
         new_ids.extend(batch_ids)
+        rows.update((r["id"], r) for r in results if r["id"] in batch_ids)
         exclude.update(batch_ids)
 
-        await _emit(state, "status", {
+        await _emit(ctx, "status", {
             "type": "found",
             "query": sq.query,
             "new_articles": len(batch_ids),
             "total": len(exclude),
         })
 
-    all_ids = state["found_article_ids"] + new_ids
-    return {"found_article_ids": all_ids}
-
-
-async def execute_web_searches(state: ResearchState) -> dict[str, Any]:
-    """Run planned web searches via SearXNG."""
-    planned: list[WebSearchQuery] = state.get("_planned_web_searches", [])
+    updates: dict[str, Any] = {}
+    if planned:
+        # Found articles are excluded in the search itself, so novelty
+        # shows as result slots left empty or taken by repeats
+        updates["novelty"] = {state["iteration"]: {
+            "db_new": len(new_ids),
+            "db_slots": len(tasks) * DB_SEARCH_LIMIT,
+        }}
+
+    if RERANK_ENABLED and RERANK_DB_TOP_N and len(new_ids) > RERANK_DB_TOP_N:
+        ranked = await rerank.rank(state["original_query"], new_ids, lambda aid: _passage(rows[aid]))
+        updates["rerank"] = {state["iteration"]: {
+            "db_candidates": len(new_ids),
+            "db_kept": RERANK_DB_TOP_N if ranked.reranked else len(new_ids),
+            "db_ms": ranked.latency_ms,
+        }}
+        if ranked.reranked:
+            kept = set(ranked.items[:RERANK_DB_TOP_N])
+            dropped = [aid for aid in new_ids if aid not in kept]
+            logger.info("Reranking kept %d of %d new articles", len(kept), len(new_ids))
+            new_ids = [aid for aid in new_ids if aid in kept]
+            for aid in dropped:
+                del scores[aid]
+            updates["rerank_dropped"] = dropped
+
+    return {**updates, "found_article_ids": new_ids, "article_scores": scores}
+
+
+async def execute_web_searches(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
+    """Run planned web searches via SearXNG, reusing ones plan_search started.
+
+    Each search starts reading its top new pages as soon as it returns
+    (see ``_web_search``), while the other searches are still running.
+    """
+    ctx = _run_context(config)
+    planned = [WebSearchQuery(**s) for s in state.get("_planned_web_searches", [])]
     if not planned:
-        return {"web_search_results": state.get("web_search_results", [])}
+        ctx.discard("web")
+        return {}
 
     logger.info("execute_web_searches: %d planned queries", len(planned))
-    existing_results = list(state.get("web_search_results", []))
-    seen_urls = {r["url"] for r in existing_results}
+    seen_urls = {r["url"] for r in state.get("web_search_results", [])}
+    done_urls = _done_urls(state)
+    added: list[dict[str, Any]] = []
+    returned: set[str] = set()
 
+    tasks = {}
     for wsq in planned:
-        await _emit(state, "status", {
+        key = _web_search_key(wsq)
+        if key not in tasks:
+            tasks[key] = ctx.take(key) or asyncio.create_task(
+                _web_search(ctx, wsq, state["original_query"], done_urls)
+            )
+    ctx.discard("web")
+
+    for wsq in planned:
+        await _emit(ctx, "status", {
             "type": "web_searching",
             "query": wsq.query,
         })
 
-        results = await web.searxng_search(wsq.query, language=wsq.language)
+        results = await tasks[_web_search_key(wsq)]
+        returned.update(r["url"] for r in results)
         new_results = [r for r in results if r["url"] not in seen_urls]
-        existing_results.extend(new_results)
+        added.extend(new_results)
         seen_urls.update(r["url"] for r in new_results)
 
-        await _emit(state, "status", {
+        await _emit(ctx, "status", {
             "type": "web_found",
             "query": wsq.query,
             "new_results": len(new_results),
-            "total": len(existing_results),
+            "total": len(seen_urls),
         })
 
-    return {"web_search_results": existing_results}
+    return {
+        "web_search_results": added,
+        "novelty": {state["iteration"]: {"web_new": len(added), "web_returned": len(returned)}},
+    }
 
 
-async def read_sources(state: ResearchState) -> dict[str, Any]:
-    """Fetch DB article summaries and read top web pages."""
+async def _collapse(
+    ctx: RunContext, state: ResearchState, summaries: dict[int, dict[str, Any]]
+) -> dedupe.Collapsed:
+    """Fold near-duplicates in ``summaries`` into their representatives."""
+    collapsed = await dedupe.collapse(
+        summaries, state["read_summaries"], state.get("article_scores") or {}
+    )
+    if collapsed.duplicate_of:
+        logger.info(
+            "Collapsed %d of %d articles into near-duplicate stories",
+            len(collapsed.duplicate_of), len(summaries),
+        )
+    # Representatives that gained duplicates now render differently
+    context.forget(ctx.context_cache, set(collapsed.summaries) - set(collapsed.new_ids))
+    return collapsed
+
+
+async def read_sources(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
+    """Fetch DB article summaries and read top web pages.
+
+    Unread web results are ranked by the cross-encoder so the best
+    pages are read first. Fetched articles that are near-duplicates of
+    one already read, or of each other, are folded into a single
+    representative (see ``dedupe``). Pages already being read
+    speculatively are awaited instead of sent to webreader again. Reads
+    have to finish before the compile reserve; with less time than a
+    full webreader batch, half as many pages are read. Unless the run is
+    about to compile, the pages the next iteration will read are
+    prefetched while this one is analyzed.
+    """
+    ctx = _run_context(config)
     updates: dict[str, Any] = {}
 
     # 1. DB article summaries
     existing_summaries = state["read_summaries"]
-    new_ids = [aid for aid in state["found_article_ids"] if aid not in existing_summaries]
+    duplicate_of = state.get("duplicate_of") or {}
+    new_ids = [
+        aid for aid in state["found_article_ids"]
+        if aid not in existing_summaries and aid not in duplicate_of
+    ]
+    new_article_ids: list[int] = []
     if new_ids:
-        await _emit(state, "status", {"type": "reading", "count": len(new_ids)})
-        fetched = await db.get_article_summaries(new_ids)
-        updates["read_summaries"] = {**existing_summaries, **fetched}
+        await _emit(ctx, "status", {"type": "reading", "count": len(new_ids)})
+        fetched = await _shared(ctx, "summary", [str(aid) for aid in new_ids], _fetch_summaries)
+        summaries = {int(k): row for k, row in fetched.items() if row}
+        if RESEARCH_DEDUPE_ENABLED:
+            collapsed = await _collapse(ctx, state, summaries)
+            updates["read_summaries"] = collapsed.summaries
+            updates["duplicate_of"] = collapsed.duplicate_of
+            updates["dedupe"] = {state["iteration"]: {
+                "fetched": len(summaries),
+                "collapsed": len(collapsed.duplicate_of),
+            }}
+            new_article_ids = collapsed.new_ids
+        else:
+            updates["read_summaries"] = summaries
+            new_article_ids = list(summaries)
 
     # 2. Web page reading via webreader
     web_results = state.get("web_search_results", [])
     existing_web = state.get("web_page_summaries", {})
     urls_tried = set(state.get("urls_tried", []))
 
-    # Select top unread URLs
-    urls_to_read = []
-    for r in web_results:
-        url = r["url"]
-        if url not in existing_web and url not in urls_tried:
-            urls_to_read.append({"url": url, "query": state["original_query"]})
-        if len(urls_to_read) >= WEB_READ_MAX_PAGES:
-            break
+    read_window = min(web.READ_TIMEOUT, ctx.remaining() - RESEARCH_COMPILE_RESERVE_SECONDS)
+    if read_window >= web.READ_TIMEOUT:
+        max_pages = WEB_READ_MAX_PAGES
+    else:
+        max_pages = (WEB_READ_MAX_PAGES + 1) // 2 if read_window > 0 else 0
+
+    # Select top unread URLs, ordered by the reranker when there's a choice
+    unread = [r for r in web_results if r["url"] not in existing_web and r["url"] not in urls_tried]
+    if RERANK_ENABLED and max_pages and len(unread) > max_pages:
+        candidates = unread[:RERANK_WEB_CANDIDATES]
+        ranked = await rerank.rank(state["original_query"], candidates, _web_passage)
+        unread = ranked.items + unread[len(candidates):]
+        updates["rerank"] = {state["iteration"]: {
+            "web_candidates": len(candidates),
+            "web_ms": ranked.latency_ms,
+        }}
+    urls_to_read = [{"url": r["url"], "query": state["original_query"]} for r in unread[:max_pages]]
 
     if urls_to_read:
-        await _emit(state, "status", {
+        await _emit(ctx, "status", {
             "type": "web_reading",
             "count": len(urls_to_read),
         })
 
-        page_results = await web.read_web_pages(urls_to_read)
+        prefetched = {u["url"]: ctx.take(("read", u["url"])) for u in urls_to_read}
+        hits = {url: task for url, task in prefetched.items() if task is not None}
+        rest = [u for u in urls_to_read if prefetched[u["url"]] is None]
+        direct = (
+            asyncio.create_task(
+                _read_pages(ctx, [u["url"] for u in rest], state["original_query"], read_window)
+            )
+            if rest else None
+        )
+        # Prefetches run on webreader's full timeout; any still going when
+        # the read window closes are dropped
+        _, late = await asyncio.wait([*hits.values(), *([direct] if direct else [])], timeout=read_window)
+        for task in late:
+            task.cancel()
+        page_results = dict(direct.result()) if direct and direct not in late else {}
+        page_results.update(
+            (url, task.result()) for url, task in hits.items() if task not in late and task.result()
+        )
         new_urls_tried = [u["url"] for u in urls_to_read]
+        updates["web_prefetch"] = {state["iteration"]: {"used": len(hits), "read": len(rest)}}
 
-        await _emit(state, "status", {
+        await _emit(ctx, "status", {
             "type": "web_read",
             "count": len([r for r in page_results.values() if r.get("success")]),
             "total": len(urls_to_read),
         })
 
-        updates["web_page_summaries"] = {**existing_web, **page_results}
-        updates["urls_tried"] = list(urls_tried) + new_urls_tried
+        updates["web_page_summaries"] = page_results
+        updates["urls_tried"] = new_urls_tried
+
+    verdict = await _assess_novelty(state, new_article_ids)
+    updates["novelty"] = {state["iteration"]: verdict}
+    exhausted = _budget_exhausted(state, ctx) if verdict["decision"] == "analyze" else None
+    if exhausted:
+        updates["budget"] = {state["iteration"]: {"forced_compile": exhausted}}
+    if verdict["decision"] == "compile" or exhausted:
+        reason = exhausted or verdict["reason"]
+        logger.info("Skipping analysis at iteration %d: %s", state["iteration"], reason)
+        await _emit(ctx, "status", {
+            "type": "deadline" if exhausted else "saturated",
+            "iteration": state["iteration"],
+            "reason": reason,
+        })
+    else:
+        upcoming = [r["url"] for r in unread[len(urls_to_read):]]
+        _prefetch_pages(ctx, upcoming[:WEB_READ_MAX_PAGES], state["original_query"])
 
     return updates
 
 
-async def analyze_and_decide(state: ResearchState) -> dict[str, Any]:
+async def analyze_and_decide(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
     """LLM reviews findings and decides whether to expand or compile."""
+    ctx = _run_context(config)
     today = date.today().isoformat()
     iteration = state["iteration"]
     summaries = state["read_summaries"]
     web_summaries = state.get("web_page_summaries", {})
 
-    await _emit(state, "status", {"type": "analyzing", "iteration": iteration})
+    await _emit(ctx, "status", {"type": "analyzing", "iteration": iteration})
 
-    summary_text = "\n".join(
-        f"[ID:{aid}] [{s.get('feed_region_id', '?')}] {s.get('translated_title') or s.get('original_title', '?')}\n  TLDR: {s.get('summary_tldr', 'N/A')}\n  Tags: {s.get('summary_tags', [])}\n  Sentiment: {s.get('summary_sentiment', '?')}"
-        for aid, s in list(summaries.items())[:40]
+    articles, web_pages = _pack_sources(
+        state, ctx, CONTEXT_BUDGET_ANALYZE, _analyze_article, _analyze_web
     )
-
-    web_text = ""
-    if web_summaries:
-        web_items = [
-            f"[WEB: {url}] {s.get('title', '?')}\n  Summary: {s.get('summary', 'N/A')}"
-            for url, s in list(web_summaries.items())[:10]
-            if s.get("success", False)
-        ]
-        if web_items:
-            web_text = "\n\nWeb source summaries:\n" + "\n".join(web_items)
+    summary_text = articles.text
+    web_text = f"\n\nWeb source summaries:\n{web_pages.text}" if web_pages.lines else ""
 
     prompt = f"""You are a research assistant analyzing articles about: "{state['original_query']}"
 Today's date: {today}
@@ -370,7 +1239,9 @@ Respond with ONLY a JSON object (no markdown):
 {{"action": "expand" or "compile", "reasoning": "...", "new_angles": ["query1", "query2"]}}
 """
 
-    content = (await _stream_llm(state, "analyzing", prompt)).strip()
+    prompt_tokens = context.count_tokens(prompt)
+    call = await _stream_llm(ctx, "analyzing", prompt)
+    content = call.text.strip()
     if content.startswith("```"):
         content = content.split("\n", 1)[1].rsplit("```", 1)[0].strip()
 
@@ -383,36 +1254,42 @@ Respond with ONLY a JSON object (no markdown):
     if iteration >= RESEARCH_MAX_ITERATIONS:
         decision.action = "compile"
 
+    updates: dict[str, Any] = {}
+    exhausted = _budget_exhausted(state, ctx) if decision.action == "expand" else None
+    if exhausted:
+        logger.info("Compiling instead of expanding at iteration %d: %s", iteration, exhausted)
+        decision.action = "compile"
+        updates["budget"] = {iteration: {"forced_compile": exhausted}}
+        await _emit(ctx, "status", {"type": "deadline", "iteration": iteration, "reason": exhausted})
+
     if decision.action == "expand":
-        await _emit(state, "status", {
+        await _emit(ctx, "status", {
             "type": "expanding",
             "reasoning": decision.reasoning,
             "new_queries": decision.new_angles,
         })
 
-    return {"_decision": decision.action, "_new_angles": decision.new_angles}
+    return {
+        **updates,
+        "_decision": decision.action,
+        "_new_angles": decision.new_angles,
+        "prompt_tokens": {iteration: {"analyze_and_decide": prompt_tokens}},
+        "llm_calls": {iteration: {"analyze_and_decide": call.log()}},
+    }
 
 
-async def compile_report(state: ResearchState) -> dict[str, Any]:
+async def compile_report(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
     """LLM produces the final structured report."""
+    ctx = _run_context(config)
     today = date.today().isoformat()
     summaries = state["read_summaries"]
     web_summaries = state.get("web_page_summaries", {})
 
-    summary_text = "\n".join(
-        f"[ID:{aid}] [{s.get('feed_region_id', '?')}] {s.get('translated_title') or s.get('original_title', '?')}\n  TLDR: {s.get('summary_tldr', 'N/A')}\n  Tags: {json.dumps(s.get('summary_tags', []))}\n  Sentiment: {s.get('summary_sentiment', '?')}\n  Source: {s.get('feed_source_name', '?')}\n  Published: {s.get('published_at', '?')}"
-        for aid, s in list(summaries.items())[:50]
+    articles, web_pages = _pack_sources(
+        state, ctx, CONTEXT_BUDGET_COMPILE, _compile_article, _compile_web
     )
-
-    web_text = ""
-    if web_summaries:
-        web_items = [
-            f"[WEB: {url}] {s.get('title', '?')}\n  Summary: {s.get('summary', 'N/A')}\n  Key points: {json.dumps(s.get('key_points', []))}"
-            for url, s in list(web_summaries.items())[:10]
-            if s.get("success", False)
-        ]
-        if web_items:
-            web_text = "\n\nWeb sources:\n" + "\n".join(web_items)
+    summary_text = articles.text
+    web_text = f"\n\nWeb sources:\n{web_pages.text}" if web_pages.lines else ""
 
     web_source_instruction = ""
     if web_summaries:
@@ -423,7 +1300,7 @@ Today's date: {today}
 
 Based on {len(summaries)} database articles and {len(web_summaries)} web sources, produce a structured report.
 
-Article data:
+Article data (each article lists every region and source that carried the story):
 {summary_text}
 {web_text}
 
@@ -439,9 +1316,21 @@ Produce a JSON report with:
 Respond with ONLY a JSON object (no markdown):
 """
 
-    await _emit(state, "status", {"type": "compiling"})
+    prompt_tokens = context.count_tokens(prompt)
+    logger.info(
+        "compile_report prompt: %d tokens, %d articles + %d web pages packed",
+        prompt_tokens, len(articles.lines), len(web_pages.lines),
+    )
+
+    await _emit(ctx, "status", {"type": "compiling"})
 
-    content = (await _stream_llm(state, "compiling", prompt)).strip()
+    # Nothing reads pages from here on
+    wasted = ctx.discard("read")
+    if ctx.prefetches:
+        logger.info("Web prefetch: %d pages started, %d wasted", ctx.prefetches, wasted)
+
+    call = await _stream_llm(ctx, "compiling", prompt)
+    content = call.text.strip()
     if content.startswith("```"):
         content = content.split("\n", 1)[1].rsplit("```", 1)[0].strip()
 
@@ -476,16 +1365,31 @@ Respond with ONLY a JSON object (no markdown):
             if len(articles_list) >= 15:
                 break
 
-    await _emit(state, "result", {
+    await _emit(ctx, "result", {
         "report": report_dict,
         "articles": articles_list,
     })
 
-    return {"report": report_dict, "top_articles": articles_list}
+    return {
+        "report": report_dict,
+        "top_articles": articles_list,
+        "prompt_tokens": {state["iteration"]: {"compile_report": prompt_tokens}},
+        "llm_calls": {state["iteration"]: {"compile_report": call.log()}},
+        "web_prefetch": {state["iteration"]: {"started": ctx.prefetches, "wasted": wasted}},
+    }
 
 
 # ── Routing ───────────────────────────────────────────────────────────
 
+def should_analyze_or_compile(state: ResearchState) -> str:
+    iteration = state["iteration"]
+    verdict = (state.get("novelty") or {}).get(iteration, {})
+    budget = (state.get("budget") or {}).get(iteration, {})
+    if verdict.get("decision") == "compile" or "forced_compile" in budget:
+        return "compile_report"
+    return "analyze_and_decide"
+
+
 def should_expand_or_compile(state: ResearchState) -> str:
     decision = state.get("_decision", "compile")
     if decision == "expand":
@@ -495,16 +1399,19 @@ def should_expand_or_compile(state: ResearchState) -> str:
 
 # ── Graph ─────────────────────────────────────────────────────────────
 
-def build_graph() -> StateGraph:
+def build_graph(checkpointer: BaseCheckpointSaver | None = None) -> StateGraph:
     graph = StateGraph(ResearchState)
 
-    graph.add_node("check_web_availability", check_web_availability)
-    graph.add_node("plan_search", plan_search)
-    graph.add_node("execute_db_searches", execute_db_searches)
-    graph.add_node("execute_web_searches", execute_web_searches)
-    graph.add_node("read_sources", read_sources)
-    graph.add_node("analyze_and_decide", analyze_and_decide)
-    graph.add_node("compile_report", compile_report)
+    for name, node in (
+        ("check_web_availability", check_web_availability),
+        ("plan_search", plan_search),
+        ("execute_db_searches", execute_db_searches),
+        ("execute_web_searches", execute_web_searches),
+        ("read_sources", read_sources),
+        ("analyze_and_decide", analyze_and_decide),
+        ("compile_report", compile_report),
+    ):
+        graph.add_node(name, _timed(name, node))
 
     graph.add_edge(START, "check_web_availability")
     graph.add_edge("check_web_availability", "plan_search")
@@ -514,7 +1421,11 @@ def build_graph() -> StateGraph:
     # Fan-in: both execute nodes → read_sources
     graph.add_edge("execute_db_searches", "read_sources")
     graph.add_edge("execute_web_searches", "read_sources")
-    graph.add_edge("read_sources", "analyze_and_decide")
+    graph.add_conditional_edges(
+        "read_sources",
+        should_analyze_or_compile,
+        {"analyze_and_decide": "analyze_and_decide", "compile_report": "compile_report"},
+    )
     graph.add_conditional_edges(
         "analyze_and_decide",
         should_expand_or_compile,
@@ -522,40 +1433,132 @@ def build_graph() -> StateGraph:
     )
     graph.add_edge("compile_report", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
-research_graph = build_graph()
+# State is checkpointed after every step, keyed by task id, so an
+# interrupted run resumes where it stopped
+research_graph = build_graph(PostgresCheckpointer())
 
 
 async def run_research(
     query: str,
     filters: dict[str, Any] | None = None,
     event_queue: asyncio.Queue | None = None,
+    use_llm_cache: bool = True,
+    seed: dict[str, Any] | None = None,
+    task_id: str | None = None,
+    deadline_seconds: float | None = None,
+    batch_id: str | None = None,
+) -> ResearchState:
+    """Execute the research graph and return the final state.
+
+    ``seed`` (from ``ReuseMatch.seed``) starts the run with a similar
+    earlier task's articles and queries instead of from nothing. If
+    ``task_id`` has a checkpoint from an interrupted run, the run picks
+    up after its last completed node instead. The run gets
+    ``deadline_seconds`` (RESEARCH_DEADLINE_SECONDS by default) of node
+    time in total, so a resumed run only has what the interrupted one
+    left. Tasks of a batch share lookups through its cache (see ``batch``).
+    """
+    ctx = RunContext(event_queue=event_queue, use_llm_cache=use_llm_cache)
+    if batch_id is not None:
+        ctx.batch_cache = batch.join(batch_id)
+    budget = deadline_seconds or RESEARCH_DEADLINE_SECONDS
+    try:
+        if task_id is None:
+            # Nothing to resume into; drop the run's checkpoints afterwards
+            thread_id = f"run_{uuid.uuid4().hex}"
+            try:
+                return await _run_graph(ctx, thread_id, query, filters, seed, budget)
+            finally:
+                await db.delete_checkpoints([thread_id])
+        return await _run_graph(ctx, task_id, query, filters, seed, budget)
+    finally:
+        # Early searches and page reads a failed or cancelled run left
+        ctx.discard()
+        if ctx.batch_cache is not None:
+            await batch.leave(ctx.batch_cache, ctx.batch_stats)
+
+
+async def _run_graph(
+    ctx: RunContext,
+    thread_id: str,
+    query: str,
+    filters: dict[str, Any] | None,
+    seed: dict[str, Any] | None,
+    budget: float,
 ) -> ResearchState:
-    """Execute the research graph and return the final state."""
+    config: RunnableConfig = {"configurable": {"thread_id": thread_id, "run_context": ctx}}
+
+    snapshot = await research_graph.aget_state(config)
+    ctx.deadline = time.monotonic() + budget - _budget_spent(snapshot.values or {})
+    if snapshot.values:
+        if not snapshot.next:
+            # Finished before the task was marked complete
+            return _with_node_stats(snapshot.values)
+        logger.info("Resuming research %s before %s", thread_id, ", ".join(snapshot.next))
+        await _emit(ctx, "status", {
+            "type": "resumed",
+            "iteration": snapshot.values.get("iteration", 0),
+            "next": list(snapshot.next),
+        })
+        return _with_node_stats(await research_graph.ainvoke(None, config))
+
+    found_ids: list[int] = []
+    summaries: dict[int, dict[str, Any]] = {}
+    duplicate_of: dict[int, int] = {}
+    queries_tried: list[str] = []
+    search_log: list[dict[str, Any]] = []
+    if seed:
+        summaries = await db.get_article_summaries(seed["found_article_ids"])
+        found_ids = [aid for aid in seed["found_article_ids"] if aid in summaries]
+        if RESEARCH_DEDUPE_ENABLED:
+            collapsed = await dedupe.collapse(summaries, {}, {})
+            summaries, duplicate_of = collapsed.summaries, collapsed.duplicate_of
+        queries_tried = list(seed["queries_tried"])
+        search_log.append({
+            "iteration": 0,
+            "seeded_from": seed["source_task_id"],
+            "similarity": seed["similarity"],
+            "seeded_articles": len(found_ids),
+        })
+        await _emit(ctx, "status", {
+            "type": "seeded",
+            "source": seed["source_task_id"],
+            "count": len(found_ids),
+        })
+
     initial_state: ResearchState = {
         "original_query": query,
         "filters": filters or {},
-        "found_article_ids": [],
-        "read_summaries": {},
-        "queries_tried": [],
+        "found_article_ids": found_ids,
+        "article_scores": {},
+        "read_summaries": summaries,
+        "duplicate_of": duplicate_of,
+        "rerank_dropped": [],
+        "queries_tried": queries_tried,
         "iteration": 0,
         "report": None,
         "top_articles": None,
-        "search_log": [],
+        "search_log": search_log,
+        "prompt_tokens": {},
+        "llm_calls": {},
+        "novelty": {},
+        "web_prefetch": {},
+        "budget": {},
+        "dedupe": {},
+        "rerank": {},
         # Web search state
         "web_search_results": [],
         "web_page_summaries": {},
         "urls_tried": [],
         "web_available": False,
         # Internal keys
-        "_event_queue": event_queue,
         "_planned_db_searches": [],
         "_planned_web_searches": [],
         "_decision": "",
         "_new_angles": [],
     }
 
-    result = await research_graph.ainvoke(initial_state)
-    return result
+    return _with_node_stats(await research_graph.ainvoke(initial_state, config))
@@ -0,0 +1,146 @@
+"""Work shared by the tasks of a research batch.
+
+A batch is a set of related queries submitted together (``POST
+/research/batch``), e.g. one topic across several regions. Each query is
+still its own task, claimed and streamed like any other, but while they
+run their query embeddings, SearXNG results, article summary rows and
+webreader pages (keyed by URL and the question they were summarized
+for) go through the batch's cache. Lookups in flight on a
+replica are deduplicated, and values are stored in
+``research_batch_cache`` so siblings claimed by other replicas get them
+too. Article rows are only shared in process: reading them back from
+Postgres would cost as much as the original query.
+
+Each task counts its hits and misses per kind; the counts are added to
+the batch when the task ends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable
+
+import db
+
+logger = logging.getLogger(__name__)
+
+# Kinds whose values are stored for siblings on other replicas
+_PERSISTED = {"embedding", "searxng", "webreader"}
+
+Compute = Callable[[list[str]], Awaitable[dict[str, Any]]]
+
+
+def _found(value: Any) -> bool:
+    """Whether a looked-up value can be shared. Webreader reports a failed
+    read as ``{"success": False, ...}``, which must not stick either."""
+    return bool(value) and not (isinstance(value, dict) and value.get("success") is False)
+
+
+class BatchCache:
+    """One replica's view of a batch's shared cache."""
+
+    def __init__(self, batch_id: str):
+        self.batch_id = batch_id
+        self.tasks = 0
+        self._values: dict[tuple[str, str], asyncio.Future] = {}
+
+    async def get_many(
+        self, kind: str, keys: list[str], compute: Compute, stats: Counter
+    ) -> dict[str, Any]:
+        """Values for ``keys``; the ones no task of the batch has looked up
+        yet come from a single ``compute(missing)`` call. ``stats`` gets
+        the caller's ``<kind>_hits`` / ``<kind>_misses``."""
+        result: dict[str, Any] = {}
+        pending = list(dict.fromkeys(keys))
+        while pending:
+            shared = {k: self._values[(kind, k)] for k in pending if (kind, k) in self._values}
+            mine = [k for k in pending if k not in shared]
+            if mine:
+                result.update(await self._fill(kind, mine, compute, stats))
+            pending = []
+            for key, future in shared.items():
+                try:
+                    result[key] = await asyncio.shield(future)
+                except (asyncio.CancelledError, Exception):
+                    if not future.done():
+                        # We were cancelled, not the lookup
+                        raise
+                    # Its owner gave up; look it up ourselves
+                    pending.append(key)
+                    continue
+                stats[f"{kind}_hits"] += 1
+        return result
+
+    async def _fill(
+        self, kind: str, keys: list[str], compute: Compute, stats: Counter
+    ) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        for key, future in futures.items():
+            self._values[(kind, key)] = future
+        try:
+            values = await self._load(kind, keys)
+            missing = [key for key in keys if key not in values]
+            if missing:
+                computed = await compute(missing)
+                values.update(computed)
+                await self._store(kind, {k: v for k, v in computed.items() if _found(v)})
+        except BaseException:
+            for key, future in futures.items():
+                self._values.pop((kind, key), None)
+                future.cancel()
+            raise
+
+        stats[f"{kind}_hits"] += len(keys) - len(missing)
+        stats[f"{kind}_misses"] += len(missing)
+        for key, future in futures.items():
+            future.set_result(values.get(key))
+            if not _found(values.get(key)):
+                # Empty or failed lookups aren't shared; the next asker retries
+                self._values.pop((kind, key), None)
+        return {key: values.get(key) for key in keys}
+
+    async def _load(self, kind: str, keys: list[str]) -> dict[str, Any]:
+        if kind not in _PERSISTED:
+            return {}
+        try:
+            return await db.get_batch_cache(self.batch_id, kind, keys)
+        except Exception:
+            logger.exception("Batch cache lookup failed")
+            return {}
+
+    async def _store(self, kind: str, values: dict[str, Any]) -> None:
+        if kind not in _PERSISTED:
+            return
+        try:
+            await db.put_batch_cache(self.batch_id, kind, values)
+        except Exception:
+            logger.exception("Batch cache store failed")
+
+
+# Batch id -> cache, while a task of the batch runs on this replica
+_caches: dict[str, BatchCache] = {}
+
+
+def join(batch_id: str) -> BatchCache:
+    cache = _caches.get(batch_id)
+    if cache is None:
+        cache = _caches[batch_id] = BatchCache(batch_id)
+    cache.tasks += 1
+    return cache
+
+
+async def leave(cache: BatchCache, stats: Counter) -> None:
+    """Drop a finished task's hold on ``cache`` and add its counters to
+    the batch."""
+    cache.tasks -= 1
+    if cache.tasks <= 0:
+        _caches.pop(cache.batch_id, None)
+    if stats:
+        logger.info("Batch %s cache: %s", cache.batch_id, dict(stats))
+        try:
+            await db.add_batch_cache_stats(cache.batch_id, dict(stats))
+        except Exception:
+            logger.exception("Recording batch cache stats failed")
@@ -0,0 +1,34 @@
+"""Small timing helpers shared by the researcher benchmarks."""
+
+from __future__ import annotations
+
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+
+
+async def time_async(
+    fn: Callable[[], Awaitable[Any]],
+    runs: int,
+    warmup: int = 2,
+) -> tuple[list[float], Any]:
+    """Run ``fn`` ``warmup + runs`` times; return per-run ms and the last result."""
+    result: Any = None
+    for _ in range(warmup):
+        result = await fn()
+    timings: list[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def summarize(timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"p50={statistics.median(ordered):7.2f}ms  "
+        f"p95={p95:7.2f}ms  "
+        f"mean={statistics.fmean(ordered):7.2f}ms"
+    )
@@ -0,0 +1,60 @@
+"""Compare exclusion strategies for already-seen article IDs.
+
+Usage (from researcher/, against a populated database):
+
+    python -m benchmarks.bench_exclusion "election results" --sizes 0 50 200 800
+
+For each exclude-set size the benchmark excludes the nearest articles to
+the query (the realistic worst case: earlier iterations already found
+them) and times every strategy, plus what ``auto`` would pick.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+import db
+from benchmarks._timing import summarize, time_async
+
+STRATEGIES = ("inline", "overfetch", "temp_table")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("query")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 50, 200, 800])
+    parser.add_argument("--mode", choices=["keyword", "semantic", "hybrid"], default="semantic")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    search = {
+        "keyword": db.keyword_search,
+        "semantic": db.semantic_search,
+        "hybrid": db.hybrid_search,
+    }[args.mode]
+
+    try:
+        # Seed pool of IDs to exclude: the query's own best matches
+        db.SEARCH_EXCLUDE_STRATEGY = "inline"
+        seed = await search(args.query, max(args.sizes) + args.limit, exclude_ids={-1})
+        seed_ids = [r["id"] for r in seed]
+
+        for size in args.sizes:
+            exclude = set(seed_ids[:size])
+            db.SEARCH_EXCLUDE_STRATEGY = "auto"
+            print(f"exclude={len(exclude):5d}  auto -> {db.choose_exclude_strategy(exclude)}")
+            for strategy in STRATEGIES:
+                db.SEARCH_EXCLUDE_STRATEGY = strategy
+                timings, rows = await time_async(
+                    lambda: search(args.query, args.limit, exclude_ids=exclude),
+                    args.runs,
+                )
+                print(f"  {strategy:10s} {summarize(timings)}  rows={len(rows)}")
+    finally:
+        await db.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
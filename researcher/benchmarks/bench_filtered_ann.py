@@ -0,0 +1,185 @@
+"""Recall/latency of filtered vector search strategies on a synthetic corpus.
+
+Usage (from researcher/; needs pgvector and CREATE privileges):
+
+    python -m benchmarks.bench_filtered_ann --setup --rows 100000
+    python -m benchmarks.bench_filtered_ann --queries 20
+
+``--setup`` builds a clustered synthetic corpus with skewed region sizes
+and a one-year date spread in a separate ``bench_ann`` schema, plus the
+HNSW index. The benchmark then points the researcher's own search code at
+that schema (via search_path) and, for several filter selectivities,
+compares each ANN strategy against exact ground truth.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from array import array
+from datetime import date, timedelta
+
+import asyncpg
+
+import db
+from benchmarks._timing import summarize, time_async
+
+SCHEMA = "bench_ann"
+DIMENSIONS = 384
+CLUSTERS = 64
+
+# Region share of the corpus: jp 50%, us 30%, kr 15%, eu 4%, xx 1%
+REGION_BUCKETS = "CASE WHEN b < 50 THEN 'jp' WHEN b < 80 THEN 'us' WHEN b < 95 THEN 'kr' WHEN b < 99 THEN 'eu' ELSE 'xx' END"
+
+SETUP_SQL = f"""
+DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.feeds (id int PRIMARY KEY, source_name text, region_id text);
+CREATE TABLE {SCHEMA}.articles (
+    id int PRIMARY KEY,
+    feed_id int REFERENCES {SCHEMA}.feeds(id),
+    original_title text, translated_title text, translated_content text,
+    summary_tldr text, summary_tags jsonb, summary_sentiment text,
+    original_url text, image_url text, source_language text,
+    published_at timestamptz,
+    embedding vector({DIMENSIONS})
+);
+CREATE TABLE {SCHEMA}.centroids AS
+    SELECT c AS id, (SELECT array_agg(random() - 0.5) FROM generate_series(1, {DIMENSIONS}) WHERE c >= 0) AS v
+    FROM generate_series(0, {CLUSTERS - 1}) c;
+INSERT INTO {SCHEMA}.feeds
+    SELECT b, 'bench-' || b, {REGION_BUCKETS} FROM generate_series(0, 99) b;
+"""
+
+INSERT_SQL = f"""
+INSERT INTO {SCHEMA}.articles (id, feed_id, original_title, source_language, published_at, embedding)
+SELECT g, g % 100, 'article ' || g, 'en',
+       now() - random() * interval '365 days',
+       (SELECT array_agg(c.v[i] + (random() - 0.5) * 0.6)
+        FROM generate_series(1, {DIMENSIONS}) i)::vector
+FROM generate_series($1::int, $2::int) g
+JOIN {SCHEMA}.centroids c ON c.id = g % {CLUSTERS}
+"""
+
+CASES = [
+    ("unfiltered", None, None),
+    ("region jp (~50%)", "jp", None),
+    ("region kr (~15%)", "kr", None),
+    ("region xx (~1%)", "xx", None),
+    ("last 30 days (~8%)", None, 30),
+    ("us + last 7 days (~0.6%)", "us", 7),
+]
+
+STRATEGIES = ("hnsw@default", "hnsw", "iterative", "exact", "auto")
+
+
+async def setup(dsn: str, rows: int) -> None:
+    conn = await asyncpg.connect(dsn)
+    try:
+        await conn.execute(SETUP_SQL)
+        for start in range(1, rows + 1, 10000):
+            await conn.execute(INSERT_SQL, start, min(rows, start + 9999))
+            print(f"  inserted {min(rows, start + 9999)}/{rows}")
+        print("  building HNSW index...")
+        await conn.execute(
+            f"CREATE INDEX ON {SCHEMA}.articles USING hnsw (embedding vector_cosine_ops)"
+        )
+        await conn.execute(f"CREATE INDEX ON {SCHEMA}.articles (published_at)")
+        await conn.execute(f"CREATE INDEX ON {SCHEMA}.articles (feed_id)")
+        await conn.execute(f"ANALYZE {SCHEMA}.articles; ANALYZE {SCHEMA}.feeds")
+    finally:
+        await conn.close()
+
+
+async def query_vectors(dsn: str, count: int) -> list[array]:
+    conn = await asyncpg.connect(dsn)
+    try:
+        rows = await conn.fetch(
+            f"""
+            SELECT (SELECT array_agg(c.v[i] + (random() - 0.5) * 0.6)
+                    FROM generate_series(1, {DIMENSIONS}) i)::real[] AS v
+            FROM generate_series(1, $1) q
+            JOIN {SCHEMA}.centroids c ON c.id = (q * 7) % {CLUSTERS}
+            """,
+            count,
+        )
+    finally:
+        await conn.close()
+    return [array("f", r["v"]) for r in rows]
+
+
+def _use_strategy(name: str, defaults: tuple[str, int]) -> None:
+    db.ANN_STRATEGY, db.HNSW_EF_SEARCH_MAX = defaults
+    if name == "hnsw@default":
+        # Today's behaviour: plain index scan with pgvector's default ef_search
+        db.ANN_STRATEGY = "hnsw"
+        db.HNSW_EF_SEARCH_MAX = db.HNSW_EF_SEARCH_DEFAULT
+    else:
+        db.ANN_STRATEGY = name
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--setup", action="store_true")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    base_dsn = db.DATABASE_URL
+    if args.setup:
+        print(f"Building {args.rows} synthetic articles in schema {SCHEMA}")
+        await setup(base_dsn, args.rows)
+
+    vectors = await query_vectors(base_dsn, args.queries)
+    texts = [f"bench-query-{i}" for i in range(len(vectors))]
+    for text, vec in zip(texts, vectors):
+        db._cache_embedding(text, vec)
+
+    sep = "&" if "?" in base_dsn else "?"
+    db.DATABASE_URL = f"{base_dsn}{sep}search_path={SCHEMA},public"
+    defaults = (db.ANN_STRATEGY, db.HNSW_EF_SEARCH_MAX)
+    today = date.today()
+
+    try:
+        for label, region, days in CASES:
+            date_from = (today - timedelta(days=days)).isoformat() if days else None
+            pool = await db.get_pool()
+            async with pool.acquire() as conn:
+                _use_strategy("auto", defaults)
+                auto_plan = await db.plan_ann(conn, args.limit, region, date_from)
+            print(
+                f"{label}: est_rows={auto_plan.estimated_rows:.0f} "
+                f"selectivity={auto_plan.selectivity:.4f} auto -> {auto_plan.strategy}"
+            )
+
+            _use_strategy("exact", defaults)
+            truth = {}
+            for text in texts:
+                rows = await db.semantic_search(text, args.limit, region, date_from)
+                truth[text] = {r["id"] for r in rows}
+
+            for strategy in STRATEGIES:
+                _use_strategy(strategy, defaults)
+                recalls: list[float] = []
+                timings: list[float] = []
+                for text in texts:
+                    run_times, rows = await time_async(
+                        lambda: db.semantic_search(text, args.limit, region, date_from),
+                        args.runs,
+                        warmup=1,
+                    )
+                    timings.extend(run_times)
+                    expected = truth[text]
+                    found = {r["id"] for r in rows}
+                    recalls.append(len(found & expected) / max(len(expected), 1))
+                recall = sum(recalls) / len(recalls)
+                print(f"  {strategy:13s} recall@{args.limit}={recall:6.1%}  {summarize(timings)}")
+    finally:
+        _use_strategy("auto", defaults)
+        await db.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
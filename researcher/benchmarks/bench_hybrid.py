@@ -0,0 +1,73 @@
+"""Compare SQL-side and Python-side RRF hybrid search.
+
+Usage (from researcher/, against a populated database):
+
+    python -m benchmarks.bench_hybrid "election results" "trade talks" --runs 20
+
+The embedding is fetched once per query so both paths are timed on
+database work only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from array import array
+
+import db
+from benchmarks._timing import summarize, time_async
+
+
+async def _bench_query(query: str, args: argparse.Namespace) -> None:
+    embedding = await db._get_embedding(query)
+    if embedding is None:
+        print(f"[{query}] embedder unavailable, skipping")
+        return
+
+    # Pin the Python path's semantic search to the same embedding
+    original_get_embedding = db._get_embedding
+
+    async def _fixed_embedding(_text: str) -> array:
+        return embedding
+
+    db._get_embedding = _fixed_embedding
+    try:
+        py_times, py_rows = await time_async(
+            lambda: db.hybrid_search_python(query, args.limit, args.region),
+            args.runs,
+        )
+    finally:
+        db._get_embedding = original_get_embedding
+
+    sql_times, sql_rows = await time_async(
+        lambda: db.hybrid_search_sql(query, embedding, args.limit, args.region),
+        args.runs,
+    )
+
+    py_ids = [r["id"] for r in py_rows]
+    sql_ids = [r["id"] for r in sql_rows]
+    overlap = len(set(py_ids) & set(sql_ids)) / max(len(py_ids), 1)
+
+    print(f"[{query}]")
+    print(f"  python  {summarize(py_times)}  rows={len(py_ids)}")
+    print(f"  sql     {summarize(sql_times)}  rows={len(sql_ids)}")
+    print(f"  top-{args.limit} overlap={overlap:.0%}  same order={py_ids == sql_ids}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", nargs="+")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--region", default=None)
+    args = parser.parse_args()
+
+    try:
+        for query in args.queries:
+            await _bench_query(query, args)
+    finally:
+        await db.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""Relevance of cross-encoder reranking on a labeled fixture set.
+
+Usage (from researcher/, with the embedder running; no database needed):
+
+    python -m benchmarks.bench_rerank --top-n 5 --runs 10
+
+Each fixture query comes with candidate articles in the order hybrid
+search returned them, hand-labeled 2 (answers the question), 1 (useful
+background) or 0 (off topic). The candidates are ordered three ways: as
+searched, by bi-encoder cosine similarity (``/embed``), and by the
+cross-encoder (``/rerank``). For each the benchmark reports nDCG@N,
+precision@N (label 2), MRR of the first label-2 candidate, and how many
+prompt tokens keeping only the top N saves. ``/rerank`` latency per
+query is timed separately.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import statistics
+from pathlib import Path
+from typing import Any
+
+import context
+import db
+import rerank
+from benchmarks._timing import summarize, time_async
+
+FIXTURE = Path(__file__).parent / "fixtures" / "rerank_relevance.json"
+
+
+def _dcg(labels: list[int]) -> float:
+    return sum((2 ** label - 1) / math.log2(pos + 2) for pos, label in enumerate(labels))
+
+
+def _metrics(labels: list[int], n: int) -> dict[str, float]:
+    ideal = _dcg(sorted(labels, reverse=True)[:n])
+    first = next((pos for pos, label in enumerate(labels, start=1) if label == 2), None)
+    return {
+        "ndcg": _dcg(labels[:n]) / ideal if ideal else 0.0,
+        "precision": sum(label == 2 for label in labels[:n]) / n,
+        "mrr": 1 / first if first else 0.0,
+    }
+
+
+async def _bi_encoder_order(query: str, texts: list[str]) -> list[int] | None:
+    embeddings = await db._embed_texts([query, *texts])
+    if not embeddings:
+        return None
+    q, *passages = embeddings
+    # Embeddings are normalized, so the dot product is the cosine
+    similarity = [sum(a * b for a, b in zip(q, p)) for p in passages]
+    return sorted(range(len(texts)), key=lambda i: -similarity[i])
+
+
+async def _cross_encoder_order(query: str, texts: list[str]) -> list[int] | None:
+    scores = await rerank.scores(query, texts)
+    if scores is None:
+        return None
+    return sorted(range(len(texts)), key=lambda i: -scores[i])
+
+
+async def _bench_query(item: dict[str, Any], args: argparse.Namespace, totals: dict) -> None:
+    query = item["query"]
+    texts = [c["text"] for c in item["candidates"]]
+    labels = [c["label"] for c in item["candidates"]]
+    orders = {
+        "search": list(range(len(texts))),
+        "bi-encoder": await _bi_encoder_order(query, texts),
+        "cross-encoder": await _cross_encoder_order(query, texts),
+    }
+
+    all_tokens = sum(context.count_tokens(t) for t in texts)
+    print(f"[{query}]  {len(texts)} candidates, {all_tokens} tokens")
+    for name, order in orders.items():
+        if order is None:
+            print(f"  {name:14s} unavailable")
+            continue
+        ranked = [labels[i] for i in order]
+        m = _metrics(ranked, args.top_n)
+        kept_tokens = sum(context.count_tokens(texts[i]) for i in order[:args.top_n])
+        print(
+            f"  {name:14s} ndcg@{args.top_n}={m['ndcg']:.3f}  p@{args.top_n}={m['precision']:.2f}  "
+            f"mrr={m['mrr']:.2f}  top-{args.top_n} tokens={kept_tokens} ({kept_tokens / all_tokens:.0%})"
+        )
+        totals.setdefault(name, []).append(m)
+
+    if orders["cross-encoder"] is not None:
+        timings, _ = await time_async(lambda: rerank.scores(query, texts), args.runs)
+        print(f"  /rerank       {summarize(timings)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", type=Path, default=FIXTURE)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    fixture = json.loads(args.fixture.read_text())
+    totals: dict[str, list[dict[str, float]]] = {}
+    for item in fixture["queries"]:
+        await _bench_query(item, args, totals)
+
+    print(f"\nMean over {len(fixture['queries'])} queries:")
+    for name, results in totals.items():
+        print(
+            f"  {name:14s} "
+            + "  ".join(
+                f"{metric}={statistics.fmean(r[metric] for r in results):.3f}"
+                for metric in ("ndcg", "precision", "mrr")
+            )
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
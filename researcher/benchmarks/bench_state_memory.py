@@ -0,0 +1,212 @@
+"""Compare copy-on-update and delta-channel research graph state.
+
+Usage (from researcher/, no database needed):
+
+    python -m benchmarks.bench_state_memory --iterations 8 --articles 80 --summary-chars 3000
+
+Runs a synthetic research loop through LangGraph twice with an in-memory
+checkpointer: once with plain channels whose nodes return whole new
+copies of the growing collections (how the graph used to work), once
+with the delta-channel reducers of ``agent.ResearchState``. Summaries are
+generated up front and shared by both runs, so the numbers reflect what
+the state handling itself costs: peak traced memory, memory still held
+after the run (mostly the checkpointer's copies), and bytes the
+checkpointer stored.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Annotated, Any, TypedDict
+
+from langgraph.channels.delta import DeltaChannel
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from agent import _add_scores, _extend, _merge, _merge_per_iteration
+
+
+class CopyState(TypedDict):
+    iteration: int
+    found_article_ids: list[int]
+    article_scores: dict[int, float]
+    read_summaries: dict[int, dict[str, Any]]
+    queries_tried: list[str]
+    search_log: list[dict[str, Any]]
+    web_page_summaries: dict[str, dict[str, Any]]
+    urls_tried: list[str]
+
+
+class DeltaState(TypedDict):
+    iteration: int
+    found_article_ids: Annotated[list[int], DeltaChannel(_extend)]
+    article_scores: Annotated[dict[int, float], DeltaChannel(_add_scores)]
+    read_summaries: Annotated[dict[int, dict[str, Any]], DeltaChannel(_merge)]
+    queries_tried: Annotated[list[str], DeltaChannel(_extend)]
+    search_log: Annotated[list[dict[str, Any]], DeltaChannel(_extend)]
+    prompt_tokens: Annotated[dict[int, dict[str, int]], DeltaChannel(_merge_per_iteration)]
+    web_page_summaries: Annotated[dict[str, dict[str, Any]], DeltaChannel(_merge)]
+    urls_tried: Annotated[list[str], DeltaChannel(_extend)]
+
+
+def _corpus(args: argparse.Namespace) -> tuple[dict[int, dict[str, Any]], dict[str, dict[str, Any]]]:
+    body = ("lorem ipsum dolor sit amet " * (args.summary_chars // 27 + 1))[:args.summary_chars]
+    articles = {
+        aid: {
+            "id": aid,
+            "original_title": f"Article {aid}",
+            "summary_tldr": body[:200],
+            "summary_text": body,
+            "summary_tags": ["economy", "policy"],
+            "published_at": "2026-01-01T00:00:00+00:00",
+        }
+        for aid in range(args.iterations * args.articles)
+    }
+    pages = {
+        f"https://example.com/{i}": {"title": f"Page {i}", "summary": body, "success": True}
+        for i in range(args.iterations * args.pages)
+    }
+    return articles, pages
+
+
+def _batch(args: argparse.Namespace, iteration: int, items: dict, per_iteration: int) -> dict:
+    keys = list(items)[(iteration - 1) * per_iteration:iteration * per_iteration]
+    return {k: items[k] for k in keys}
+
+
+def build(kind: str, args: argparse.Namespace, articles: dict, pages: dict):
+    delta = kind == "delta"
+
+    def plan(state: dict) -> dict:
+        iteration = state["iteration"] + 1
+        queries = [f"query {iteration}-{i}" for i in range(3)]
+        entry = {"iteration": iteration, "db_planned": queries, "reasoning": "..." * 50}
+        if delta:
+            return {
+                "iteration": iteration,
+                "queries_tried": queries,
+                "search_log": [entry],
+                "prompt_tokens": {iteration: {"plan_search": 1500}},
+            }
+        return {
+            "iteration": iteration,
+            "queries_tried": state["queries_tried"] + queries,
+            "search_log": state["search_log"] + [{**entry, "prompt_tokens": {"plan_search": 1500}}],
+        }
+
+    def search(state: dict) -> dict:
+        new_ids = list(_batch(args, state["iteration"], articles, args.articles))
+        gains = {aid: 1.0 / (60 + pos) for pos, aid in enumerate(new_ids, start=1)}
+        if delta:
+            return {"found_article_ids": new_ids, "article_scores": gains}
+        scores = dict(state["article_scores"])
+        for aid, gain in gains.items():
+            scores[aid] = scores.get(aid, 0.0) + gain
+        return {"found_article_ids": state["found_article_ids"] + new_ids, "article_scores": scores}
+
+    def read(state: dict) -> dict:
+        fetched = _batch(args, state["iteration"], articles, args.articles)
+        read_pages = _batch(args, state["iteration"], pages, args.pages)
+        if delta:
+            return {
+                "read_summaries": fetched,
+                "web_page_summaries": read_pages,
+                "urls_tried": list(read_pages),
+            }
+        return {
+            "read_summaries": {**state["read_summaries"], **fetched},
+            "web_page_summaries": {**state["web_page_summaries"], **read_pages},
+            "urls_tried": list(state["urls_tried"]) + list(read_pages),
+        }
+
+    def analyze(state: dict) -> dict:
+        if delta:
+            return {"prompt_tokens": {state["iteration"]: {"analyze_and_decide": 6000}}}
+        log = state["search_log"]
+        last = {**log[-1], "prompt_tokens": {**log[-1]["prompt_tokens"], "analyze_and_decide": 6000}}
+        return {"search_log": log[:-1] + [last]}
+
+    def route(state: dict) -> str:
+        return "plan" if state["iteration"] < args.iterations else END
+
+    graph = StateGraph(DeltaState if delta else CopyState)
+    for name, fn in (("plan", plan), ("search", search), ("read", read), ("analyze", analyze)):
+        graph.add_node(name, fn)
+    graph.add_edge(START, "plan")
+    graph.add_edge("plan", "search")
+    graph.add_edge("search", "read")
+    graph.add_edge("read", "analyze")
+    graph.add_conditional_edges("analyze", route, {"plan": "plan", END: END})
+    saver = InMemorySaver()
+    return graph.compile(checkpointer=saver), saver
+
+
+def _stored_bytes(saver: InMemorySaver) -> int:
+    total = sum(len(blob) for _, blob in saver.blobs.values())
+    for namespaces in saver.storage.values():
+        for checkpoints in namespaces.values():
+            total += sum(len(cp[1]) + len(meta[1]) for cp, meta, _ in checkpoints.values())
+    for writes in saver.writes.values():
+        total += sum(len(value[1]) for _, _, value, _ in writes.values())
+    return total
+
+
+async def run(kind: str, args: argparse.Namespace, articles: dict, pages: dict) -> dict[str, float]:
+    graph, saver = build(kind, args, articles, pages)
+    initial: dict[str, Any] = {
+        "iteration": 0,
+        "found_article_ids": [],
+        "article_scores": {},
+        "read_summaries": {},
+        "queries_tried": [],
+        "search_log": [],
+        "web_page_summaries": {},
+        "urls_tried": [],
+    }
+    config = {"configurable": {"thread_id": kind}, "recursion_limit": 10 * args.iterations}
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    result = await graph.ainvoke(initial, config, durability="sync")
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(result["read_summaries"]) == args.iterations * args.articles
+    assert len(result["search_log"]) == args.iterations
+    return {
+        "peak_mb": (peak - base) / 1e6,
+        "retained_mb": (current - base) / 1e6,
+        "checkpoint_mb": _stored_bytes(saver) / 1e6,
+        "seconds": elapsed,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=8)
+    parser.add_argument("--articles", type=int, default=80, help="new articles per iteration")
+    parser.add_argument("--pages", type=int, default=5, help="web pages read per iteration")
+    parser.add_argument("--summary-chars", type=int, default=3000)
+    args = parser.parse_args()
+
+    articles, pages = _corpus(args)
+    print(
+        f"{args.iterations} iterations, {args.articles} articles + {args.pages} pages each, "
+        f"{args.summary_chars}-char summaries"
+    )
+    for kind in ("copy", "delta"):
+        stats = await run(kind, args, articles, pages)
+        print(
+            f"  {kind:6s} peak={stats['peak_mb']:7.2f}MB  retained={stats['retained_mb']:7.2f}MB  "
+            f"checkpoints={stats['checkpoint_mb']:7.2f}MB  time={stats['seconds'] * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
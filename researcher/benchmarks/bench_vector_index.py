@@ -0,0 +1,166 @@
+"""Local memory-mapped vector index vs pgvector.
+
+Usage (from researcher/):
+
+    # local index only, synthetic vectors
+    python -m benchmarks.bench_vector_index --rows 100000 1000000
+
+    # same corpus both ways: build it first with bench_filtered_ann --setup
+    python -m benchmarks.bench_filtered_ann --setup --rows 1000000
+    python -m benchmarks.bench_vector_index --pgvector
+
+Local timings include only the index scan; pgvector timings include the
+search query round trip. With ``--pgvector`` the local index is loaded
+from the ``bench_ann`` schema so both engines answer identical queries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import date, timedelta
+
+import asyncpg
+import numpy as np
+
+import db
+from benchmarks._timing import summarize, time_async
+from benchmarks.bench_filtered_ann import SCHEMA, query_vectors
+from vector_index import DIMENSIONS, VectorIndex
+
+REGIONS = ["jp", "us", "kr", "eu", "xx"]
+REGION_WEIGHTS = [0.50, 0.30, 0.15, 0.04, 0.01]
+
+
+def _cases() -> list[tuple[str, str | None, str | None]]:
+    month_ago = (date.today() - timedelta(days=30)).isoformat()
+    return [
+        ("unfiltered", None, None),
+        ("region kr", "kr", None),
+        ("region xx", "xx", None),
+        ("last 30 days", None, month_ago),
+    ]
+
+
+def _synthetic_index(directory: str, rows: int, dtype: str) -> VectorIndex:
+    rng = np.random.default_rng(0)
+    index = VectorIndex(directory, dtype)
+    now = int(time.time())
+    for start in range(0, rows, 100_000):
+        n = min(100_000, rows - start)
+        index.upsert(
+            list(range(start + 1, start + n + 1)),
+            rng.standard_normal((n, DIMENSIONS), dtype=np.float32),
+            list(rng.choice(REGIONS, size=n, p=REGION_WEIGHTS)),
+            list(now - rng.integers(0, 365 * 86400, size=n)),
+        )
+    return index
+
+
+async def _load_bench_ann(directory: str, dtype: str, dsn: str) -> VectorIndex:
+    index = VectorIndex(directory, dtype)
+    conn = await asyncpg.connect(dsn)
+    await db._init_connection(conn)
+    try:
+        last_id = 0
+        while True:
+            rows = await conn.fetch(
+                f"""
+                SELECT a.id, a.embedding, f.region_id, a.published_at
+                FROM {SCHEMA}.articles a JOIN {SCHEMA}.feeds f ON f.id = a.feed_id
+                WHERE a.id > $1 ORDER BY a.id LIMIT 50000
+                """,
+                last_id,
+            )
+            if not rows:
+                break
+            index.upsert(
+                [r["id"] for r in rows],
+                np.array([np.asarray(r["embedding"], dtype=np.float32) for r in rows]),
+                [r["region_id"] for r in rows],
+                [int(r["published_at"].timestamp()) for r in rows],
+            )
+            last_id = rows[-1]["id"]
+    finally:
+        await conn.close()
+    return index
+
+
+async def _time_local(index: VectorIndex, queries: list[np.ndarray], limit: int, runs: int):
+    results = {}
+    for label, region, date_from in _cases():
+        timings: list[float] = []
+        hits = []
+        for q in queries:
+            run_times, found = await time_async(
+                lambda: asyncio.to_thread(index.search, q, limit, region, date_from),
+                runs,
+                warmup=1,
+            )
+            timings.extend(run_times)
+            hits.append({aid for aid, _ in found})
+        results[label] = (timings, hits)
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--pgvector", action="store_true")
+    parser.add_argument("--dtype", default="float32", choices=["float16", "float32"])
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.pgvector:
+        rng = np.random.default_rng(1)
+        queries = list(rng.standard_normal((args.queries, DIMENSIONS), dtype=np.float32))
+        for rows in args.rows:
+            with tempfile.TemporaryDirectory() as tmp:
+                index = _synthetic_index(tmp, rows, args.dtype)
+                print(f"local index, {rows} rows ({args.dtype})")
+                for label, (timings, _) in (await _time_local(index, queries, args.limit, args.runs)).items():
+                    print(f"  {label:14s} {summarize(timings)}")
+        return
+
+    base_dsn = db.DATABASE_URL
+    vectors = await query_vectors(base_dsn, args.queries)
+    texts = [f"bench-query-{i}" for i in range(len(vectors))]
+    for text, vec in zip(texts, vectors):
+        db._cache_embedding(text, vec)
+    sep = "&" if "?" in base_dsn else "?"
+    db.DATABASE_URL = f"{base_dsn}{sep}search_path={SCHEMA},public"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = await _load_bench_ann(tmp, args.dtype, base_dsn)
+        print(f"{index.count} articles from schema {SCHEMA}")
+        local = await _time_local(
+            index, [np.asarray(v, dtype=np.float32) for v in vectors], args.limit, args.runs
+        )
+        try:
+            for label, region, date_from in _cases():
+                timings: list[float] = []
+                recalls: list[float] = []
+                local_timings, local_hits = local[label]
+                for text, expected in zip(texts, local_hits):
+                    run_times, rows = await time_async(
+                        lambda: db.semantic_search(text, args.limit, region, date_from),
+                        args.runs,
+                        warmup=1,
+                    )
+                    timings.extend(run_times)
+                    # The local scan is exact, so it doubles as ground truth
+                    found = {r["id"] for r in rows}
+                    recalls.append(len(found & expected) / max(len(expected), 1))
+                print(label)
+                print(f"  local     {summarize(local_timings)}  recall=100.0%")
+                print(f"  pgvector  {summarize(timings)}  recall={sum(recalls) / len(recalls):6.1%}")
+        finally:
+            await db.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
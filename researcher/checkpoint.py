@@ -0,0 +1,166 @@
+"""Postgres checkpointing for the research graph.
+
+LangGraph saves the graph state after every step through this saver, so
+a run interrupted by a restart or deploy resumes from its last completed
+node instead of starting over (the thread id is the research task id).
+It follows the layout of LangGraph's own Postgres saver (checkpoints,
+per-channel value blobs stored only when a channel changes, pending
+writes) but runs on the service's asyncpg pool rather than psycopg.
+"""
+
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+import db
+
+
+def _thread_config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+class PostgresCheckpointer(BaseCheckpointSaver[int]):
+    """Async-only checkpoint saver backed by the ``research_checkpoint*`` tables."""
+
+    async def _to_tuple(self, row: dict[str, Any], writes: list[dict[str, Any]]) -> CheckpointTuple:
+        thread_id, checkpoint_ns = row["thread_id"], row["checkpoint_ns"]
+        checkpoint: Checkpoint = self.serde.loads_typed((row["type"], row["checkpoint"]))
+        blobs = await db.get_checkpoint_blobs(
+            thread_id,
+            checkpoint_ns,
+            {ch: str(v) for ch, v in checkpoint["channel_versions"].items()},
+        )
+        values = {
+            b["channel"]: self.serde.loads_typed((b["type"], b["blob"]))
+            for b in blobs
+            if b["type"] != "empty"
+        }
+        writes = sorted(writes, key=lambda w: writes_sort_key(w["task_path"], w["task_id"], w["idx"]))
+        parent_id = row["parent_checkpoint_id"]
+        return CheckpointTuple(
+            config=_thread_config(thread_id, checkpoint_ns, row["checkpoint_id"]),
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((row["metadata_type"], row["metadata"])),
+            parent_config=_thread_config(thread_id, checkpoint_ns, parent_id) if parent_id else None,
+            pending_writes=[
+                (w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["blob"])))
+                for w in writes
+            ],
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        configurable = config["configurable"]
+        row = await db.get_checkpoint(
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            get_checkpoint_id(config),
+        )
+        if row is None:
+            return None
+        return await self._to_tuple(row, row["writes"])
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is None:
+            raise ValueError("Listing checkpoints requires a thread_id")
+        configurable = config["configurable"]
+        rows = await db.list_checkpoints(
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns"),
+            get_checkpoint_id(before) if before else None,
+            # Metadata filtering happens after decoding
+            None if filter else limit,
+        )
+        returned = 0
+        for row in rows:
+            if limit is not None and returned >= limit:
+                return
+            full = await db.get_checkpoint(row["thread_id"], row["checkpoint_ns"], row["checkpoint_id"])
+            if full is None:
+                continue
+            tup = await self._to_tuple(full, full["writes"])
+            if filter and any(tup.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            returned += 1
+            yield tup
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")  # type: ignore[misc]
+        blobs = [
+            (channel, str(version), *(
+                self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            ))
+            for channel, version in new_versions.items()
+        ]
+        await db.put_checkpoint(
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            configurable.get("checkpoint_id"),
+            self.serde.dumps_typed(stored),
+            self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+            blobs,
+        )
+        return _thread_config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        rows = [
+            (
+                configurable["thread_id"],
+                configurable.get("checkpoint_ns", ""),
+                configurable["checkpoint_id"],
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        # Special writes (errors, interrupts) replace earlier ones
+        await db.put_checkpoint_writes(rows, overwrite=all(w[0] in WRITES_IDX_MAP for w in writes))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await db.delete_checkpoints([thread_id])
@@ -9,9 +9,167 @@ EMBEDDER_URL = os.environ.get("EMBEDDER_URL", "http://localhost:8000")
 RESEARCH_MODEL = os.environ.get("RESEARCH_MODEL", "deepseek/deepseek-v3.2")
 RESEARCH_MAX_ITERATIONS = int(os.environ.get("RESEARCH_MAX_ITERATIONS", "8"))
 
+# Hybrid search: "sql" fuses keyword + semantic ranks in Postgres,
+# "python" runs both searches separately and fuses in-process
+HYBRID_SEARCH_MODE = os.environ.get("HYBRID_SEARCH_MODE", "sql").lower()
+HYBRID_CANDIDATES = int(os.environ.get("HYBRID_CANDIDATES", "100"))
+RRF_K = int(os.environ.get("RRF_K", "60"))
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+# Cross-encoder reranking (embedder /rerank) against the research
+# question: how many of an iteration's new DB articles are kept, and how
+# many unread web results are ranked to pick the pages to read
+RERANK_ENABLED = os.environ.get("RERANK_ENABLED", "true").lower() == "true"
+RERANK_DB_TOP_N = int(os.environ.get("RERANK_DB_TOP_N", "30"))
+RERANK_WEB_CANDIDATES = int(os.environ.get("RERANK_WEB_CANDIDATES", "20"))
+RERANK_TIMEOUT = float(os.environ.get("RERANK_TIMEOUT", "10"))
+
+# Excluding already-found articles: "auto" picks inline / overfetch /
+# temp_table by set size; any of those names forces that strategy
+SEARCH_EXCLUDE_STRATEGY = os.environ.get("SEARCH_EXCLUDE_STRATEGY", "auto").lower()
+if SEARCH_EXCLUDE_STRATEGY not in ("auto", "inline", "overfetch", "temp_table"):
+    # An unknown name would silently turn exclusion off
+    raise ValueError(
+        f"SEARCH_EXCLUDE_STRATEGY must be auto, inline, overfetch or temp_table, "
+        f"not {SEARCH_EXCLUDE_STRATEGY!r}"
+    )
+EXCLUDE_INLINE_MAX = int(os.environ.get("EXCLUDE_INLINE_MAX", "64"))
+EXCLUDE_OVERFETCH_MAX = int(os.environ.get("EXCLUDE_OVERFETCH_MAX", "256"))
+HNSW_EF_SEARCH_DEFAULT = int(os.environ.get("HNSW_EF_SEARCH_DEFAULT", "40"))
+HNSW_EF_SEARCH_MAX = int(os.environ.get("HNSW_EF_SEARCH_MAX", "1000"))
+
+# Filtered vector search: "auto" picks hnsw / iterative / exact from the
+# planner's estimate of how many embedded articles match the filters
+ANN_STRATEGY = os.environ.get("ANN_STRATEGY", "auto").lower()
+ANN_EXACT_MAX_ROWS = int(os.environ.get("ANN_EXACT_MAX_ROWS", "4000"))
+ANN_EF_SLACK = float(os.environ.get("ANN_EF_SLACK", "1.5"))
+ANN_STATS_TTL = int(os.environ.get("ANN_STATS_TTL", "300"))
+
+# In-process memory-mapped vector index (replaces pgvector for semantic
+# search); deletions and region changes are reconciled less often
+LOCAL_VECTOR_INDEX = os.environ.get("LOCAL_VECTOR_INDEX", "false").lower() == "true"
+VECTOR_INDEX_DIR = os.environ.get("VECTOR_INDEX_DIR", "/tmp/kaiwa-vector-index")
+VECTOR_INDEX_DTYPE = os.environ.get("VECTOR_INDEX_DTYPE", "float32")
+VECTOR_INDEX_REFRESH_SECONDS = int(os.environ.get("VECTOR_INDEX_REFRESH_SECONDS", "60"))
+VECTOR_INDEX_RECONCILE_SECONDS = int(os.environ.get("VECTOR_INDEX_RECONCILE_SECONDS", "3600"))
+
+# Research task events: flushed to research_task_events every N events
+# or after the interval, whichever comes first
+EVENT_BATCH_SIZE = int(os.environ.get("EVENT_BATCH_SIZE", "20"))
+EVENT_FLUSH_INTERVAL = float(os.environ.get("EVENT_FLUSH_INTERVAL", "1.0"))
+
+# Cross-replica event fan-out (Postgres LISTEN/NOTIFY); remote streams
+# recheck task status after this many idle seconds
+PUBSUB_CHANNEL = os.environ.get("PUBSUB_CHANNEL", "research_events")
+PUBSUB_IDLE_CHECK_SECONDS = float(os.environ.get("PUBSUB_IDLE_CHECK_SECONDS", "15"))
+
+# Events kept in memory per task for SSE subscribers and Last-Event-ID
+# resume; older ones are read back from research_task_events
+STREAM_BUFFER_SIZE = int(os.environ.get("STREAM_BUFFER_SIZE", "1000"))
+
+# LLM progress streaming: token deltas are coalesced for this long or
+# this many characters; full-text snapshots are sent periodically
+PROGRESS_FLUSH_INTERVAL = float(os.environ.get("PROGRESS_FLUSH_INTERVAL", "0.1"))
+PROGRESS_FLUSH_CHARS = int(os.environ.get("PROGRESS_FLUSH_CHARS", "512"))
+PROGRESS_SNAPSHOT_INTERVAL = float(os.environ.get("PROGRESS_SNAPSHOT_INTERVAL", "2.0"))
+
+# LLM response cache (Postgres): identical prompts to the same model are
+# answered from llm_cache; requests can opt out with bypass_cache
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_PRUNE_EVERY = int(os.environ.get("LLM_CACHE_PRUNE_EVERY", "100"))
+
+# Per-node LLM profiles: model, output token cap and seconds before the
+# call is abandoned. A timed-out or failing call moves on to the next
+# model of RESEARCH_FALLBACK_MODELS (comma-separated, fastest first)
+LLM_MODEL_PLAN = os.environ.get("LLM_MODEL_PLAN", RESEARCH_MODEL)
+LLM_MODEL_ANALYZE = os.environ.get("LLM_MODEL_ANALYZE", RESEARCH_MODEL)
+LLM_MODEL_COMPILE = os.environ.get("LLM_MODEL_COMPILE", RESEARCH_MODEL)
+LLM_MAX_TOKENS_PLAN = int(os.environ.get("LLM_MAX_TOKENS_PLAN", "1024"))
+LLM_MAX_TOKENS_ANALYZE = int(os.environ.get("LLM_MAX_TOKENS_ANALYZE", "1024"))
+LLM_MAX_TOKENS_COMPILE = int(os.environ.get("LLM_MAX_TOKENS_COMPILE", "4096"))
+LLM_TIMEOUT_PLAN = float(os.environ.get("LLM_TIMEOUT_PLAN", "30"))
+LLM_TIMEOUT_ANALYZE = float(os.environ.get("LLM_TIMEOUT_ANALYZE", "30"))
+LLM_TIMEOUT_COMPILE = float(os.environ.get("LLM_TIMEOUT_COMPILE", "120"))
+RESEARCH_FALLBACK_MODELS = [
+    m.strip()
+    for m in os.environ.get("RESEARCH_FALLBACK_MODELS", "google/gemini-2.5-flash-lite").split(",")
+    if m.strip()
+]
+
+# Research job queue: tasks run at most this many at a time per replica;
+# idle schedulers poll for work queued on other replicas this often
+RESEARCH_MAX_CONCURRENT = int(os.environ.get("RESEARCH_MAX_CONCURRENT", "3"))
+RESEARCH_QUEUE_POLL_SECONDS = float(os.environ.get("RESEARCH_QUEUE_POLL_SECONDS", "2.0"))
+
+# Interrupted runs: running tasks heartbeat this often; one silent for
+# RESEARCH_ORPHAN_TIMEOUT is requeued and resumes from its last graph
+# checkpoint, up to RESEARCH_MAX_ATTEMPTS claims in total. Checkpoints of
+# finished tasks are deleted; stray ones after RESEARCH_CHECKPOINT_MAX_AGE
+RESEARCH_HEARTBEAT_SECONDS = float(os.environ.get("RESEARCH_HEARTBEAT_SECONDS", "10"))
+RESEARCH_ORPHAN_TIMEOUT = float(os.environ.get("RESEARCH_ORPHAN_TIMEOUT", "60"))
+RESEARCH_MAX_ATTEMPTS = int(os.environ.get("RESEARCH_MAX_ATTEMPTS", "3"))
+RESEARCH_CHECKPOINT_MAX_AGE = int(os.environ.get("RESEARCH_CHECKPOINT_MAX_AGE", "604800"))
+
+# Per-task time budget: requests may ask for up to the max, otherwise the
+# default applies. As it runs low nodes cut LLM timeouts and web reads,
+# and once the next iteration wouldn't leave the compile reserve the run
+# compiles with what it has
+RESEARCH_DEADLINE_SECONDS = float(os.environ.get("RESEARCH_DEADLINE_SECONDS", "300"))
+RESEARCH_DEADLINE_MAX_SECONDS = float(os.environ.get("RESEARCH_DEADLINE_MAX_SECONDS", "1800"))
+RESEARCH_COMPILE_RESERVE_SECONDS = float(os.environ.get("RESEARCH_COMPILE_RESERVE_SECONDS", "45"))
+
+# Novelty early-stop: from RESEARCH_NOVELTY_MIN_ITERATIONS on, an
+# iteration whose novelty (mean of the new-article ratio, the new-URL
+# share and the topic shift of the new articles) is below the threshold
+# goes straight to compile_report without the analyze_and_decide call.
+# Topic shift is the cosine distance the embedding centroid of all read
+# articles moves by, divided by the scale and capped at 1
+RESEARCH_NOVELTY_ENABLED = os.environ.get("RESEARCH_NOVELTY_ENABLED", "true").lower() == "true"
+RESEARCH_NOVELTY_THRESHOLD = float(os.environ.get("RESEARCH_NOVELTY_THRESHOLD", "0.15"))
+RESEARCH_NOVELTY_MIN_ITERATIONS = int(os.environ.get("RESEARCH_NOVELTY_MIN_ITERATIONS", "2"))
+RESEARCH_NOVELTY_SHIFT_SCALE = float(os.environ.get("RESEARCH_NOVELTY_SHIFT_SCALE", "0.05"))
+
+# Batch submissions: at most this many queries per POST /research/batch
+RESEARCH_BATCH_MAX_ITEMS = int(os.environ.get("RESEARCH_BATCH_MAX_ITEMS", "20"))
+
+# Reusing recent research with a similar query and identical filters:
+# serve its report as-is above the serve threshold/age, otherwise seed a
+# new run with its articles and queries above the seed threshold/age
+RESEARCH_REUSE_ENABLED = os.environ.get("RESEARCH_REUSE_ENABLED", "true").lower() == "true"
+RESEARCH_REUSE_SERVE_SIMILARITY = float(os.environ.get("RESEARCH_REUSE_SERVE_SIMILARITY", "0.97"))
+RESEARCH_REUSE_SERVE_MAX_AGE = int(os.environ.get("RESEARCH_REUSE_SERVE_MAX_AGE", "21600"))
+RESEARCH_REUSE_SEED_SIMILARITY = float(os.environ.get("RESEARCH_REUSE_SEED_SIMILARITY", "0.85"))
+RESEARCH_REUSE_SEED_MAX_AGE = int(os.environ.get("RESEARCH_REUSE_SEED_MAX_AGE", "604800"))
+
+# Prompt context packing: per-node token budgets for source material,
+# the share of it web pages may take, and how sources are ranked/deduped
+CONTEXT_BUDGET_PLAN = int(os.environ.get("CONTEXT_BUDGET_PLAN", "1500"))
+CONTEXT_BUDGET_ANALYZE = int(os.environ.get("CONTEXT_BUDGET_ANALYZE", "6000"))
+CONTEXT_BUDGET_COMPILE = int(os.environ.get("CONTEXT_BUDGET_COMPILE", "12000"))
+CONTEXT_WEB_SHARE = float(os.environ.get("CONTEXT_WEB_SHARE", "0.3"))
+CONTEXT_RECENCY_WEIGHT = float(os.environ.get("CONTEXT_RECENCY_WEIGHT", "0.3"))
+CONTEXT_RECENCY_HALF_LIFE_DAYS = float(os.environ.get("CONTEXT_RECENCY_HALF_LIFE_DAYS", "7"))
+CONTEXT_DEDUPE_THRESHOLD = float(os.environ.get("CONTEXT_DEDUPE_THRESHOLD", "0.6"))
+
+# Near-duplicate collapsing: a fetched article within this cosine
+# distance of one already read (or, if either has no embedding, whose
+# title MinHash similarity reaches the threshold) is folded into it as a
+# duplicate instead of being added to the prompt sources
+RESEARCH_DEDUPE_ENABLED = os.environ.get("RESEARCH_DEDUPE_ENABLED", "true").lower() == "true"
+RESEARCH_DEDUPE_MAX_DISTANCE = float(os.environ.get("RESEARCH_DEDUPE_MAX_DISTANCE", "0.08"))
+RESEARCH_DEDUPE_TITLE_SIMILARITY = float(os.environ.get("RESEARCH_DEDUPE_TITLE_SIMILARITY", "0.7"))
+
 # Web search settings
 SEARXNG_URL = os.environ.get("SEARXNG_URL", "http://kaiwa-searxng")
 WEBREADER_URL = os.environ.get("WEBREADER_URL", "http://kaiwa-webreader")
 WEB_SEARCH_ENABLED = os.environ.get("WEB_SEARCH_ENABLED", "true").lower() == "true"
 WEB_SEARCH_MAX_RESULTS = int(os.environ.get("WEB_SEARCH_MAX_RESULTS", "10"))
 WEB_READ_MAX_PAGES = int(os.environ.get("WEB_READ_MAX_PAGES", "5"))
+
+# Speculative web reads: the top WEB_PREFETCH_TOP_K unread URLs of each
+# SearXNG response go to webreader as soon as it arrives, and pages left
+# for the next iteration are read while the current one is analyzed
+WEB_PREFETCH_ENABLED = os.environ.get("WEB_PREFETCH_ENABLED", "true").lower() == "true"
+WEB_PREFETCH_TOP_K = int(os.environ.get("WEB_PREFETCH_TOP_K", "3"))
@@ -0,0 +1,151 @@
+"""Token-budgeted packing of sources into LLM prompts.
+
+Nodes hand over their candidate articles / web pages ranked by search
+score and recency; ``pack`` renders them in that order, skips any that
+are near-duplicates of one already taken, and stops adding once the
+node's token budget is spent. Rendered strings and their token counts
+are cached per research run, so sources carried over between iterations
+are not re-rendered or re-tokenized.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Sequence
+
+from config import CONTEXT_DEDUPE_THRESHOLD, CONTEXT_RECENCY_HALF_LIFE_DAYS, CONTEXT_RECENCY_WEIGHT
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+# ── Token counting ────────────────────────────────────────────────────
+
+_encoder: Any = None
+_encoder_failed = False
+
+
+def count_tokens(text: str) -> int:
+    """Token count under the cl100k encoding, or ~4 chars/token if the
+    tiktoken vocabulary can't be loaded (it is fetched on first use)."""
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            _encoder_failed = True
+            logger.warning("tiktoken unavailable, estimating tokens from length: %s", e)
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+# ── Ranking ───────────────────────────────────────────────────────────
+
+def _recency(published_at: str | None, now: datetime) -> float:
+    if not published_at:
+        return 0.0
+    try:
+        published = datetime.fromisoformat(published_at)
+    except ValueError:
+        return 0.0
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    age_days = max((now - published).total_seconds() / 86400, 0.0)
+    return 0.5 ** (age_days / CONTEXT_RECENCY_HALF_LIFE_DAYS)
+
+
+def rank_articles(
+    summaries: dict[int, dict[str, Any]],
+    scores: dict[int, float],
+) -> list[tuple[int, dict[str, Any]]]:
+    """Order articles by normalized search score blended with recency."""
+    now = datetime.now(timezone.utc)
+    top = max(scores.values(), default=0.0) or 1.0
+
+    def _key(item: tuple[int, dict[str, Any]]) -> float:
+        aid, s = item
+        relevance = scores.get(aid, 0.0) / top
+        return (
+            (1 - CONTEXT_RECENCY_WEIGHT) * relevance
+            + CONTEXT_RECENCY_WEIGHT * _recency(s.get("published_at"), now)
+        )
+
+    # Stable sort keeps discovery order among equal scores
+    return sorted(summaries.items(), key=_key, reverse=True)
+
+
+# ── Packing ───────────────────────────────────────────────────────────
+
+@dataclass
+class Packed:
+    lines: list[str]
+    tokens: int
+    skipped_duplicates: int = 0
+    skipped_budget: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def _shingles(text: str) -> frozenset[str]:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return frozenset(words)
+    return frozenset(" ".join(words[i:i + 3]) for i in range(len(words) - 2))
+
+
+def _jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def pack(
+    items: Sequence[tuple[Any, dict[str, Any]]],
+    render: Callable[[Any, dict[str, Any]], str],
+    fingerprint_text: Callable[[dict[str, Any]], str],
+    budget: int,
+    cache: dict[tuple[str, Any], tuple[str, int, frozenset[str]]],
+) -> Packed:
+    """Render ranked ``(key, source)`` items until ``budget`` tokens are used.
+
+    Items whose ``fingerprint_text`` overlaps an already-packed item by at
+    least CONTEXT_DEDUPE_THRESHOLD (word-trigram Jaccard) are skipped; so
+    are items too large for what is left of the budget.
+    """
+    packed = Packed(lines=[], tokens=0)
+    taken: list[frozenset[str]] = []
+    for key, source in items:
+        cache_key = (render.__name__, key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            line = render(key, source)
+            # +1 for the newline joining it to the previous item
+            cached = (line, count_tokens(line) + 1, _shingles(fingerprint_text(source)))
+            cache[cache_key] = cached
+        line, tokens, shingles = cached
+
+        if any(_jaccard(shingles, other) >= CONTEXT_DEDUPE_THRESHOLD for other in taken):
+            packed.skipped_duplicates += 1
+            continue
+        if packed.tokens + tokens > budget:
+            packed.skipped_budget += 1
+            continue
+        packed.lines.append(line)
+        packed.tokens += tokens
+        taken.append(shingles)
+    return packed
+
+
+def forget(cache: dict[tuple[str, Any], Any], keys: set[Any]) -> None:
+    """Drop the cached renderings of ``keys`` (e.g. sources that changed)."""
+    if keys:
+        for cache_key in [k for k in cache if k[1] in keys]:
+            del cache[cache_key]
@@ -1,13 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import binascii
 import json
+import logging
+import math
+import struct
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Collection, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
 import asyncpg
 import httpx
 
-from config import DATABASE_URL, EMBEDDER_URL
+from config import (
+    ANN_EF_SLACK,
+    ANN_EXACT_MAX_ROWS,
+    ANN_STATS_TTL,
+    ANN_STRATEGY,
+    DATABASE_URL,
+    EMBEDDER_URL,
+    EXCLUDE_INLINE_MAX,
+    EXCLUDE_OVERFETCH_MAX,
+    HYBRID_CANDIDATES,
+    HYBRID_SEARCH_MODE,
+    HNSW_EF_SEARCH_DEFAULT,
+    HNSW_EF_SEARCH_MAX,
+    LOCAL_VECTOR_INDEX,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    RRF_K,
+    SEARCH_EXCLUDE_STRATEGY,
+)
+
+logger = logging.getLogger(__name__)
 
 
 _pool: asyncpg.Pool | None = None
@@ -16,7 +48,9 @@ _pool: asyncpg.Pool | None = None
 async def get_pool() -> asyncpg.Pool:
     global _pool
     if _pool is None:
-        _pool = await asyncpg.create_pool(DATABASE_URL, min_size=2, max_size=10)
+        _pool = await asyncpg.create_pool(
+            DATABASE_URL, min_size=2, max_size=10, init=_init_connection
+        )
     return _pool
 
 
@@ -27,6 +61,51 @@ async def close_pool() -> None:
         _pool = None
 
 
+# ── pgvector Codec ────────────────────────────────────────────────────
+
+# pgvector's binary wire format: uint16 dimensions, uint16 unused, then
+# big-endian float32 values. Vectors travel as packed float32 arrays in
+# both directions instead of being formatted/parsed as text.
+_VECTOR_HEADER = struct.Struct(">HH")
+_SWAP_BYTES = sys.byteorder == "little"
+
+
+def encode_vector(value: Sequence[float]) -> bytes:
+    vec = array("f", value)
+    if _SWAP_BYTES:
+        vec.byteswap()
+    return _VECTOR_HEADER.pack(len(vec), 0) + vec.tobytes()
+
+
+def decode_vector(data: bytes) -> array:
+    dim, _ = _VECTOR_HEADER.unpack_from(data)
+    vec = array("f")
+    vec.frombytes(data[_VECTOR_HEADER.size:_VECTOR_HEADER.size + 4 * dim])
+    if _SWAP_BYTES:
+        vec.byteswap()
+    return vec
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    schema = await conn.fetchval(
+        """
+        SELECT n.nspname FROM pg_type t
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = 'vector'
+        """
+    )
+    if schema is None:
+        logger.warning("pgvector type not found; vector columns use the text codec")
+        return
+    await conn.set_type_codec(
+        "vector",
+        schema=schema,
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary",
+    )
+
+
 # ── Table Creation ────────────────────────────────────────────────────
 
 CREATE_TABLE_SQL = """
@@ -46,6 +125,86 @@ CREATE TABLE IF NOT EXISTS research_tasks (
 );
 CREATE INDEX IF NOT EXISTS idx_research_tasks_user
     ON research_tasks(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_research_tasks_created
+    ON research_tasks(created_at DESC, id DESC);
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS query_embedding vector(384);
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS final_state JSONB;
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS reused_from TEXT;
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS run_options JSONB;
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS started_at TIMESTAMPTZ;
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS idx_research_tasks_queued
+    ON research_tasks(created_at, id) WHERE status = 'queued';
+ALTER TABLE research_tasks ADD COLUMN IF NOT EXISTS batch_id TEXT;
+CREATE INDEX IF NOT EXISTS idx_research_tasks_batch
+    ON research_tasks(batch_id) WHERE batch_id IS NOT NULL;
+CREATE TABLE IF NOT EXISTS research_batches (
+    id TEXT PRIMARY KEY,
+    user_id TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    cache_stats JSONB NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS research_batch_cache (
+    batch_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value JSONB NOT NULL,
+    PRIMARY KEY (batch_id, kind, key)
+);
+CREATE TABLE IF NOT EXISTS research_task_events (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    data JSONB,
+    ts TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (task_id, seq)
+);
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_hit_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_cache(last_hit_at);
+CREATE TABLE IF NOT EXISTS research_checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BYTEA NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BYTEA NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE INDEX IF NOT EXISTS idx_research_checkpoints_created
+    ON research_checkpoints(created_at);
+CREATE TABLE IF NOT EXISTS research_checkpoint_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BYTEA,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS research_checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    blob BYTEA,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
 """
 
 
@@ -62,19 +221,217 @@ async def create_task(
     query: str,
     filters: dict[str, Any] | None = None,
     user_id: str | None = None,
+    query_embedding: Sequence[float] | None = None,
+    reused_from: str | None = None,
+    run_options: dict[str, Any] | None = None,
+    batch_id: str | None = None,
 ) -> None:
+    """Queue a task; a scheduler on some replica claims and runs it."""
     pool = await get_pool()
     async with pool.acquire() as conn:
         await conn.execute(
             """
-            INSERT INTO research_tasks (id, user_id, query, filters, status, created_at)
-            VALUES ($1, $2, $3, $4, 'running', NOW())
+            INSERT INTO research_tasks
+                (id, user_id, query, filters, status, created_at, query_embedding,
+                 reused_from, run_options, batch_id)
+            VALUES ($1, $2, $3, $4, 'queued', NOW(), $5, $6, $7, $8)
             """,
             task_id,
             user_id,
             query,
             json.dumps(filters) if filters else None,
+            query_embedding,
+            reused_from,
+            json.dumps(run_options) if run_options else None,
+            batch_id,
+        )
+
+
+# Among queued tasks, prefer users with the fewest tasks running anywhere,
+# then submission order. SKIP LOCKED lets replicas claim concurrently
+# without blocking on (or double-claiming) the same row.
+CLAIM_TASK_SQL = """
+WITH running AS (
+    SELECT user_id, COUNT(*) AS n
+    FROM research_tasks
+    WHERE status = 'running'
+    GROUP BY user_id
+), candidate AS (
+    SELECT t.id, t.started_at AS previously_started
+    FROM research_tasks t
+    LEFT JOIN running r ON r.user_id IS NOT DISTINCT FROM t.user_id
+    WHERE t.status = 'queued'
+    ORDER BY COALESCE(r.n, 0), t.created_at, t.id
+    LIMIT 1
+    FOR UPDATE OF t SKIP LOCKED
+)
+UPDATE research_tasks
+SET status = 'running', claimed_by = $1, started_at = NOW(), heartbeat_at = NOW(),
+    attempts = research_tasks.attempts + 1
+FROM candidate
+WHERE research_tasks.id = candidate.id
+RETURNING research_tasks.id, research_tasks.user_id, research_tasks.query,
+          research_tasks.filters, research_tasks.run_options, research_tasks.attempts,
+          research_tasks.batch_id, candidate.previously_started IS NOT NULL AS resumed
+"""
+
+
+async def claim_next_task(worker_id: str) -> dict[str, Any] | None:
+    """Atomically move the next queued task to running for ``worker_id``."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(CLAIM_TASK_SQL, worker_id)
+    if row is None:
+        return None
+    return _row_to_dict(row)
+
+
+async def heartbeat_tasks(worker_id: str, task_ids: list[str]) -> None:
+    """Mark ``worker_id``'s running tasks as still alive."""
+    if not task_ids:
+        return
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE research_tasks SET heartbeat_at = NOW()
+            WHERE id = ANY($2::text[]) AND claimed_by = $1 AND status = 'running'
+            """,
+            worker_id,
+            task_ids,
+        )
+
+
+async def requeue_worker_tasks(worker_id: str) -> list[str]:
+    """Hand a stopping worker's running tasks back to the queue, without
+    counting the interrupted claim against their attempts."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            UPDATE research_tasks
+            SET status = 'queued', claimed_by = NULL, attempts = GREATEST(attempts - 1, 0)
+            WHERE claimed_by = $1 AND status = 'running'
+            RETURNING id
+            """,
+            worker_id,
+        )
+    return [r["id"] for r in rows]
+
+
+async def requeue_orphaned_tasks(
+    timeout_seconds: float, max_attempts: int
+) -> tuple[list[str], list[str]]:
+    """Recover running tasks whose worker stopped heartbeating.
+
+    Tasks with attempts left go back to the queue (and resume from their
+    last checkpoint when claimed); the rest are failed. Returns the
+    requeued and failed ids.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            UPDATE research_tasks
+            SET status = CASE WHEN attempts < $2 THEN 'queued' ELSE 'error' END,
+                error = CASE WHEN attempts < $2 THEN error
+                             ELSE 'Research was interrupted too many times' END,
+                completed_at = CASE WHEN attempts < $2 THEN NULL ELSE NOW() END,
+                claimed_by = NULL
+            WHERE status = 'running'
+              AND COALESCE(heartbeat_at, started_at, created_at)
+                  < NOW() - make_interval(secs => $1)
+            RETURNING id, status
+            """,
+            timeout_seconds,
+            max_attempts,
         )
+    requeued = [r["id"] for r in rows if r["status"] == "queued"]
+    failed = [r["id"] for r in rows if r["status"] == "error"]
+    return requeued, failed
+
+
+async def get_queue_position(task_id: str) -> int | None:
+    """1-based position among queued tasks, or None if not queued."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            """
+            SELECT COUNT(q.id) + 1
+            FROM research_tasks t
+            LEFT JOIN research_tasks q
+                ON q.status = 'queued' AND (q.created_at, q.id) < (t.created_at, t.id)
+            WHERE t.id = $1 AND t.status = 'queued'
+            GROUP BY t.id
+            """,
+            task_id,
+        )
+
+
+async def create_reused_task(
+    task_id: str,
+    query: str,
+    filters: dict[str, Any] | None,
+    source_id: str,
+    user_id: str | None = None,
+    batch_id: str | None = None,
+) -> None:
+    """Record a submission answered with ``source_id``'s report.
+
+    The copy gets no query embedding, so it never serves as a reuse
+    source itself and a stale report can't be passed on as fresh.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO research_tasks
+                (id, user_id, query, filters, status, report, articles, search_log,
+                 reused_from, created_at, completed_at, batch_id)
+            SELECT $1, $2, $3, $4, 'complete', report, articles, search_log,
+                   id, NOW(), NOW(), $6
+            FROM research_tasks
+            WHERE id = $5
+            """,
+            task_id,
+            user_id,
+            query,
+            json.dumps(filters) if filters else None,
+            source_id,
+            batch_id,
+        )
+
+
+async def find_similar_task(
+    query_embedding: Sequence[float],
+    filters: dict[str, Any],
+    max_age_seconds: int,
+) -> dict[str, Any] | None:
+    """Closest completed task with identical filters finished within
+    ``max_age_seconds``, with its cosine ``similarity`` to the query."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT id, query, completed_at, final_state,
+                   1 - (query_embedding <=> $1) AS similarity
+            FROM research_tasks
+            WHERE status = 'complete'
+              AND query_embedding IS NOT NULL
+              AND completed_at > NOW() - make_interval(secs => $3)
+              AND jsonb_strip_nulls(COALESCE(filters, '{}'::jsonb)) = $2::jsonb
+            ORDER BY query_embedding <=> $1
+            LIMIT 1
+            """,
+            query_embedding,
+            json.dumps({k: v for k, v in filters.items() if v is not None}),
+            max_age_seconds,
+        )
+    if row is None:
+        return None
+    result = _row_to_dict(row)
+    result["completed_at"] = row["completed_at"]
+    return result
 
 
 async def update_task_complete(
@@ -82,7 +439,7 @@ async def update_task_complete(
     report: dict[str, Any],
     articles: list[dict[str, Any]],
     search_log: list[dict[str, Any]],
-    events: list[dict[str, Any]],
+    final_state: dict[str, Any] | None = None,
 ) -> None:
     pool = await get_pool()
     async with pool.acquire() as conn:
@@ -93,7 +450,7 @@ async def update_task_complete(
                 report = $2,
                 articles = $3,
                 search_log = $4,
-                events = $5,
+                final_state = $5,
                 completed_at = NOW()
             WHERE id = $1
             """,
@@ -101,7 +458,7 @@ async def update_task_complete(
             json.dumps(report),
             json.dumps(articles),
             json.dumps(search_log),
-            json.dumps(events),
+            json.dumps(final_state) if final_state is not None else None,
         )
 
 
@@ -119,39 +476,155 @@ async def update_task_error(task_id: str, error: str) -> None:
         )
 
 
-async def get_task(task_id: str) -> dict[str, Any] | None:
+async def insert_task_events(rows: list[tuple[str, int, str, str, datetime]]) -> None:
+    """Append ``(task_id, seq, event, data_json, ts)`` rows in one COPY."""
+    if not rows:
+        return
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.copy_records_to_table(
+            "research_task_events",
+            records=rows,
+            columns=["task_id", "seq", "event", "data", "ts"],
+        )
+
+
+async def get_last_event_seq(task_id: str) -> int:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            "SELECT COALESCE(MAX(seq), 0) FROM research_task_events WHERE task_id = $1",
+            task_id,
+        )
+
+
+async def get_task_events(
+    task_id: str,
+    after_seq: int = 0,
+    limit: int | None = None,
+) -> list[dict[str, Any]]:
+    """Events with ``seq > after_seq`` in order (primary-key range scan)."""
+    params: list[Any] = [task_id, after_seq]
+    sql = """
+        SELECT seq, event, data FROM research_task_events
+        WHERE task_id = $1 AND seq > $2
+        ORDER BY seq
+    """
+    if limit is not None:
+        params.append(limit)
+        sql += f" LIMIT ${len(params)}"
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *params)
+    return [
+        {
+            "seq": r["seq"],
+            "event": r["event"],
+            "data": json.loads(r["data"]) if r["data"] is not None else {},
+        }
+        for r in rows
+    ]
+
+
+TASK_COLUMNS = (
+    "id", "user_id", "query", "filters", "status", "report", "articles",
+    "search_log", "events", "error", "created_at", "completed_at", "reused_from",
+)
+TASK_JSON_COLUMNS = frozenset(
+    {"filters", "report", "articles", "search_log", "events", "final_state", "run_options"}
+)
+
+
+async def get_task(
+    task_id: str,
+    fields: Sequence[str] | None = None,
+    decode_json: Collection[str] | None = None,
+) -> dict[str, Any] | None:
+    """Fetch a task, optionally projecting only ``fields``.
+
+    ``id`` and ``status`` are always included. JSONB columns are decoded
+    only when listed in ``decode_json`` (default: all); others are left
+    as the raw JSON text Postgres returned.
+    """
+    columns = TASK_COLUMNS if fields is None else [
+        c for c in TASK_COLUMNS if c in fields or c in ("id", "status")
+    ]
     pool = await get_pool()
     async with pool.acquire() as conn:
         row = await conn.fetchrow(
-            "SELECT * FROM research_tasks WHERE id = $1", task_id
+            f"SELECT {', '.join(columns)} FROM research_tasks WHERE id = $1", task_id
         )
         if row is None:
             return None
-        return _row_to_dict(row)
+        return _row_to_dict(row, decode_json)
+
+
+def encode_task_cursor(created_at: str, task_id: str) -> str:
+    raw = json.dumps([created_at, task_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
 
+def decode_task_cursor(cursor: str) -> tuple[datetime, str]:
+    """Inverse of encode_task_cursor; raises ValueError on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(task_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+async def list_tasks(
+    limit: int = 20,
+    offset: int = 0,
+    cursor: str | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Newest-first task listing with keyset pagination on (created_at, id).
+
+    Returns the page and the cursor for the next one (None on the last
+    page). ``offset`` is still honoured when no cursor is given.
+    """
+    params: list[Any] = []
+    where = ""
+    if cursor:
+        created_at, task_id = decode_task_cursor(cursor)
+        params += [created_at, task_id]
+        where = "WHERE (created_at, id) < ($1, $2)"
+    params.append(limit + 1)
+    sql = f"""
+        SELECT id, query, filters, status, error, created_at, completed_at
+        FROM research_tasks
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ${len(params)}
+    """
+    if not cursor and offset:
+        params.append(offset)
+        sql += f" OFFSET ${len(params)}"
 
-async def list_tasks(limit: int = 20, offset: int = 0) -> list[dict[str, Any]]:
     pool = await get_pool()
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT id, query, filters, status, error, created_at, completed_at
-            FROM research_tasks
-            ORDER BY created_at DESC
-            LIMIT $1 OFFSET $2
-            """,
-            limit,
-            offset,
-        )
-        return [_row_to_dict(r) for r in rows]
+        rows = await conn.fetch(sql, *params)
+    tasks = [_row_to_dict(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit and tasks:
+        next_cursor = encode_task_cursor(tasks[-1]["created_at"], tasks[-1]["id"])
+    return tasks, next_cursor
 
 
-def _row_to_dict(row: asyncpg.Record) -> dict[str, Any]:
+def _row_to_dict(
+    row: asyncpg.Record,
+    decode_json: Collection[str] | None = None,
+) -> dict[str, Any]:
     d: dict[str, Any] = {}
     for key, val in row.items():
         if isinstance(val, datetime):
             d[key] = val.isoformat()
-        elif isinstance(val, str) and key in ("filters", "report", "articles", "search_log", "events"):
+        elif (
+            isinstance(val, str)
+            and key in TASK_JSON_COLUMNS
+            and (decode_json is None or key in decode_json)
+        ):
             try:
                 d[key] = json.loads(val)
             except (json.JSONDecodeError, TypeError):
@@ -186,13 +659,260 @@ def _build_filter_clause(
         clauses.append(f"f.region_id = ${len(params)}")
     if date_from:
         params.append(date_from)
-        clauses.append(f"a.published_at >= ${len(params)}::timestamptz")
+        clauses.append(f"a.published_at >= ${len(params)}::text::timestamptz")
     if date_to:
         params.append(date_to)
-        clauses.append(f"a.published_at <= ${len(params)}::timestamptz")
+        clauses.append(f"a.published_at <= ${len(params)}::text::timestamptz")
     return " AND ".join(clauses)
 
 
+# ── Exclusion Strategies ──────────────────────────────────────────────
+
+EXCLUDE_TEMP_TABLE = "_research_exclude"
+
+
+def choose_exclude_strategy(exclude_ids: set[int] | None) -> str:
+    """Pick how a search skips already-seen article IDs.
+
+    - ``inline``: ``a.id != ALL($n)`` inside the scan; cheap for small sets.
+    - ``overfetch``: fetch ``limit + len(exclude_ids)`` rows with the
+      unfiltered plan (keeps the ORDER BY-distance HNSW scan) and filter
+      the candidates afterwards.
+    - ``temp_table``: copy the IDs into a transaction-scoped temp table and
+      anti-join, so large sets get a hashed lookup instead of an array scan.
+    """
+    size = len(exclude_ids or ())
+    if size == 0:
+        return "none"
+    if SEARCH_EXCLUDE_STRATEGY != "auto":
+        return SEARCH_EXCLUDE_STRATEGY
+    if size <= EXCLUDE_INLINE_MAX:
+        return "inline"
+    if size <= EXCLUDE_OVERFETCH_MAX:
+        return "overfetch"
+    return "temp_table"
+
+
+class _Exclusion:
+    """Applies the chosen exclusion strategy to a search query."""
+
+    def __init__(self, exclude_ids: set[int] | None, params: list[Any]) -> None:
+        self.ids = exclude_ids or set()
+        self.strategy = choose_exclude_strategy(self.ids)
+        self._params = params
+        self._ids_param: int | None = None
+
+    def _ids_placeholder(self) -> str:
+        if self._ids_param is None:
+            self._params.append(list(self.ids))
+            self._ids_param = len(self._params)
+        return f"${self._ids_param}::int[]"
+
+    def scan_clause(self) -> str:
+        """Condition to AND into the candidate scan's WHERE clause."""
+        if self.strategy == "inline":
+            return f" AND a.id != ALL({self._ids_placeholder()})"
+        if self.strategy == "temp_table":
+            return f" AND NOT EXISTS (SELECT 1 FROM {EXCLUDE_TEMP_TABLE} x WHERE x.id = a.id)"
+        return ""
+
+    def scan_limit(self, limit: int) -> int:
+        if self.strategy == "overfetch":
+            return limit + len(self.ids)
+        return limit
+
+    def wrap(self, sql: str, order_by: str, limit: int) -> str:
+        """Filter over-fetched candidates outside the scan."""
+        if self.strategy != "overfetch":
+            return sql
+        ids = self._ids_placeholder()
+        self._params.append(limit)
+        return f"""
+        SELECT * FROM ({sql}) candidates
+        WHERE candidates.id != ALL({ids})
+        ORDER BY {order_by}
+        LIMIT ${len(self._params)}
+        """
+
+    async def prepare(self, conn: asyncpg.Connection) -> None:
+        """Create the temp table for ``temp_table`` (inside a transaction)."""
+        if self.strategy != "temp_table":
+            return
+        await conn.execute(
+            f"CREATE TEMP TABLE {EXCLUDE_TEMP_TABLE} (id int PRIMARY KEY) ON COMMIT DROP"
+        )
+        await conn.copy_records_to_table(
+            EXCLUDE_TEMP_TABLE, records=[(i,) for i in self.ids]
+        )
+        await conn.execute(f"ANALYZE {EXCLUDE_TEMP_TABLE}")
+
+
+# ── Filtered ANN Planning ─────────────────────────────────────────────
+
+@dataclass
+class AnnPlan:
+    """How a vector scan runs for one query.
+
+    - ``hnsw``: ORDER BY distance over the HNSW index, with ``ef_search``
+      widened so that filtered-out/excluded rows don't starve the result.
+    - ``iterative``: pgvector >= 0.8 iterative index scan, which keeps
+      walking the graph until enough rows pass the filters.
+    - ``exact``: filters are selective enough that scanning the matching
+      rows and sorting by distance is cheaper than the index, with
+      perfect recall.
+    """
+
+    strategy: str
+    estimated_rows: float = 0.0
+    selectivity: float = 1.0
+    settings: dict[str, str] = field(default_factory=dict)
+
+    def distance_sql(self, vector: str) -> str:
+        if self.strategy == "exact":
+            # Any expression other than the bare operator keeps the
+            # planner off the HNSW index
+            return f"(a.embedding <=> {vector}) + 0"
+        return f"a.embedding <=> {vector}"
+
+
+# (region, date_from, date_to) -> (expires_at, estimated rows), least
+# recently used first; filter combinations are open-ended, so it's capped
+_ROW_ESTIMATES_MAX = 256
+_row_estimates: OrderedDict[
+    tuple[str | None, str | None, str | None], tuple[float, float]
+] = OrderedDict()
+_pgvector_version: tuple[int, ...] | None = None
+
+
+async def _get_pgvector_version(conn: asyncpg.Connection) -> tuple[int, ...]:
+    global _pgvector_version
+    if _pgvector_version is None:
+        version = await conn.fetchval(
+            "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+        )
+        try:
+            _pgvector_version = tuple(int(p) for p in (version or "0").split("."))
+        except ValueError:
+            _pgvector_version = (0,)
+    return _pgvector_version
+
+
+async def _estimate_embedded_rows(
+    conn: asyncpg.Connection,
+    region: str | None,
+    date_from: str | None,
+    date_to: str | None,
+) -> float:
+    """Planner row estimate for embedded articles matching the filters."""
+    key = (region, date_from, date_to)
+    cached = _row_estimates.get(key)
+    now = time.monotonic()
+    if cached is not None and cached[0] > now:
+        _row_estimates.move_to_end(key)
+        return cached[1]
+
+    params: list[Any] = []
+    filter_parts = _build_filter_clause(region, date_from, date_to, params)
+    where = "a.embedding IS NOT NULL"
+    if filter_parts:
+        where += f" AND {filter_parts}"
+    plan_json = await conn.fetchval(
+        f"""
+        EXPLAIN (FORMAT JSON)
+        SELECT 1 FROM articles a
+        LEFT JOIN feeds f ON a.feed_id = f.id
+        WHERE {where}
+        """,
+        *params,
+    )
+    plan = json.loads(plan_json) if isinstance(plan_json, str) else plan_json
+    rows = float(plan[0]["Plan"]["Plan Rows"])
+    _row_estimates[key] = (now + ANN_STATS_TTL, rows)
+    _row_estimates.move_to_end(key)
+    while len(_row_estimates) > _ROW_ESTIMATES_MAX:
+        _row_estimates.popitem(last=False)
+    return rows
+
+
+async def plan_ann(
+    conn: asyncpg.Connection,
+    limit: int,
+    region: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    excluded: int = 0,
+) -> AnnPlan:
+    """Choose a vector scan strategy from the filters' selectivity."""
+    wanted = limit + excluded
+    filtered = bool(region or date_from or date_to)
+
+    total = await _estimate_embedded_rows(conn, None, None, None)
+    estimated = (
+        await _estimate_embedded_rows(conn, region, date_from, date_to)
+        if filtered
+        else total
+    )
+    selectivity = min(1.0, max(estimated, 1.0) / max(total, 1.0))
+
+    # Candidates the index must yield for ``wanted`` rows to survive filters
+    needed = wanted / selectivity * (ANN_EF_SLACK if filtered else 1.0)
+    iterative_ok = await _get_pgvector_version(conn) >= (0, 8, 0)
+
+    strategy = ANN_STRATEGY
+    if strategy == "auto":
+        if filtered and estimated <= ANN_EXACT_MAX_ROWS:
+            strategy = "exact"
+        elif needed <= HNSW_EF_SEARCH_MAX or not iterative_ok:
+            strategy = "hnsw"
+        else:
+            strategy = "iterative"
+    elif strategy == "iterative" and not iterative_ok:
+        strategy = "hnsw"
+
+    ann = AnnPlan(strategy=strategy, estimated_rows=estimated, selectivity=selectivity)
+    if strategy == "hnsw":
+        ef_search = max(HNSW_EF_SEARCH_DEFAULT, min(HNSW_EF_SEARCH_MAX, math.ceil(needed)))
+        if ef_search != HNSW_EF_SEARCH_DEFAULT:
+            ann.settings["hnsw.ef_search"] = str(ef_search)
+    elif strategy == "iterative":
+        ef_search = max(HNSW_EF_SEARCH_DEFAULT, min(HNSW_EF_SEARCH_MAX, wanted))
+        ann.settings["hnsw.ef_search"] = str(ef_search)
+        ann.settings["hnsw.iterative_scan"] = "strict_order"
+        ann.settings["hnsw.max_scan_tuples"] = str(max(20000, math.ceil(needed * 2)))
+    return ann
+
+
+@asynccontextmanager
+async def _search_session(
+    exclusion: _Exclusion,
+    ann_limit: int | None = None,
+    region: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+) -> AsyncIterator[tuple[asyncpg.Connection, AnnPlan | None]]:
+    """Acquire a connection set up for one search query.
+
+    When ``ann_limit`` is given the vector scan is planned first; its
+    settings and the exclusion temp table are scoped to a transaction.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        ann = None
+        if ann_limit is not None:
+            ann = await plan_ann(
+                conn, ann_limit, region, date_from, date_to, len(exclusion.ids)
+            )
+        settings = ann.settings if ann else {}
+        if exclusion.strategy != "temp_table" and not settings:
+            yield conn, ann
+            return
+        async with conn.transaction():
+            for name, value in settings.items():
+                await conn.execute(f"SET LOCAL {name} = {value}")
+            await exclusion.prepare(conn)
+            yield conn, ann
+
+
 async def keyword_search(
     query: str,
     limit: int = 50,
@@ -201,7 +921,6 @@ async def keyword_search(
     date_to: str | None = None,
     exclude_ids: set[int] | None = None,
 ) -> list[dict[str, Any]]:
-    pool = await get_pool()
     params: list[Any] = [query]
     fts_cond = f"{TSVECTOR} @@ plainto_tsquery('english', $1)"
 
@@ -209,11 +928,10 @@ async def keyword_search(
     where = fts_cond
     if filter_parts:
         where += f" AND {filter_parts}"
-    if exclude_ids:
-        params.append(list(exclude_ids))
-        where += f" AND a.id != ALL(${len(params)}::int[])"
+    exclusion = _Exclusion(exclude_ids, params)
+    where += exclusion.scan_clause()
 
-    params.append(limit)
+    params.append(exclusion.scan_limit(limit))
     sql = f"""
     SELECT a.id, a.original_title, a.translated_title, a.published_at,
            a.summary_tldr, a.summary_tags, a.summary_sentiment,
@@ -226,22 +944,150 @@ async def keyword_search(
     ORDER BY rank DESC
     LIMIT ${len(params)}
     """
-    async with pool.acquire() as conn:
+    sql = exclusion.wrap(sql, "rank DESC", limit)
+    async with _search_session(exclusion) as (conn, _):
         rows = await conn.fetch(sql, *params)
     return [_search_row(r) for r in rows]
 
 
-async def _get_embedding(text: str) -> list[float] | None:
+# ── Query Embeddings ──────────────────────────────────────────────────
+
+# Process-local LRU of query text -> embedding. Research queries repeat
+# across iterations and tasks, so most lookups avoid the embedder.
+_embedding_cache: OrderedDict[str, array] = OrderedDict()
+
+
+def _cache_embedding(text: str, embedding: array) -> None:
+    _embedding_cache[text] = embedding
+    _embedding_cache.move_to_end(text)
+    while len(_embedding_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+        _embedding_cache.popitem(last=False)
+
+
+def _cached_embedding(text: str) -> array | None:
+    embedding = _embedding_cache.get(text)
+    if embedding is not None:
+        _embedding_cache.move_to_end(text)
+    return embedding
+
+
+async def _embed_texts(texts: list[str]) -> list[array] | None:
+    """Embed ``texts`` with a single embedder round trip.
+
+    Embeddings are returned as packed float32 arrays, ready for the
+    binary vector codec.
+    """
     try:
         async with httpx.AsyncClient(timeout=30.0) as client:
             resp = await client.post(
                 f"{EMBEDDER_URL}/embed",
-                json={"texts": [text]},
+                json={"texts": texts},
             )
             resp.raise_for_status()
-            return resp.json()["embeddings"][0]
-    except Exception:
+            return [array("f", e) for e in resp.json()["embeddings"]]
+    except Exception as e:
+        logger.warning("Embedder request for %d texts failed: %s", len(texts), e)
+        return None
+
+
+async def _get_embedding(text: str) -> array | None:
+    cached = _cached_embedding(text)
+    if cached is not None:
+        return cached
+    embeddings = await _embed_texts([text])
+    if not embeddings:
+        return None
+    _cache_embedding(text, embeddings[0])
+    return embeddings[0]
+
+
+async def embed_query(text: str) -> array | None:
+    """Embedding for ``text`` through the query-embedding cache."""
+    return await _get_embedding(text)
+
+
+def uncached_queries(texts: list[str]) -> list[str]:
+    """Unique ``texts`` the query-embedding cache has nothing for."""
+    return [t for t in dict.fromkeys(texts) if t not in _embedding_cache]
+
+
+def cache_query_embeddings(embeddings: dict[str, Sequence[float]]) -> None:
+    """Add embeddings computed elsewhere (e.g. by another replica)."""
+    for text, embedding in embeddings.items():
+        _cache_embedding(text, array("f", embedding))
+
+
+async def embed_queries(texts: list[str]) -> dict[str, array]:
+    """Embed ``texts`` in one /embed call and cache the results."""
+    embeddings = await _embed_texts(texts) if texts else None
+    if not embeddings:
+        return {}
+    for text, embedding in zip(texts, embeddings):
+        _cache_embedding(text, embedding)
+    return dict(zip(texts, embeddings))
+
+
+async def prefetch_embeddings(texts: list[str]) -> dict[str, int]:
+    """Warm the query-embedding cache for ``texts`` in one /embed call.
+
+    Returns counters describing the work done: ``requested`` unique texts,
+    ``cache_hits``, ``embedder_calls`` made and ``calls_saved`` compared to
+    embedding every query separately.
+    """
+    unique = list(dict.fromkeys(texts))
+    missing = [t for t in unique if _cached_embedding(t) is None]
+    calls = 0
+    if missing:
+        calls = 1
+        await embed_queries(missing)
+    return {
+        "requested": len(unique),
+        "cache_hits": len(unique) - len(missing),
+        "embedder_calls": calls,
+        "calls_saved": len(unique) - calls,
+    }
+
+
+async def _local_vector_search(
+    embedding: Sequence[float],
+    limit: int,
+    region: str | None,
+    date_from: str | None,
+    date_to: str | None,
+    exclude_ids: set[int] | None,
+) -> list[tuple[int, float]] | None:
+    """Nearest articles from the in-process index, or None to use pgvector."""
+    if not LOCAL_VECTOR_INDEX:
         return None
+    import vector_index
+
+    index = vector_index.get_index()
+    if index is None:
+        return None
+    return await asyncio.to_thread(
+        index.search, embedding, limit, region, date_from, date_to, exclude_ids
+    )
+
+
+async def _fetch_search_rows(article_ids: list[int]) -> dict[int, dict[str, Any]]:
+    """Search-result projection for known article IDs."""
+    if not article_ids:
+        return {}
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT a.id, a.original_title, a.translated_title, a.published_at,
+                   a.summary_tldr, a.summary_tags, a.summary_sentiment,
+                   a.original_url, a.image_url, a.source_language,
+                   f.source_name AS feed_source_name, f.region_id AS feed_region_id
+            FROM articles a
+            LEFT JOIN feeds f ON a.feed_id = f.id
+            WHERE a.id = ANY($1::int[])
+            """,
+            article_ids,
+        )
+    return {r["id"]: _search_row(r) for r in rows}
 
 
 async def semantic_search(
@@ -256,32 +1102,43 @@ async def semantic_search(
     if embedding is None:
         return await keyword_search(query, limit, region, date_from, date_to, exclude_ids)
 
-    pool = await get_pool()
-    vector_str = "[" + ",".join(str(v) for v in embedding) + "]"
-    params: list[Any] = [vector_str]
+    local_hits = await _local_vector_search(
+        embedding, limit, region, date_from, date_to, exclude_ids
+    )
+    if local_hits is not None:
+        distances = dict(local_hits)
+        rows = await _fetch_search_rows(list(distances))
+        return [
+            {**rows[aid], "distance": distances[aid]}
+            for aid in distances
+            if aid in rows
+        ]
+
+    params: list[Any] = [embedding]
 
     filter_parts = _build_filter_clause(region, date_from, date_to, params)
     where = "a.embedding IS NOT NULL"
     if filter_parts:
         where += f" AND {filter_parts}"
-    if exclude_ids:
-        params.append(list(exclude_ids))
-        where += f" AND a.id != ALL(${len(params)}::int[])"
+    exclusion = _Exclusion(exclude_ids, params)
+    where += exclusion.scan_clause()
 
-    params.append(limit)
-    sql = f"""
-    SELECT a.id, a.original_title, a.translated_title, a.published_at,
-           a.summary_tldr, a.summary_tags, a.summary_sentiment,
-           a.original_url, a.image_url, a.source_language,
-           f.source_name AS feed_source_name, f.region_id AS feed_region_id,
-           a.embedding <=> $1::vector AS distance
-    FROM articles a
-    LEFT JOIN feeds f ON a.feed_id = f.id
-    WHERE {where}
-    ORDER BY distance ASC
-    LIMIT ${len(params)}
-    """
-    async with pool.acquire() as conn:
+    params.append(exclusion.scan_limit(limit))
+    scan_limit_param = len(params)
+    async with _search_session(exclusion, limit, region, date_from, date_to) as (conn, ann):
+        sql = f"""
+        SELECT a.id, a.original_title, a.translated_title, a.published_at,
+               a.summary_tldr, a.summary_tags, a.summary_sentiment,
+               a.original_url, a.image_url, a.source_language,
+               f.source_name AS feed_source_name, f.region_id AS feed_region_id,
+               {ann.distance_sql("$1::vector")} AS distance
+        FROM articles a
+        LEFT JOIN feeds f ON a.feed_id = f.id
+        WHERE {where}
+        ORDER BY distance ASC
+        LIMIT ${scan_limit_param}
+        """
+        sql = exclusion.wrap(sql, "distance ASC", limit)
         rows = await conn.fetch(sql, *params)
     return [_search_row(r) for r in rows]
 
@@ -295,23 +1152,159 @@ async def hybrid_search(
     exclude_ids: set[int] | None = None,
 ) -> list[dict[str, Any]]:
     """Reciprocal Rank Fusion of keyword + semantic results."""
-    import asyncio
+    if HYBRID_SEARCH_MODE != "sql":
+        return await hybrid_search_python(query, limit, region, date_from, date_to, exclude_ids)
+
+    embedding = await _get_embedding(query)
+    if embedding is None:
+        return await keyword_search(query, limit, region, date_from, date_to, exclude_ids)
+
+    semantic_ids = None
+    local_hits = await _local_vector_search(
+        embedding, HYBRID_CANDIDATES, region, date_from, date_to, exclude_ids
+    )
+    if local_hits is not None:
+        semantic_ids = [aid for aid, _ in local_hits]
+
+    try:
+        return await hybrid_search_sql(
+            query, embedding, limit, region, date_from, date_to, exclude_ids,
+            semantic_ids=semantic_ids,
+        )
+    except asyncpg.PostgresError as e:
+        logger.warning("SQL hybrid search failed, falling back to python RRF: %s", e)
+        return await hybrid_search_python(query, limit, region, date_from, date_to, exclude_ids)
+
 
+async def hybrid_search_sql(
+    query: str,
+    embedding: Sequence[float],
+    limit: int = 50,
+    region: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    exclude_ids: set[int] | None = None,
+    semantic_ids: list[int] | None = None,
+) -> list[dict[str, Any]]:
+    """Single round-trip hybrid search.
+
+    Both candidate retrievals only project article IDs; ranks are fused
+    with RRF in Postgres and the wide article/feed columns are joined for
+    the final ``limit`` rows only. ``semantic_ids`` supplies an already
+    ranked semantic candidate list (from the local vector index) in place
+    of the pgvector scan.
+    """
+    params: list[Any] = [query]
+    if semantic_ids is None:
+        params.append(embedding)
+
+    filter_parts = _build_filter_clause(region, date_from, date_to, params)
+    where = ""
+    if filter_parts:
+        where += f" AND {filter_parts}"
+    exclusion = _Exclusion(exclude_ids, params)
+    where += exclusion.scan_clause()
+
+    params.append(exclusion.scan_limit(HYBRID_CANDIDATES))
+    scan_limit_param = len(params)
+    ann_limit = HYBRID_CANDIDATES if semantic_ids is None else None
+    async with _search_session(
+        exclusion, ann_limit, region, date_from, date_to
+    ) as (conn, ann):
+        kw_candidates = exclusion.wrap(
+            f"""
+            SELECT a.id, ts_rank({TSVECTOR}, plainto_tsquery('english', $1)) AS rank
+            FROM articles a
+            LEFT JOIN feeds f ON a.feed_id = f.id
+            WHERE {TSVECTOR} @@ plainto_tsquery('english', $1){where}
+            ORDER BY rank DESC
+            LIMIT ${scan_limit_param}
+            """,
+            "rank DESC",
+            HYBRID_CANDIDATES,
+        )
+        if semantic_ids is not None:
+            params.append(semantic_ids)
+            sem_candidates = f"""
+            SELECT id, pos::float8 AS distance
+            FROM unnest(${len(params)}::int[]) WITH ORDINALITY AS s(id, pos)
+            """
+        else:
+            sem_candidates = exclusion.wrap(
+                f"""
+                SELECT a.id, {ann.distance_sql("$2::vector")} AS distance
+                FROM articles a
+                LEFT JOIN feeds f ON a.feed_id = f.id
+                WHERE a.embedding IS NOT NULL{where}
+                ORDER BY distance ASC
+                LIMIT ${scan_limit_param}
+                """,
+                "distance ASC",
+                HYBRID_CANDIDATES,
+            )
+        params.append(RRF_K)
+        rrf_k_param = len(params)
+        params.append(limit)
+        limit_param = len(params)
+
+        sql = f"""
+        WITH kw AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC, id) AS pos
+            FROM ({kw_candidates}) k
+        ),
+        sem AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY distance ASC, id) AS pos
+            FROM ({sem_candidates}) s
+        ),
+        fused AS (
+            SELECT id, SUM(1.0 / (${rrf_k_param} + pos - 1)) AS rrf_score
+            FROM (
+                SELECT id, pos FROM kw
+                UNION ALL
+                SELECT id, pos FROM sem
+            ) c
+            GROUP BY id
+            ORDER BY rrf_score DESC, id
+            LIMIT ${limit_param}
+        )
+        SELECT a.id, a.original_title, a.translated_title, a.published_at,
+               a.summary_tldr, a.summary_tags, a.summary_sentiment,
+               a.original_url, a.image_url, a.source_language,
+               f.source_name AS feed_source_name, f.region_id AS feed_region_id,
+               fused.rrf_score::float8 AS rrf_score
+        FROM fused
+        JOIN articles a ON a.id = fused.id
+        LEFT JOIN feeds f ON a.feed_id = f.id
+        ORDER BY fused.rrf_score DESC, a.id
+        """
+        rows = await conn.fetch(sql, *params)
+    return [_search_row(r) for r in rows]
+
+
+async def hybrid_search_python(
+    query: str,
+    limit: int = 50,
+    region: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    exclude_ids: set[int] | None = None,
+) -> list[dict[str, Any]]:
+    """Reciprocal Rank Fusion computed in-process (fallback path)."""
     kw_results, sem_results = await asyncio.gather(
-        keyword_search(query, 100, region, date_from, date_to, exclude_ids),
-        semantic_search(query, 100, region, date_from, date_to, exclude_ids),
+        keyword_search(query, HYBRID_CANDIDATES, region, date_from, date_to, exclude_ids),
+        semantic_search(query, HYBRID_CANDIDATES, region, date_from, date_to, exclude_ids),
     )
 
     scores: dict[int, float] = {}
     article_map: dict[int, dict[str, Any]] = {}
 
     for idx, art in enumerate(kw_results):
-        rrf = 1.0 / (60 + idx)
+        rrf = 1.0 / (RRF_K + idx)
         scores[art["id"]] = scores.get(art["id"], 0) + rrf
         article_map[art["id"]] = art
 
     for idx, art in enumerate(sem_results):
-        rrf = 1.0 / (60 + idx)
+        rrf = 1.0 / (RRF_K + idx)
         scores[art["id"]] = scores.get(art["id"], 0) + rrf
         article_map[art["id"]] = art
 
@@ -319,6 +1312,62 @@ async def hybrid_search(
     return [article_map[aid] for aid in sorted_ids]
 
 
+async def get_centroid_shift(previous_ids: list[int], new_ids: list[int]) -> float | None:
+    """Cosine distance the embedding centroid of ``previous_ids`` moves by
+    when ``new_ids`` are added; None if nothing earlier is embedded."""
+    if not previous_ids or not new_ids:
+        return None
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            """
+            SELECT (SELECT AVG(embedding) FROM articles
+                    WHERE (id = ANY($1::int[]) OR id = ANY($2::int[]))
+                      AND embedding IS NOT NULL)
+               <=> (SELECT AVG(embedding) FROM articles
+                    WHERE id = ANY($1::int[]) AND embedding IS NOT NULL)
+            """,
+            previous_ids,
+            new_ids,
+        )
+
+
+async def get_near_duplicates(
+    article_ids: list[int], candidate_ids: list[int], max_distance: float
+) -> tuple[dict[int, set[int]], set[int]]:
+    """Candidates within ``max_distance`` (cosine) of each article, and
+    which of all the IDs have an embedding."""
+    if not article_ids:
+        return {}, set()
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        pairs = await conn.fetch(
+            """
+            SELECT a.id, c.id AS candidate_id
+            FROM articles a
+            JOIN articles c ON c.id = ANY($2::int[]) AND c.id <> a.id
+            WHERE a.id = ANY($1::int[])
+              AND a.embedding IS NOT NULL AND c.embedding IS NOT NULL
+              AND a.embedding <=> c.embedding <= $3
+            """,
+            article_ids,
+            candidate_ids,
+            max_distance,
+        )
+        embedded = await conn.fetch(
+            """
+            SELECT id FROM articles
+            WHERE (id = ANY($1::int[]) OR id = ANY($2::int[])) AND embedding IS NOT NULL
+            """,
+            article_ids,
+            candidate_ids,
+        )
+    neighbours: dict[int, set[int]] = {}
+    for r in pairs:
+        neighbours.setdefault(r["id"], set()).add(r["candidate_id"])
+    return neighbours, {r["id"] for r in embedded}
+
+
 async def get_article_summaries(article_ids: list[int]) -> dict[int, dict[str, Any]]:
     """Fetch summary fields for a list of article IDs."""
     if not article_ids:
@@ -364,3 +1413,375 @@ def _search_row(row: asyncpg.Record) -> dict[str, Any]:
         else:
             d[key] = val
     return d
+
+
+# ── LLM Response Cache ────────────────────────────────────────────────
+
+async def get_cached_llm_response(key: str, ttl_seconds: int) -> str | None:
+    """Cached response for ``key`` if younger than ``ttl_seconds``; a hit
+    refreshes its position for size-based eviction."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            """
+            UPDATE llm_cache
+            SET last_hit_at = NOW(), hits = hits + 1
+            WHERE key = $1 AND created_at > NOW() - make_interval(secs => $2)
+            RETURNING response
+            """,
+            key,
+            ttl_seconds,
+        )
+
+
+async def put_cached_llm_response(key: str, model: str, response: str) -> None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            INSERT INTO llm_cache (key, model, response)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (key) DO UPDATE
+            SET response = EXCLUDED.response, created_at = NOW(), last_hit_at = NOW()
+            """,
+            key,
+            model,
+            response,
+        )
+
+
+async def prune_llm_cache(ttl_seconds: int, max_entries: int) -> int:
+    """Drop expired entries, then the least recently used beyond
+    ``max_entries``. Returns the number of rows deleted."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        expired = await conn.execute(
+            "DELETE FROM llm_cache WHERE created_at <= NOW() - make_interval(secs => $1)",
+            ttl_seconds,
+        )
+        evicted = await conn.execute(
+            """
+            DELETE FROM llm_cache
+            WHERE key IN (
+                SELECT key FROM llm_cache
+                ORDER BY last_hit_at DESC
+                OFFSET $1
+            )
+            """,
+            max_entries,
+        )
+    return int(expired.split()[-1]) + int(evicted.split()[-1])
+
+
+# ── Graph Checkpoints ─────────────────────────────────────────────────
+
+async def get_checkpoint(
+    thread_id: str, checkpoint_ns: str, checkpoint_id: str | None = None
+) -> dict[str, Any] | None:
+    """The given checkpoint, or the thread's latest when no id is given,
+    with its pending writes."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        if checkpoint_id is None:
+            row = await conn.fetchrow(
+                """
+                SELECT * FROM research_checkpoints
+                WHERE thread_id = $1 AND checkpoint_ns = $2
+                ORDER BY checkpoint_id DESC LIMIT 1
+                """,
+                thread_id,
+                checkpoint_ns,
+            )
+        else:
+            row = await conn.fetchrow(
+                """
+                SELECT * FROM research_checkpoints
+                WHERE thread_id = $1 AND checkpoint_ns = $2 AND checkpoint_id = $3
+                """,
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+            )
+        if row is None:
+            return None
+        writes = await conn.fetch(
+            """
+            SELECT task_id, idx, channel, type, blob, task_path
+            FROM research_checkpoint_writes
+            WHERE thread_id = $1 AND checkpoint_ns = $2 AND checkpoint_id = $3
+            """,
+            thread_id,
+            checkpoint_ns,
+            row["checkpoint_id"],
+        )
+    return {**dict(row), "writes": [dict(w) for w in writes]}
+
+
+async def list_checkpoints(
+    thread_id: str,
+    checkpoint_ns: str | None = None,
+    before_id: str | None = None,
+    limit: int | None = None,
+) -> list[dict[str, Any]]:
+    """A thread's checkpoints, newest first (without pending writes)."""
+    params: list[Any] = [thread_id]
+    sql = "SELECT * FROM research_checkpoints WHERE thread_id = $1"
+    if checkpoint_ns is not None:
+        params.append(checkpoint_ns)
+        sql += f" AND checkpoint_ns = ${len(params)}"
+    if before_id is not None:
+        params.append(before_id)
+        sql += f" AND checkpoint_id < ${len(params)}"
+    sql += " ORDER BY checkpoint_id DESC"
+    if limit is not None:
+        params.append(limit)
+        sql += f" LIMIT ${len(params)}"
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *params)
+    return [dict(r) for r in rows]
+
+
+async def get_checkpoint_blobs(
+    thread_id: str, checkpoint_ns: str, versions: dict[str, str]
+) -> list[dict[str, Any]]:
+    """Channel values at the given ``{channel: version}``."""
+    if not versions:
+        return []
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT b.channel, b.type, b.blob
+            FROM research_checkpoint_blobs b
+            JOIN unnest($3::text[], $4::text[]) AS v(channel, version)
+                ON b.channel = v.channel AND b.version = v.version
+            WHERE b.thread_id = $1 AND b.checkpoint_ns = $2
+            """,
+            thread_id,
+            checkpoint_ns,
+            list(versions.keys()),
+            list(versions.values()),
+        )
+    return [dict(r) for r in rows]
+
+
+async def put_checkpoint(
+    thread_id: str,
+    checkpoint_ns: str,
+    checkpoint_id: str,
+    parent_checkpoint_id: str | None,
+    checkpoint: tuple[str, bytes],
+    metadata: tuple[str, bytes],
+    blobs: list[tuple[str, str, str, bytes | None]],
+) -> None:
+    """Store a checkpoint and the ``(channel, version, type, blob)`` values
+    that changed in it, atomically."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            if blobs:
+                await conn.executemany(
+                    """
+                    INSERT INTO research_checkpoint_blobs
+                        (thread_id, checkpoint_ns, channel, version, type, blob)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                    ON CONFLICT DO NOTHING
+                    """,
+                    [(thread_id, checkpoint_ns, *b) for b in blobs],
+                )
+            await conn.execute(
+                """
+                INSERT INTO research_checkpoints
+                    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                     type, checkpoint, metadata_type, metadata)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) DO UPDATE
+                SET type = EXCLUDED.type, checkpoint = EXCLUDED.checkpoint,
+                    metadata_type = EXCLUDED.metadata_type, metadata = EXCLUDED.metadata
+                """,
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                parent_checkpoint_id,
+                *checkpoint,
+                *metadata,
+            )
+
+
+async def put_checkpoint_writes(
+    rows: list[tuple[str, str, str, str, int, str, str, bytes, str]],
+    overwrite: bool,
+) -> None:
+    """Store ``(thread_id, ns, checkpoint_id, task_id, idx, channel, type,
+    blob, task_path)`` pending writes; ``overwrite`` replaces existing ones."""
+    if not rows:
+        return
+    conflict = (
+        """DO UPDATE SET channel = EXCLUDED.channel, type = EXCLUDED.type,
+                         blob = EXCLUDED.blob, task_path = EXCLUDED.task_path"""
+        if overwrite
+        else "DO NOTHING"
+    )
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.executemany(
+            f"""
+            INSERT INTO research_checkpoint_writes
+                (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel,
+                 type, blob, task_path)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx) {conflict}
+            """,
+            rows,
+        )
+
+
+async def delete_checkpoints(thread_ids: list[str]) -> None:
+    if not thread_ids:
+        return
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            for table in (
+                "research_checkpoint_writes",
+                "research_checkpoint_blobs",
+                "research_checkpoints",
+            ):
+                await conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ANY($1::text[])", thread_ids
+                )
+
+
+async def prune_checkpoints(max_age_seconds: int) -> int:
+    """Drop checkpoint threads last written over ``max_age_seconds`` ago
+    whose task is no longer queued or running. Returns the number of threads removed."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT c.thread_id
+            FROM research_checkpoints c
+            WHERE NOT EXISTS (
+                SELECT 1 FROM research_tasks t
+                WHERE t.id = c.thread_id AND t.status IN ('queued', 'running')
+            )
+            GROUP BY c.thread_id
+            HAVING MAX(c.created_at) < NOW() - make_interval(secs => $1)
+            """,
+            max_age_seconds,
+        )
+    thread_ids = [r["thread_id"] for r in rows]
+    await delete_checkpoints(thread_ids)
+    return len(thread_ids)
+
+
+# ── Research Batches ──────────────────────────────────────────────────
+
+async def create_batch(batch_id: str, user_id: str | None) -> None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "INSERT INTO research_batches (id, user_id) VALUES ($1, $2)",
+            batch_id,
+            user_id,
+        )
+
+
+async def get_batch(batch_id: str) -> dict[str, Any] | None:
+    """A batch with its cache counters and its tasks in submission order."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            "SELECT id, user_id, created_at, cache_stats FROM research_batches WHERE id = $1",
+            batch_id,
+        )
+        if row is None:
+            return None
+        tasks = await conn.fetch(
+            """
+            SELECT id, query, filters, status, created_at, completed_at
+            FROM research_tasks
+            WHERE batch_id = $1
+            ORDER BY created_at, id
+            """,
+            batch_id,
+        )
+    batch = _search_row(row)
+    batch["cache_stats"] = json.loads(batch["cache_stats"])
+    batch["tasks"] = [
+        {**_search_row(t), "filters": json.loads(t["filters"]) if t["filters"] else None}
+        for t in tasks
+    ]
+    return batch
+
+
+async def get_batch_cache(batch_id: str, kind: str, keys: list[str]) -> dict[str, Any]:
+    """Cached ``kind`` values of ``keys`` some task of the batch stored."""
+    if not keys:
+        return {}
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT key, value FROM research_batch_cache
+            WHERE batch_id = $1 AND kind = $2 AND key = ANY($3::text[])
+            """,
+            batch_id,
+            kind,
+            keys,
+        )
+    return {r["key"]: json.loads(r["value"]) for r in rows}
+
+
+async def put_batch_cache(batch_id: str, kind: str, values: dict[str, Any]) -> None:
+    if not values:
+        return
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.executemany(
+            """
+            INSERT INTO research_batch_cache (batch_id, kind, key, value)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (batch_id, kind, key) DO NOTHING
+            """,
+            [(batch_id, kind, key, json.dumps(value)) for key, value in values.items()],
+        )
+
+
+async def add_batch_cache_stats(batch_id: str, stats: dict[str, int]) -> None:
+    """Add a task's hit/miss counters to the batch's totals."""
+    if not stats:
+        return
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE research_batches
+            SET cache_stats = (
+                SELECT jsonb_object_agg(
+                    k, COALESCE((cache_stats->>k)::int, 0) + COALESCE(($2::jsonb->>k)::int, 0)
+                )
+                FROM jsonb_object_keys(cache_stats || $2::jsonb) AS k
+            )
+            WHERE id = $1
+            """,
+            batch_id,
+            json.dumps(stats),
+        )
+
+
+async def prune_batch_cache() -> int:
+    """Drop the shared cache of batches with no task left to run."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            """
+            DELETE FROM research_batch_cache c
+            WHERE NOT EXISTS (
+                SELECT 1 FROM research_tasks t
+                WHERE t.batch_id = c.batch_id AND t.status IN ('queued', 'running')
+            )
+            """
+        )
+    return int(result.split()[-1])
@@ -0,0 +1,157 @@
+"""Collapsing of near-duplicate articles before they reach a prompt.
+
+Wire stories are republished by many feeds, and every copy is its own
+``articles`` row. Before fetched summaries are added to the research
+state they are clustered against the articles already read and each
+other: two articles are duplicates when their embeddings are within
+RESEARCH_DEDUPE_MAX_DISTANCE (cosine), or, when either has no embedding,
+when the MinHash estimate of their titles' Jaccard similarity reaches
+RESEARCH_DEDUPE_TITLE_SIMILARITY. The highest-scoring article of a
+cluster represents it; the rest are only listed under its
+``duplicates`` with their source and region, so they take no prompt
+space while the regions that carried the story stay visible.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+import db
+from config import RESEARCH_DEDUPE_MAX_DISTANCE, RESEARCH_DEDUPE_TITLE_SIMILARITY
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+# ── MinHash ───────────────────────────────────────────────────────────
+
+_NUM_PERMUTATIONS = 64
+_SHINGLE_CHARS = 4
+# Mersenne prime 2^31 - 1. It is below the 32-bit shingle hashes, which
+# the modulus folds into its range; a * h + b stays in uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, int(_PRIME), _NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), _NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def _title(s: dict[str, Any]) -> str:
+    return s.get("translated_title") or s.get("original_title") or ""
+
+
+def minhash(text: str) -> np.ndarray | None:
+    """Signature of ``text``'s character 4-grams (after lowercasing and
+    collapsing punctuation), or None if it has no words."""
+    normalized = " ".join(_WORD.findall(text.lower()))
+    if not normalized:
+        return None
+    shingles = {
+        normalized[i:i + _SHINGLE_CHARS]
+        for i in range(max(1, len(normalized) - _SHINGLE_CHARS + 1))
+    }
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "big") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the sets behind two signatures."""
+    return float(np.count_nonzero(a == b)) / _NUM_PERMUTATIONS
+
+
+# ── Clustering ────────────────────────────────────────────────────────
+
+@dataclass
+class Collapsed:
+    # Rows to merge into read_summaries: new representatives, and earlier
+    # ones whose ``duplicates`` grew
+    summaries: dict[int, dict[str, Any]] = field(default_factory=dict)
+    # Duplicate article ID -> its representative
+    duplicate_of: dict[int, int] = field(default_factory=dict)
+    # Articles this call added as representatives, in score order
+    new_ids: list[int] = field(default_factory=list)
+
+
+def regions(s: dict[str, Any]) -> list[str]:
+    """Regions of the feeds that carried an article or any duplicate of it."""
+    found = [s.get("feed_region_id")] + [d.get("region") for d in s.get("duplicates", [])]
+    return list(dict.fromkeys(r for r in found if r))
+
+
+def sources(s: dict[str, Any]) -> list[str]:
+    """Names of the feeds that carried an article or any duplicate of it."""
+    found = [s.get("feed_source_name")] + [d.get("source") for d in s.get("duplicates", [])]
+    return list(dict.fromkeys(name for name in found if name))
+
+
+async def collapse(
+    fetched: dict[int, dict[str, Any]],
+    known: dict[int, dict[str, Any]],
+    scores: dict[int, float],
+) -> Collapsed:
+    """Cluster ``fetched`` summaries against the ``known`` representatives.
+
+    New articles are taken in ``scores`` order; each joins the first
+    representative (known ones first) it duplicates, or becomes one.
+    If the embedding query fails, nothing is collapsed.
+    """
+    result = Collapsed()
+    ordered = sorted(fetched, key=lambda aid: scores.get(aid, 0.0), reverse=True)
+    try:
+        neighbours, embedded = await db.get_near_duplicates(
+            ordered, [*known, *ordered], RESEARCH_DEDUPE_MAX_DISTANCE
+        )
+    except Exception:
+        logger.exception("Near-duplicate query failed")
+        result.summaries = dict(fetched)
+        result.new_ids = ordered
+        return result
+
+    signatures: dict[int, np.ndarray | None] = {}
+
+    def signature(aid: int, row: dict[str, Any]) -> np.ndarray | None:
+        if aid not in signatures:
+            signatures[aid] = minhash(_title(row))
+        return signatures[aid]
+
+    def same_story(aid: int, row: dict[str, Any], rid: int, rep: dict[str, Any]) -> bool:
+        if rid in neighbours.get(aid, ()):
+            return True
+        if aid in embedded and rid in embedded:
+            return False
+        a, b = signature(aid, row), signature(rid, rep)
+        return a is not None and b is not None and similarity(a, b) >= RESEARCH_DEDUPE_TITLE_SIMILARITY
+
+    representatives = dict(known)
+    for aid in ordered:
+        row = fetched[aid]
+        rid = next(
+            (rid for rid, rep in representatives.items() if same_story(aid, row, rid, rep)),
+            None,
+        )
+        if rid is None:
+            representatives[aid] = row
+            result.summaries[aid] = row
+            result.new_ids.append(aid)
+            continue
+        rep = result.summaries.get(rid, representatives[rid])
+        # Rows are replaced, never mutated: channel copies share them
+        rep = {
+            **rep,
+            "duplicates": [
+                *rep.get("duplicates", []),
+                {"id": aid, "source": row.get("feed_source_name"), "region": row.get("feed_region_id")},
+            ],
+        }
+        representatives[rid] = result.summaries[rid] = rep
+        result.duplicate_of[aid] = rid
+    return result
@@ -0,0 +1,93 @@
+"""Append-only persistence of research task events.
+
+Events are numbered per task and written to ``research_task_events`` in
+small batches while the task runs, so a crash loses at most one batch
+and stream replay is a primary-key range scan. Progress events share the
+numbering but are only written when they are too large to publish.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+import db
+from config import EVENT_BATCH_SIZE, EVENT_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+RESUME_SEQ_GAP = 100_000
+
+
+class TaskEventLog:
+    """Sequences one task's events and flushes them to Postgres in batches."""
+
+    def __init__(self, task_id: str) -> None:
+        self.task_id = task_id
+        self.seq = 0
+        self.last_persisted = 0
+        self._pending: list[tuple[str, int, str, str, datetime]] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+
+    async def resume(self) -> None:
+        """Continue numbering after an interrupted run's events.
+
+        Progress events past the last persisted one were published but
+        never stored, so numbering skips far enough ahead that clients
+        which saw them don't mistake new events for ones they already have.
+        """
+        self.last_persisted = await db.get_last_event_seq(self.task_id)
+        self.seq = self.last_persisted + RESUME_SEQ_GAP
+
+    async def append(self, event: str, data: dict[str, Any], persist: bool = True) -> int:
+        """Number an event, queueing it for the table when ``persist``."""
+        self.seq += 1
+        if not persist:
+            return self.seq
+        self.last_persisted = self.seq
+        self._pending.append(
+            (self.task_id, self.seq, event, json.dumps(data), datetime.now(timezone.utc))
+        )
+        if len(self._pending) >= EVENT_BATCH_SIZE:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return self.seq
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(EVENT_FLUSH_INTERVAL)
+        self._timer = None
+        await self.flush()
+
+    async def write_through(
+        self, seq: int, event: str, data: dict[str, Any], persisted: bool
+    ) -> None:
+        """Make sure event ``seq`` is in the table before returning."""
+        if persisted:
+            await self.flush()
+        else:
+            await db.insert_task_events(
+                [(self.task_id, seq, event, json.dumps(data), datetime.now(timezone.utc))]
+            )
+
+    async def flush(self) -> None:
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await db.insert_task_events(batch)
+            except Exception:
+                logger.exception("Failed to persist %d events for %s", len(batch), self.task_id)
+                # Keep them for the next flush rather than dropping them
+                self._pending = batch + self._pending
+
+    async def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
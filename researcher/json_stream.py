@@ -0,0 +1,86 @@
+"""Incremental extraction of array items from streamed LLM JSON.
+
+The planner answers with one JSON object whose ``db_searches`` and
+``web_searches`` arrays hold the work to do. ``ArrayItemParser`` is fed
+the text as it streams and hands back each element of the watched
+top-level arrays as soon as its closing brace arrives, so the work can
+start before the rest of the object has been generated.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable
+
+
+class ArrayItemParser:
+    """Yields ``(key, index, item)`` for each completed object element of
+    the watched top-level arrays.
+
+    Only structure is tracked (nesting, strings, escapes); anything before
+    the first ``{`` such as a markdown fence is ignored, and elements that
+    fail to decode are skipped.
+    """
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        self.keys = frozenset(keys)
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: str | None = None
+        self._key: str | None = None
+        self._array_key: str | None = None
+        self._item_start = -1
+        self._counts: dict[str, int] = {}
+
+    def feed(self, chunk: str) -> list[tuple[str, int, Any]]:
+        self._text += chunk
+        items: list[tuple[str, int, Any]] = []
+        text = self._text
+        for pos in range(self._pos, len(text)):
+            ch = text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        try:
+                            self._last_string = json.loads(text[self._string_start:pos + 1])
+                        except ValueError:
+                            self._last_string = None
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":" and self._depth == 1:
+                self._key = self._last_string
+            elif ch in "{[":
+                if self._depth == 1 and ch == "[":
+                    self._array_key = self._key if self._key in self.keys else None
+                elif self._depth == 2 and ch == "{" and self._array_key is not None:
+                    self._item_start = pos
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 2 and ch == "}" and self._item_start >= 0:
+                    key = self._array_key
+                    try:
+                        item = json.loads(text[self._item_start:pos + 1])
+                    except ValueError:
+                        item = None
+                    if item is not None and key is not None:
+                        index = self._counts.get(key, 0)
+                        self._counts[key] = index + 1
+                        items.append((key, index, item))
+                    self._item_start = -1
+                elif self._depth == 1:
+                    self._array_key = None
+        self._pos = len(text)
+        return items
@@ -7,26 +7,50 @@ import uuid
 from contextlib import asynccontextmanager
 from typing import Any
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
 from sse_starlette.sse import EventSourceResponse
 
 import db
+import pubsub
+import reuse
+import scheduler
+import streams
+import vector_index
 from agent import run_research
-from models import ResearchRequest, ResearchTaskResponse
+from config import (
+    RESEARCH_BATCH_MAX_ITEMS,
+    RESEARCH_DEADLINE_MAX_SECONDS,
+    RESEARCH_DEADLINE_SECONDS,
+)
+from events import TaskEventLog
+from models import (
+    ResearchBatchRequest,
+    ResearchBatchResponse,
+    ResearchRequest,
+    ResearchTaskResponse,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Track active research streams: task_id -> asyncio.Queue
-_active_streams: dict[str, asyncio.Queue] = {}
+REPLAY_PAGE_SIZE = 500
+
+# Statuses of tasks that haven't finished; streams follow them live
+ACTIVE_STATUSES = ("queued", "running")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await db.ensure_table()
     logger.info("research_tasks table ensured")
+    await vector_index.start(await db.get_pool())
+    await pubsub.start(await db.get_pool())
+    await scheduler.start(_run_claimed_task)
     yield
+    await scheduler.stop()
+    await pubsub.stop()
+    await vector_index.stop()
     await db.close_pool()
 
 
@@ -55,42 +79,167 @@ async def health_detailed():
 
 @app.post("/research")
 async def create_research(req: ResearchRequest):
+    return await _submit(req)
+
+
+@app.post("/research/batch")
+async def create_research_batch(req: ResearchBatchRequest):
+    """Queue related queries as a batch: one task (and stream) per query,
+    sharing embeddings, searches and page reads while they run."""
+    if len(req.items) > RESEARCH_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch takes at most {RESEARCH_BATCH_MAX_ITEMS} queries",
+        )
+    batch_id = f"resb_{uuid.uuid4().hex[:12]}"
+    await db.create_batch(batch_id, req.user_id)
+    tasks = [
+        await _submit(
+            ResearchRequest(
+                query=item.query,
+                filters=item.filters,
+                user_id=req.user_id,
+                bypass_cache=req.bypass_cache,
+                deadline_seconds=req.deadline_seconds,
+            ),
+            batch_id=batch_id,
+        )
+        for item in req.items
+    ]
+    return ResearchBatchResponse(id=batch_id, tasks=tasks)
+
+
+@app.get("/research/batch/{batch_id}")
+async def get_research_batch(batch_id: str):
+    batch = await db.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return JSONResponse(content=batch)
+
+
+async def _submit(req: ResearchRequest, batch_id: str | None = None) -> ResearchTaskResponse:
     task_id = f"res_{uuid.uuid4().hex[:12]}"
     filters = req.filters.model_dump() if req.filters else None
 
-    await db.create_task(task_id, req.query, filters)
+    embedding, match = await reuse.lookup(req.query, filters, allow_reuse=not req.bypass_cache)
+    if match is not None and match.mode == "serve":
+        await db.create_reused_task(
+            task_id, req.query, filters, match.task_id, user_id=req.user_id, batch_id=batch_id
+        )
+        return ResearchTaskResponse(
+            id=task_id,
+            status="complete",
+            query=req.query,
+            reused_from=match.task_id,
+            reused_age_seconds=match.age_seconds,
+        )
+
+    # Everything a replica needs to run the task once it claims it
+    run_options = {
+        "use_llm_cache": not req.bypass_cache,
+        "seed": match.seed() if match else None,
+        "deadline_seconds": min(
+            req.deadline_seconds or RESEARCH_DEADLINE_SECONDS, RESEARCH_DEADLINE_MAX_SECONDS
+        ),
+    }
+    await db.create_task(
+        task_id,
+        req.query,
+        filters,
+        user_id=req.user_id,
+        query_embedding=embedding,
+        reused_from=match.task_id if match else None,
+        run_options=run_options,
+        batch_id=batch_id,
+    )
+    scheduler.notify()
 
-    event_queue: asyncio.Queue = asyncio.Queue()
-    _active_streams[task_id] = event_queue
+    return ResearchTaskResponse(
+        id=task_id,
+        status="queued",
+        query=req.query,
+        queue_position=await db.get_queue_position(task_id),
+    )
+
+
+async def _run_claimed_task(job: dict[str, Any]) -> None:
+    """Scheduler entry point for a task this replica has claimed."""
+    options = job.get("run_options") or {}
+    await _run_research_task(
+        job["id"],
+        job["query"],
+        job.get("filters"),
+        streams.open_local(job["id"]),
+        use_llm_cache=options.get("use_llm_cache", True),
+        seed=options.get("seed"),
+        deadline_seconds=options.get("deadline_seconds"),
+        batch_id=job.get("batch_id"),
+        resumed=job["resumed"],
+    )
 
-    asyncio.create_task(_run_research_task(task_id, req.query, filters, event_queue))
 
-    return ResearchTaskResponse(id=task_id, status="running", query=req.query)
+async def _publish_event(
+    task_id: str,
+    event_log: TaskEventLog,
+    stream: streams.TaskStream,
+    evt: dict[str, Any],
+) -> None:
+    """Number an event, queue it for persistence and fan it out to subscribers."""
+    event_type = evt.get("event", "status")
+    data = evt.get("data", {})
+    persist = event_type != "progress"
+    prev_seq = event_log.last_persisted
+    seq = await event_log.append(event_type, data, persist=persist)
+    stream.publish(seq, event_type, data)
+    await pubsub.publish(
+        task_id,
+        seq,
+        event_type,
+        data,
+        prev_seq,
+        spill=lambda: event_log.write_through(seq, event_type, data, persisted=persist),
+    )
 
 
 async def _run_research_task(
     task_id: str,
     query: str,
     filters: dict[str, Any] | None,
-    event_queue: asyncio.Queue,
+    stream: streams.TaskStream,
+    use_llm_cache: bool = True,
+    seed: dict[str, Any] | None = None,
+    deadline_seconds: float | None = None,
+    batch_id: str | None = None,
+    resumed: bool = False,
 ) -> None:
-    events_log: list[dict[str, Any]] = []
+    event_log = TaskEventLog(task_id)
+    proxy_task: asyncio.Task | None = None
     try:
-        # Wrap the queue to also log events
+        if resumed:
+            await event_log.resume()
+
+        # Wrap the queue to also persist and publish events
         logging_queue: asyncio.Queue = asyncio.Queue()
 
         async def _proxy_events():
             while True:
                 evt = await logging_queue.get()
-                if evt.get("event") != "progress":
-                    events_log.append(evt)
-                await event_queue.put(evt)
+                await _publish_event(task_id, event_log, stream, evt)
                 if evt.get("event") == "done":
                     break
 
         proxy_task = asyncio.create_task(_proxy_events())
 
-        result = await run_research(query, filters, logging_queue)
+        result = await run_research(
+            query,
+            filters,
+            logging_queue,
+            use_llm_cache,
+            seed,
+            task_id=task_id,
+            deadline_seconds=deadline_seconds,
+            batch_id=batch_id,
+        )
 
         report = result.get("report") or {}
         articles = result.get("top_articles") or []
@@ -99,75 +248,171 @@ async def _run_research_task(
         await logging_queue.put({"event": "done", "data": {}})
         await proxy_task
 
-        await db.update_task_complete(task_id, report, articles, search_log, events_log)
+        await event_log.close()
+        # Kept so later similar submissions can start from this run
+        final_state = {
+            "found_article_ids": result.get("found_article_ids") or [],
+            "queries_tried": result.get("queries_tried") or [],
+        }
+        await db.update_task_complete(task_id, report, articles, search_log, final_state)
+        await _drop_checkpoints(task_id)
+    except asyncio.CancelledError:
+        # Replica shutting down: the task is requeued and resumes from
+        # its checkpoint, so keep what it has emitted so far
+        if proxy_task is not None:
+            proxy_task.cancel()
+        await event_log.close()
+        raise
     except Exception as e:
         logger.exception("Research task %s failed", task_id)
         error_msg = str(e)
-        await event_queue.put({"event": "status", "data": {"type": "error", "message": error_msg}})
-        await event_queue.put({"event": "done", "data": {}})
+        if proxy_task is not None:
+            proxy_task.cancel()
+        for evt in (
+            {"event": "status", "data": {"type": "error", "message": error_msg}},
+            {"event": "done", "data": {}},
+        ):
+            await _publish_event(task_id, event_log, stream, evt)
+        await event_log.close()
         await db.update_task_error(task_id, error_msg)
+        await _drop_checkpoints(task_id)
     finally:
-        _active_streams.pop(task_id, None)
+        streams.finish_local(stream)
 
 
-@app.get("/research/{task_id}/stream")
-async def stream_research(task_id: str):
-    queue = _active_streams.get(task_id)
+async def _drop_checkpoints(task_id: str) -> None:
+    """A finished task can't be resumed; its graph checkpoints go."""
+    try:
+        await db.delete_checkpoints([task_id])
+    except Exception:
+        logger.exception("Deleting checkpoints of %s failed", task_id)
+
+
+def _sse(evt: dict[str, Any]) -> dict[str, str]:
+    return {"id": str(evt["seq"]), "event": evt["event"], "data": json.dumps(evt["data"])}
 
-    if queue is None:
-        # Task might be complete already — check DB
-        task = await db.get_task(task_id)
+
+@app.get("/research/{task_id}/stream")
+async def stream_research(task_id: str, last_event_id: str | None = Header(default=None)):
+    # EventSource sends back the last id it saw when it reconnects
+    after_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    stream = streams.get(task_id)
+    if stream is None:
+        # Task might be complete already, queued, or running on another replica
+        task = await db.get_task(task_id, ("status", "report", "articles", "events"))
         if task is None:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        # Replay events from DB if available
-        async def replay_events():
-            events = task.get("events") or []
-            for evt in events:
-                yield {
-                    "event": evt.get("event", "status"),
-                    "data": json.dumps(evt.get("data", {})),
-                }
-            if task["status"] == "complete" and task.get("report"):
-                yield {
-                    "event": "result",
-                    "data": json.dumps({
-                        "report": task["report"],
-                        "articles": task.get("articles", []),
-                    }),
-                }
-            yield {"event": "done", "data": "{}"}
+        if task["status"] in ACTIVE_STATUSES:
+            async def is_running() -> bool:
+                current = await db.get_task(task_id, ("status",))
+                return current is not None and current["status"] in ACTIVE_STATUSES
 
-        return EventSourceResponse(replay_events())
+            stream = streams.attach_remote(task_id, is_running)
+        else:
+            return EventSourceResponse(_replay_events(task_id, task, after_seq))
 
     async def event_generator():
-        while True:
-            evt = await queue.get()
-            event_type = evt.get("event", "status")
-            data = evt.get("data", {})
-            yield {"event": event_type, "data": json.dumps(data)}
-            if event_type == "done":
-                break
+        position = await db.get_queue_position(task_id)
+        if position is not None and not after_seq:
+            yield {"event": "status", "data": json.dumps({"type": "queued", "position": position})}
+        async for evt in stream.subscribe(after_seq):
+            yield _sse(evt)
+            if evt["event"] == "done":
+                return
+        current = await db.get_task(task_id, ("status",))
+        if current is not None and current["status"] in ACTIVE_STATUSES:
+            # Its replica is shutting down and the task will resume
+            # elsewhere; the client reconnects with Last-Event-ID
+            return
+        # The task ended without a done event (its replica went away)
+        yield {"event": "done", "data": "{}"}
 
     return EventSourceResponse(event_generator())
 
 
+async def _replay_events(task_id: str, task: dict[str, Any], after_seq: int):
+    """Replay a finished task's persisted events after ``after_seq``."""
+    last_seq = after_seq
+    replayed_done = False
+    while True:
+        page = await db.get_task_events(task_id, last_seq, REPLAY_PAGE_SIZE)
+        for evt in page:
+            if evt["event"] == "progress":
+                continue
+            replayed_done = evt["event"] == "done"
+            yield _sse(evt)
+        if len(page) < REPLAY_PAGE_SIZE:
+            break
+        last_seq = page[-1]["seq"]
+    if after_seq:
+        # Resuming: the client already has everything up to after_seq
+        if not replayed_done:
+            yield {"event": "done", "data": "{}"}
+        return
+    if last_seq == 0 and not page:
+        # Tasks from before the events table kept them in one blob
+        for evt in task.get("events") or []:
+            yield {
+                "event": evt.get("event", "status"),
+                "data": json.dumps(evt.get("data", {})),
+            }
+    if task["status"] == "complete" and task.get("report"):
+        yield {
+            "event": "result",
+            "data": json.dumps({
+                "report": task["report"],
+                "articles": task.get("articles", []),
+            }),
+        }
+    yield {"event": "done", "data": "{}"}
+
+
+def _task_json_response(task: dict[str, Any], status_code: int = 200) -> Response:
+    """Serialize a task, splicing JSONB columns in as the raw text Postgres
+    returned so large reports are never decoded and re-encoded."""
+    parts = []
+    for key, val in task.items():
+        encoded = val if key in db.TASK_JSON_COLUMNS and isinstance(val, str) else json.dumps(val)
+        parts.append(f"{json.dumps(key)}:{encoded}")
+    return Response(
+        content="{" + ",".join(parts) + "}",
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
 @app.get("/research/{task_id}")
-async def get_research(task_id: str):
-    task = await db.get_task(task_id)
+async def get_research(task_id: str, fields: str | None = None):
+    selected = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(selected) - set(db.TASK_COLUMNS)
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+
+    task = await db.get_task(task_id, selected, decode_json=())
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    if task["status"] == "running":
-        return JSONResponse(
-            status_code=202,
-            content={"id": task_id, "status": "running", "query": task["query"]},
-        )
+    if task["status"] in ACTIVE_STATUSES:
+        if selected is None:
+            content = {"id": task_id, "status": task["status"], "query": task["query"]}
+            if task["status"] == "queued":
+                content["queue_position"] = await db.get_queue_position(task_id)
+            return JSONResponse(status_code=202, content=content)
+        return _task_json_response(task, status_code=202)
 
-    return task
+    return _task_json_response(task)
 
 
 @app.get("/research")
-async def list_research(limit: int = 20, offset: int = 0):
-    tasks = await db.list_tasks(limit, offset)
-    return {"data": tasks}
+async def list_research(limit: int = 20, offset: int = 0, cursor: str | None = None):
+    try:
+        tasks, next_cursor = await db.list_tasks(limit, offset, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"data": tasks, "next_cursor": next_cursor}
@@ -11,6 +11,26 @@ from pydantic import BaseModel, Field
 class ResearchRequest(BaseModel):
     query: str
     filters: SearchFilters | None = None
+    # Queued tasks are scheduled fairly across users
+    user_id: str | None = None
+    # Skip the LLM response cache and always call the model
+    bypass_cache: bool = False
+    # Seconds the run may take; server default and cap apply
+    deadline_seconds: float | None = Field(None, gt=0)
+
+
+class ResearchBatchItem(BaseModel):
+    query: str
+    filters: SearchFilters | None = None
+
+
+class ResearchBatchRequest(BaseModel):
+    """Related queries run as one batch; options apply to every query."""
+
+    items: list[ResearchBatchItem] = Field(min_length=1)
+    user_id: str | None = None
+    bypass_cache: bool = False
+    deadline_seconds: float | None = Field(None, gt=0)
 
 
 class SearchFilters(BaseModel):
@@ -23,6 +43,16 @@ class ResearchTaskResponse(BaseModel):
     id: str
     status: str
     query: str
+    # Set when an earlier task's report was served instead of a new run
+    reused_from: str | None = None
+    reused_age_seconds: int | None = None
+    # 1-based place in the job queue while the task waits to run
+    queue_position: int | None = None
+
+
+class ResearchBatchResponse(BaseModel):
+    id: str
+    tasks: list[ResearchTaskResponse]
 
 
 class ResearchTaskFull(BaseModel):
@@ -0,0 +1,251 @@
+"""Cross-replica fan-out of research events over Postgres LISTEN/NOTIFY.
+
+The replica running a task publishes every event on one channel; any
+replica with a stream open for that task picks it up from its listener
+connection. Notifications go out over one dedicated connection, so
+publishing doesn't compete with searches for the shared pool. NOTIFY
+payloads are capped by Postgres at 8000 bytes, so larger events are
+written to ``research_task_events`` first and only a stub naming the
+row is sent.
+
+A follower stops waiting once the task's status leaves queued/running.
+If the publishing replica dies, that only happens when the scheduler's
+sweep requeues or fails the task after its heartbeat goes stale.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import asyncpg
+
+import db
+from config import DATABASE_URL, EVENT_FLUSH_INTERVAL, PUBSUB_CHANNEL, PUBSUB_IDLE_CHECK_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Stay under Postgres' 8000-byte NOTIFY limit with room for the envelope
+NOTIFY_PAYLOAD_LIMIT = 7900
+_RECONNECT_DELAY = 1.0
+
+# Lets a replica skip its own notifications; local subscribers are fed
+# directly by publish()
+_INSTANCE_ID = uuid.uuid4().hex
+
+_subscribers: dict[str, set[asyncio.Queue]] = {}
+_listen_task: asyncio.Task | None = None
+# Held open for pg_notify; the lock keeps its statements one at a time
+_publish_conn: asyncpg.Connection | None = None
+_publish_lock: asyncio.Lock | None = None
+
+
+# ── Publishing ────────────────────────────────────────────────────────
+
+async def publish(
+    task_id: str,
+    seq: int,
+    event: str,
+    data: dict[str, Any],
+    prev_seq: int,
+    spill: Callable[[], Awaitable[None]],
+) -> None:
+    """Broadcast one task event to every replica.
+
+    ``prev_seq`` is the sequence number of the previous persisted event,
+    so subscribers can tell when they missed one. ``spill`` must write
+    this event to ``research_task_events``; it is only called when the
+    event is too large to travel in the notification itself.
+    """
+    message = {"t": task_id, "s": seq, "p": prev_seq, "e": event, "d": data}
+    _dispatch(task_id, message)
+
+    payload = json.dumps({**message, "o": _INSTANCE_ID})
+    if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+        await spill()
+        payload = json.dumps(
+            {"t": task_id, "s": seq, "p": prev_seq, "e": event, "spill": True, "o": _INSTANCE_ID}
+        )
+    try:
+        await _notify(payload)
+    except Exception:
+        # Remote subscribers recover persisted events from the table
+        logger.exception("Failed to publish %s event %d for %s", event, seq, task_id)
+
+
+async def _notify(payload: str) -> None:
+    global _publish_conn, _publish_lock
+    if _publish_lock is None:
+        _publish_lock = asyncio.Lock()
+    async with _publish_lock:
+        if _publish_conn is None or _publish_conn.is_closed():
+            _publish_conn = await asyncpg.connect(DATABASE_URL)
+        try:
+            await _publish_conn.execute("SELECT pg_notify($1, $2)", PUBSUB_CHANNEL, payload)
+        except Exception:
+            # Reconnect on the next event
+            await _close_publish_conn()
+            raise
+
+
+async def _close_publish_conn() -> None:
+    global _publish_conn
+    conn, _publish_conn = _publish_conn, None
+    if conn is not None and not conn.is_closed():
+        try:
+            await conn.close()
+        except Exception:
+            conn.terminate()
+
+
+def _dispatch(task_id: str, message: dict[str, Any]) -> None:
+    for queue in _subscribers.get(task_id, ()):
+        queue.put_nowait(message)
+
+
+# ── Listening ─────────────────────────────────────────────────────────
+
+def _on_notify(conn: Any, pid: int, channel: str, payload: str) -> None:
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning("Ignoring malformed notification on %s", channel)
+        return
+    if message.get("o") == _INSTANCE_ID:
+        return
+    task_id = message.get("t")
+    if task_id in _subscribers:
+        _dispatch(task_id, message)
+
+
+async def _listen_loop(pool: asyncpg.Pool) -> None:
+    """Hold one pooled connection in LISTEN, reconnecting if it drops."""
+    while True:
+        lost = asyncio.Event()
+        try:
+            async with pool.acquire() as conn:
+                conn.add_termination_listener(lambda _conn: lost.set())
+                await conn.add_listener(PUBSUB_CHANNEL, _on_notify)
+                logger.info("Listening for research events on %s", PUBSUB_CHANNEL)
+                try:
+                    await lost.wait()
+                finally:
+                    if not conn.is_closed():
+                        await conn.remove_listener(PUBSUB_CHANNEL, _on_notify)
+            logger.warning("Research event listener connection lost; reconnecting")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Research event listener failed; reconnecting")
+        await asyncio.sleep(_RECONNECT_DELAY)
+
+
+async def start(pool: asyncpg.Pool) -> None:
+    global _listen_task
+    if _listen_task is None:
+        _listen_task = asyncio.create_task(_listen_loop(pool))
+
+
+async def stop() -> None:
+    global _listen_task, _publish_lock
+    if _listen_task is not None:
+        _listen_task.cancel()
+        try:
+            await _listen_task
+        except asyncio.CancelledError:
+            pass
+        _listen_task = None
+    await _close_publish_conn()
+    _publish_lock = None
+
+
+# ── Subscribing ───────────────────────────────────────────────────────
+
+async def _persisted_events(task_id: str, after_seq: int, before_seq: int) -> list[dict[str, Any]]:
+    events = await db.get_task_events(task_id, after_seq, before_seq - after_seq - 1)
+    return [e for e in events if e["seq"] < before_seq and e["event"] != "progress"]
+
+
+async def _load_spilled(task_id: str, seq: int) -> dict[str, Any] | None:
+    rows = await db.get_task_events(task_id, seq - 1, 1)
+    if rows and rows[0]["seq"] == seq:
+        return rows[0]
+    return None
+
+
+async def follow(
+    task_id: str,
+    is_running: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield ``{seq, event, data}`` for a task running on any replica.
+
+    Persisted events are replayed from the table first, then live ones
+    follow from the channel. Gaps in the persisted sequence (events sent
+    before the subscription existed, or lost while the listener was
+    reconnecting) are filled from the table. Stops after ``done``, or
+    once ``is_running`` reports the task finished without one.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    _subscribers.setdefault(task_id, set()).add(queue)
+    try:
+        # Subscribed before reading the table, so nothing falls in between
+        last_seq = 0
+        last_persisted = 0
+        for evt in await db.get_task_events(task_id):
+            last_seq = evt["seq"]
+            if evt["event"] == "progress":
+                continue
+            last_persisted = evt["seq"]
+            yield evt
+            if evt["event"] == "done":
+                return
+
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), PUBSUB_IDLE_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_running():
+                    continue
+                # Finished without us hearing the end: drain the table
+                for evt in await db.get_task_events(task_id, last_persisted):
+                    if evt["event"] != "progress":
+                        yield evt
+                return
+
+            seq = message["s"]
+            if seq <= last_seq:
+                continue
+            event = message["e"]
+
+            if event != "progress" and message["p"] > last_persisted:
+                missed = await _persisted_events(task_id, last_persisted, seq)
+                if not missed or missed[-1]["seq"] < message["p"]:
+                    # Still in the publisher's unflushed batch
+                    await asyncio.sleep(EVENT_FLUSH_INTERVAL)
+                    missed = await _persisted_events(task_id, last_persisted, seq)
+                for evt in missed:
+                    yield evt
+
+            if message.get("spill"):
+                evt = await _load_spilled(task_id, seq)
+                if evt is None:
+                    logger.warning("Spilled event %d for %s not found", seq, task_id)
+                    continue
+            else:
+                evt = {"seq": seq, "event": event, "data": message.get("d", {})}
+
+            last_seq = seq
+            if event != "progress":
+                last_persisted = seq
+            yield evt
+            if event == "done":
+                return
+    finally:
+        subscribers = _subscribers.get(task_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del _subscribers[task_id]
@@ -0,0 +1,64 @@
+"""Cross-encoder reranking through the embedder's ``/rerank`` endpoint.
+
+Hybrid search fuses up to DB_SEARCH_LIMIT candidates per query by rank
+alone, and SearXNG orders web results by its own engines' scores. A
+cross-encoder reads the research question and each candidate's text
+together, which ranks far better than either, so nodes can keep only
+the top few and send the LLM smaller prompts. If the embedder can't
+rerank (unreachable, timed out, older image), candidates keep their
+original order.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Generic, Sequence, TypeVar
+
+import httpx
+
+from config import EMBEDDER_URL, RERANK_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class Ranked(Generic[T]):
+    items: list[T]
+    # Whether the cross-encoder ordered them (False: original order)
+    reranked: bool
+    latency_ms: int
+
+
+async def scores(query: str, passages: list[str]) -> list[float] | None:
+    """Relevance of each passage to ``query``, or None if unavailable."""
+    try:
+        async with httpx.AsyncClient(timeout=RERANK_TIMEOUT) as client:
+            resp = await client.post(
+                f"{EMBEDDER_URL}/rerank",
+                json={"query": query, "passages": passages},
+            )
+            resp.raise_for_status()
+            result = resp.json()["scores"]
+    except Exception as e:
+        logger.warning("Rerank request for %d passages failed: %s", len(passages), e)
+        return None
+    if len(result) != len(passages):
+        logger.warning("Rerank returned %d scores for %d passages", len(result), len(passages))
+        return None
+    return result
+
+
+async def rank(query: str, items: Sequence[T], text: Callable[[T], str]) -> Ranked[T]:
+    """``items`` ordered by cross-encoder relevance of ``text(item)`` to
+    ``query``; ties keep their original order."""
+    start = time.perf_counter()
+    result = await scores(query, [text(item) for item in items]) if items else None
+    latency_ms = int((time.perf_counter() - start) * 1000)
+    if result is None:
+        return Ranked(list(items), reranked=False, latency_ms=latency_ms)
+    order = sorted(range(len(items)), key=lambda i: -result[i])
+    return Ranked([items[i] for i in order], reranked=True, latency_ms=latency_ms)
@@ -0,0 +1,94 @@
+"""Reuse of recent research for similar submissions.
+
+At submit time the query is embedded and compared with completed tasks
+that used the same filters. A near-identical, recent one is served
+as-is (marked with its age); a merely similar one seeds the new run with
+the articles it found and the queries it tried.
+"""
+
+from __future__ import annotations
+
+import logging
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import db
+from config import (
+    RESEARCH_REUSE_ENABLED,
+    RESEARCH_REUSE_SEED_MAX_AGE,
+    RESEARCH_REUSE_SEED_SIMILARITY,
+    RESEARCH_REUSE_SERVE_MAX_AGE,
+    RESEARCH_REUSE_SERVE_SIMILARITY,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReuseMatch:
+    mode: str  # "serve" | "seed"
+    task_id: str
+    similarity: float
+    age_seconds: int
+    final_state: dict[str, Any]
+
+    def seed(self) -> dict[str, Any]:
+        """What a new run starts from: the source's articles and queries."""
+        return {
+            "source_task_id": self.task_id,
+            "similarity": self.similarity,
+            "found_article_ids": self.final_state.get("found_article_ids", []),
+            "queries_tried": self.final_state.get("queries_tried", []),
+        }
+
+
+async def lookup(
+    query: str,
+    filters: dict[str, Any] | None,
+    allow_reuse: bool = True,
+) -> tuple[array | None, ReuseMatch | None]:
+    """Embed ``query`` and find a task worth reusing.
+
+    Returns the embedding (stored on the new task so later submissions
+    can match it) and the match, if any; ``allow_reuse=False`` only
+    embeds.
+    """
+    if not RESEARCH_REUSE_ENABLED:
+        return None, None
+    try:
+        embedding = await db.embed_query(query)
+        if embedding is None or not allow_reuse:
+            return embedding, None
+        row = await db.find_similar_task(
+            embedding,
+            filters or {},
+            max(RESEARCH_REUSE_SERVE_MAX_AGE, RESEARCH_REUSE_SEED_MAX_AGE),
+        )
+    except Exception:
+        logger.exception("Research reuse lookup failed")
+        return None, None
+    if row is None:
+        return embedding, None
+
+    similarity = float(row["similarity"])
+    age = int((datetime.now(timezone.utc) - row["completed_at"]).total_seconds())
+    final_state = row.get("final_state") or {}
+
+    if similarity >= RESEARCH_REUSE_SERVE_SIMILARITY and age <= RESEARCH_REUSE_SERVE_MAX_AGE:
+        mode = "serve"
+    elif (
+        similarity >= RESEARCH_REUSE_SEED_SIMILARITY
+        and age <= RESEARCH_REUSE_SEED_MAX_AGE
+        and final_state.get("found_article_ids")
+    ):
+        mode = "seed"
+    else:
+        return embedding, None
+
+    logger.info(
+        "Reusing research %s (%s, similarity %.3f, %ds old) for %r",
+        row["id"], mode, similarity, age, query,
+    )
+    return embedding, ReuseMatch(mode, row["id"], similarity, age, final_state)
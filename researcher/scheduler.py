@@ -0,0 +1,151 @@
+"""Per-replica scheduler for queued research tasks.
+
+Submissions are inserted as ``queued``; every replica runs this loop and
+claims work from ``research_tasks`` while it has fewer than
+RESEARCH_MAX_CONCURRENT runs in flight. Claiming is a single
+``FOR UPDATE SKIP LOCKED`` statement (``db.claim_next_task``) that
+favours users with the fewest running tasks, so one user's burst can't
+starve everyone else and any replica can pick up any task.
+
+Running tasks heartbeat; a sweeper requeues ones whose replica went
+silent (crash, OOM kill) so they resume from their last graph
+checkpoint elsewhere, and a replica shutting down hands its runs back
+to the queue right away.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable
+
+import db
+from config import (
+    RESEARCH_CHECKPOINT_MAX_AGE,
+    RESEARCH_HEARTBEAT_SECONDS,
+    RESEARCH_MAX_ATTEMPTS,
+    RESEARCH_MAX_CONCURRENT,
+    RESEARCH_ORPHAN_TIMEOUT,
+    RESEARCH_QUEUE_POLL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+Runner = Callable[[dict[str, Any]], Awaitable[None]]
+
+# Run task -> research task id
+_running: dict[asyncio.Task, str] = {}
+_wakeup = asyncio.Event()
+_loop_tasks: list[asyncio.Task] = []
+
+
+def notify() -> None:
+    """Wake the scheduler, e.g. right after a local submission."""
+    _wakeup.set()
+
+
+def running_count() -> int:
+    return len(_running)
+
+
+def _finished(task: asyncio.Task) -> None:
+    _running.pop(task, None)
+    # A slot just freed up
+    _wakeup.set()
+
+
+async def _claim_loop(run: Runner) -> None:
+    while True:
+        # Cleared before claiming, so a notify() during the pass isn't lost
+        _wakeup.clear()
+        try:
+            while len(_running) < RESEARCH_MAX_CONCURRENT:
+                job = await db.claim_next_task(WORKER_ID)
+                if job is None:
+                    break
+                logger.info("Claimed research task %s", job["id"])
+                task = asyncio.create_task(run(job))
+                _running[task] = job["id"]
+                task.add_done_callback(_finished)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Claiming research tasks failed")
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), RESEARCH_QUEUE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _heartbeat_loop() -> None:
+    while True:
+        await asyncio.sleep(RESEARCH_HEARTBEAT_SECONDS)
+        try:
+            await db.heartbeat_tasks(WORKER_ID, list(_running.values()))
+        except Exception:
+            logger.exception("Research task heartbeat failed")
+
+
+async def sweep() -> None:
+    """Requeue orphaned runs and drop stale checkpoints and batch caches."""
+    requeued, failed = await db.requeue_orphaned_tasks(
+        RESEARCH_ORPHAN_TIMEOUT, RESEARCH_MAX_ATTEMPTS
+    )
+    if requeued:
+        logger.warning("Requeued %d orphaned research tasks: %s", len(requeued), requeued)
+        _wakeup.set()
+    if failed:
+        logger.warning("Failed %d research tasks out of attempts: %s", len(failed), failed)
+        await db.delete_checkpoints(failed)
+    pruned = await db.prune_checkpoints(RESEARCH_CHECKPOINT_MAX_AGE)
+    if pruned:
+        logger.info("Pruned checkpoints of %d research threads", pruned)
+    pruned = await db.prune_batch_cache()
+    if pruned:
+        logger.info("Pruned %d shared cache entries of finished batches", pruned)
+
+
+async def _sweep_loop() -> None:
+    while True:
+        try:
+            await sweep()
+        except Exception:
+            logger.exception("Research task sweep failed")
+        await asyncio.sleep(RESEARCH_ORPHAN_TIMEOUT / 2)
+
+
+async def start(run: Runner) -> None:
+    if not _loop_tasks:
+        _loop_tasks.extend([
+            asyncio.create_task(_claim_loop(run)),
+            asyncio.create_task(_heartbeat_loop()),
+            asyncio.create_task(_sweep_loop()),
+        ])
+        logger.info(
+            "Research scheduler %s started (max %d concurrent)", WORKER_ID, RESEARCH_MAX_CONCURRENT
+        )
+
+
+async def stop() -> None:
+    """Stop claiming and hand this replica's runs back to the queue; they
+    resume from their checkpoints on whichever replica claims them next."""
+    for task in _loop_tasks:
+        task.cancel()
+    runs = list(_running)
+    for task in runs:
+        task.cancel()
+    await asyncio.gather(*_loop_tasks, *runs, return_exceptions=True)
+    _loop_tasks.clear()
+    try:
+        requeued = await db.requeue_worker_tasks(WORKER_ID)
+    except Exception:
+        logger.exception("Requeueing research tasks on shutdown failed")
+        return
+    if requeued:
+        logger.info("Requeued %d research tasks on shutdown", len(requeued))
@@ -0,0 +1,213 @@
+"""Per-task event broadcast for SSE subscribers.
+
+Each task with open streams on this replica has one ``TaskStream``: a
+bounded ring buffer of its most recent events. Subscribers are cursors
+into that buffer rather than queues, so any number of them can read the
+same events and a slow one costs no memory. A subscriber that falls
+off the back of the buffer (or resumes from an old ``Last-Event-ID``)
+catches up on persisted events from ``research_task_events`` and gets
+its backlog of progress deltas merged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import db
+import pubsub
+from config import EVENT_FLUSH_INTERVAL, STREAM_BUFFER_SIZE
+
+logger = logging.getLogger(__name__)
+
+_CATCHUP_PAGE_SIZE = 500
+_CATCHUP_ATTEMPTS = 3
+
+
+def _coalesce(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge runs of progress events for the same node into one.
+
+    A snapshot absorbs the deltas after it and a later snapshot replaces
+    everything before it, so a subscriber that fell behind gets one
+    progress event per run instead of the whole backlog.
+    """
+    merged: list[dict[str, Any]] = []
+    for evt in events:
+        prev = merged[-1] if merged else None
+        if (
+            prev is None
+            or evt["event"] != "progress"
+            or prev["event"] != "progress"
+            or prev["data"].get("node") != evt["data"].get("node")
+        ):
+            merged.append(evt)
+            continue
+        if "text" in evt["data"]:
+            merged[-1] = evt
+            continue
+        key = "text" if "text" in prev["data"] else "delta"
+        if prev["data"]["offset"] + len(prev["data"][key]) != evt["data"]["offset"]:
+            merged.append(evt)
+            continue
+        merged[-1] = {**evt, "data": {**prev["data"], key: prev["data"][key] + evt["data"]["delta"]}}
+    return merged
+
+
+class TaskStream:
+    """Ring buffer of one task's events, readable by many subscribers."""
+
+    def __init__(self, task_id: str, size: int = STREAM_BUFFER_SIZE) -> None:
+        self.task_id = task_id
+        self.buffer: deque[dict[str, Any]] = deque(maxlen=size)
+        self.last_seq = 0
+        self.last_persisted = 0
+        self.closed = False
+        self.subscribers = 0
+        self.feeder: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    def publish(self, seq: int, event: str, data: dict[str, Any]) -> None:
+        if seq <= self.last_seq:
+            return
+        # "prev" lets a lagging reader know which persisted events it must
+        # find in the table before this entry
+        self.buffer.append({"seq": seq, "event": event, "data": data, "prev": self.last_persisted})
+        self.last_seq = seq
+        if event != "progress":
+            self.last_persisted = seq
+        if event == "done":
+            self.closed = True
+        self._wake()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def _catch_up(self, after_seq: int, before: dict[str, Any]) -> list[dict[str, Any]]:
+        """Persisted events between ``after_seq`` and buffer entry ``before``."""
+        events: list[dict[str, Any]] = []
+        for _ in range(_CATCHUP_ATTEMPTS):
+            cursor = events[-1]["seq"] if events else after_seq
+            while True:
+                page = await db.get_task_events(self.task_id, cursor, _CATCHUP_PAGE_SIZE)
+                events.extend(
+                    evt for evt in page
+                    if evt["seq"] < before["seq"] and evt["event"] != "progress"
+                )
+                if len(page) < _CATCHUP_PAGE_SIZE or page[-1]["seq"] >= before["seq"]:
+                    break
+                cursor = page[-1]["seq"]
+            if before["prev"] <= (events[-1]["seq"] if events else after_seq):
+                break
+            # The runner hasn't flushed them yet
+            await asyncio.sleep(EVENT_FLUSH_INTERVAL)
+        else:
+            logger.warning("Stream for %s resumed with persisted events missing", self.task_id)
+        return events
+
+    async def subscribe(self, after_seq: int = 0) -> AsyncIterator[dict[str, Any]]:
+        """Yield ``{seq, event, data}`` after ``after_seq`` until ``done``."""
+        cursor = after_seq
+        self.subscribers += 1
+        try:
+            while True:
+                if self.buffer and cursor + 1 < self.buffer[0]["seq"]:
+                    oldest = self.buffer[0]
+                    for evt in await self._catch_up(cursor, oldest):
+                        yield evt
+                    cursor = oldest["seq"] - 1
+                    continue
+
+                pending = [evt for evt in self.buffer if evt["seq"] > cursor]
+                if pending:
+                    for evt in _coalesce(pending):
+                        yield evt
+                        if evt["event"] == "done":
+                            return
+                    cursor = pending[-1]["seq"]
+                    continue
+
+                if self.closed:
+                    return
+                await self._wakeup.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                _release(self)
+
+
+# ── Registry ──────────────────────────────────────────────────────────
+
+_streams: dict[str, TaskStream] = {}
+
+
+def get(task_id: str) -> TaskStream | None:
+    return _streams.get(task_id)
+
+
+def open_local(task_id: str) -> TaskStream:
+    """Stream for a task this replica runs; the runner publishes into it.
+
+    Clients may already be following the task from when it was queued;
+    their stream is taken over from its pub/sub feed.
+    """
+    stream = _streams.get(task_id)
+    if stream is not None and not stream.closed:
+        feeder, stream.feeder = stream.feeder, None
+        if feeder is not None:
+            feeder.cancel()
+        return stream
+    stream = TaskStream(task_id)
+    _streams[task_id] = stream
+    return stream
+
+
+def finish_local(stream: TaskStream) -> None:
+    stream.close()
+    if stream.subscribers == 0:
+        _release(stream)
+
+
+def attach_remote(task_id: str, is_running: Callable[[], Awaitable[bool]]) -> TaskStream:
+    """Stream for a task queued or running on another replica, fed from pub/sub.
+
+    One feeder per task serves every local subscriber.
+    """
+    stream = _streams.get(task_id)
+    if stream is not None:
+        return stream
+    stream = TaskStream(task_id)
+    _streams[task_id] = stream
+
+    async def _feed() -> None:
+        try:
+            async for evt in pubsub.follow(task_id, is_running):
+                stream.publish(evt["seq"], evt["event"], evt["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Remote event feed for %s failed", task_id)
+        finally:
+            # Unless open_local took the stream over for a local run
+            if stream.feeder is asyncio.current_task():
+                stream.close()
+
+    stream.feeder = asyncio.create_task(_feed())
+    return stream
+
+
+def _release(stream: TaskStream) -> None:
+    """Forget a stream nobody is reading, once it can't gain readers."""
+    if stream.feeder is not None:
+        # Remote: a later subscriber reattaches with a fresh feed
+        stream.feeder.cancel()
+    elif not stream.closed:
+        return
+    if _streams.get(stream.task_id) is stream:
+        del _streams[stream.task_id]
@@ -0,0 +1,56 @@
+"""Batch cache sharing (run from researcher/: ``python -m unittest``)."""
+
+import unittest
+from collections import Counter
+from unittest import mock
+
+import batch
+
+
+class FailedLookupTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.stored: dict[str, object] = {}
+
+        async def get_batch_cache(batch_id, kind, keys):
+            return {k: self.stored[k] for k in keys if k in self.stored}
+
+        async def put_batch_cache(batch_id, kind, values):
+            self.stored.update(values)
+
+        for name, fn in (("get_batch_cache", get_batch_cache), ("put_batch_cache", put_batch_cache)):
+            patcher = mock.patch.object(batch.db, name, fn)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_failed_page_is_not_served_again(self):
+        cache = batch.BatchCache("batch-1")
+        calls: list[list[str]] = []
+        replies = [
+            {"url": "u", "success": False, "error": "timeout"},
+            {"url": "u", "success": True, "summary": "s"},
+        ]
+
+        async def compute(keys):
+            calls.append(keys)
+            return {k: replies[len(calls) - 1] for k in keys}
+
+        first = await cache.get_many("webreader", ["u"], compute, Counter())
+        self.assertFalse(first["u"]["success"])
+        self.assertEqual(self.stored, {})
+
+        stats = Counter()
+        second = await cache.get_many("webreader", ["u"], compute, stats)
+        self.assertTrue(second["u"]["success"])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(stats["webreader_misses"], 1)
+        self.assertIn("u", self.stored)
+
+        stats = Counter()
+        third = await cache.get_many("webreader", ["u"], compute, stats)
+        self.assertTrue(third["u"]["success"])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(stats["webreader_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,397 @@
+"""In-process, memory-mapped index of article embeddings.
+
+Holds ``articles.embedding`` as a float16/float32 matrix on disk with
+parallel ID, region and publish-date arrays, so semantic queries can be
+answered with a vectorized brute-force scan instead of a pgvector round
+trip. The index refreshes incrementally from Postgres and survives
+restarts; enable it with ``LOCAL_VECTOR_INDEX=true``.
+
+Incremental refreshes only see rows whose embedding or article changed.
+Deleted articles, dropped embeddings and feed region changes are picked
+up by a reconcile pass (at startup and every
+VECTOR_INDEX_RECONCILE_SECONDS). It compares IDs and metadata with
+Postgres, marks vanished rows removed and rewrites stale regions and
+dates.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from config import (
+    LOCAL_VECTOR_INDEX,
+    VECTOR_INDEX_DIR,
+    VECTOR_INDEX_DTYPE,
+    VECTOR_INDEX_RECONCILE_SECONDS,
+    VECTOR_INDEX_REFRESH_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 384
+_INITIAL_CAPACITY = 16384
+_REFRESH_BATCH = 5000
+_SCAN_CHUNK = 65536
+_NO_REGION = -1
+# Region code of rows whose article or embedding is gone from Postgres
+_REMOVED = -2
+# Publish date of rows with none; every date filter excludes it, as the
+# SQL comparison with NULL does
+_NO_DATE = np.iinfo(np.int64).min
+
+_CHANGED_AT = "COALESCE(GREATEST(a.updated_at, a.embedded_at), 'epoch'::timestamptz)"
+
+# Keyset on (changed_at, id) so rows sharing a timestamp across a batch
+# boundary are neither skipped nor re-read forever
+REFRESH_SQL = f"""
+SELECT a.id, a.embedding, f.region_id, a.published_at, {_CHANGED_AT} AS changed_at
+FROM articles a
+LEFT JOIN feeds f ON a.feed_id = f.id
+WHERE a.embedding IS NOT NULL
+  AND ({_CHANGED_AT}, a.id) > ($1::timestamptz, $2::int)
+ORDER BY changed_at, a.id
+LIMIT $3
+"""
+
+RECONCILE_SQL = """
+SELECT a.id, f.region_id, a.published_at
+FROM articles a
+LEFT JOIN feeds f ON a.feed_id = f.id
+WHERE a.embedding IS NOT NULL
+"""
+
+
+def _to_epoch(value: str | datetime | None) -> int | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class VectorIndex:
+    """Brute-force cosine index over memory-mapped embedding arrays."""
+
+    def __init__(self, directory: str | Path, dtype: str = "float32") -> None:
+        self.directory = Path(directory)
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self.removed = 0
+        self.capacity = 0
+        self.watermark = datetime.fromtimestamp(0, tz=timezone.utc)
+        self.watermark_id = 0
+        self.regions: dict[str, int] = {}
+        self._positions: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def ready(self) -> bool:
+        return self.count > self.removed
+
+    # ── Storage ───────────────────────────────────────────────────────
+
+    def _map(self, name: str, dtype: np.dtype, shape: tuple[int, ...]) -> np.memmap:
+        path = self.directory / name
+        size = int(np.prod(shape)) * dtype.itemsize
+        with open(path, "ab") as fh:
+            if fh.tell() < size:
+                fh.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _map_all(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.vectors = self._map("vectors.bin", self.dtype, (capacity, DIMENSIONS))
+        self.ids = self._map("ids.bin", np.dtype(np.int32), (capacity,))
+        self.region_codes = self._map("regions.bin", np.dtype(np.int16), (capacity,))
+        self.published = self._map("published.bin", np.dtype(np.int64), (capacity,))
+
+    def _load(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path = self.directory / "meta.json"
+        meta: dict[str, Any] = {}
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+        if meta.get("dtype") != self.dtype.name or meta.get("dimensions") != DIMENSIONS:
+            # Fresh index, or stored in a different layout: rebuild from scratch
+            for path in self.directory.glob("*.bin"):
+                path.unlink()
+            meta = {}
+
+        self._map_all(max(meta.get("capacity", 0), _INITIAL_CAPACITY))
+        self.count = meta.get("count", 0)
+        self.regions = meta.get("regions", {})
+        if meta.get("watermark"):
+            self.watermark = datetime.fromisoformat(meta["watermark"])
+            self.watermark_id = meta.get("watermark_id", 0)
+        self._positions = {int(aid): pos for pos, aid in enumerate(self.ids[: self.count])}
+        self.removed = int(np.count_nonzero(self.region_codes[: self.count] == _REMOVED))
+
+    def _save(self) -> None:
+        for arr in (self.vectors, self.ids, self.region_codes, self.published):
+            arr.flush()
+        meta = {
+            "dtype": self.dtype.name,
+            "dimensions": DIMENSIONS,
+            "capacity": self.capacity,
+            "count": self.count,
+            "regions": self.regions,
+            "watermark": self.watermark.isoformat(),
+            "watermark_id": self.watermark_id,
+        }
+        (self.directory / "meta.json").write_text(json.dumps(meta))
+
+    def _region_code(self, region: str | None) -> int:
+        if region is None:
+            return _NO_REGION
+        if region not in self.regions:
+            self.regions[region] = len(self.regions)
+        return self.regions[region]
+
+    # ── Updates ───────────────────────────────────────────────────────
+
+    def upsert(
+        self,
+        ids: Sequence[int],
+        vectors: np.ndarray,
+        regions: Sequence[str | None],
+        published: Sequence[int | None],
+    ) -> None:
+        """Insert or overwrite rows; vectors are L2-normalized on the way in."""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        with self._lock:
+            new = sum(1 for aid in ids if aid not in self._positions)
+            if self.count + new > self.capacity:
+                capacity = self.capacity
+                while capacity < self.count + new:
+                    capacity *= 2
+                self._map_all(capacity)
+            for row, aid in enumerate(ids):
+                pos = self._positions.get(aid)
+                if pos is None:
+                    pos = self.count
+                    self.count += 1
+                    self._positions[aid] = pos
+                    self.ids[pos] = aid
+                elif self.region_codes[pos] == _REMOVED:
+                    self.removed -= 1
+                self.vectors[pos] = vectors[row]
+                self.region_codes[pos] = self._region_code(regions[row])
+                self.published[pos] = _NO_DATE if published[row] is None else published[row]
+
+    def reconcile(
+        self,
+        ids: Sequence[int],
+        regions: Sequence[str | None],
+        published: Sequence[int | None],
+    ) -> tuple[int, int]:
+        """Align the index with the full list of embedded articles.
+
+        Indexed rows missing from ``ids`` are marked removed; the rest get
+        their region and publish date rewritten where they differ. IDs
+        not indexed yet are left to ``refresh``. Returns (removed,
+        updated) row counts.
+        """
+        with self._lock:
+            n = self.count
+            present = np.zeros(n, dtype=bool)
+            updated = 0
+            for aid, region, date in zip(ids, regions, published):
+                pos = self._positions.get(aid)
+                if pos is None:
+                    continue
+                present[pos] = True
+                code = self._region_code(region)
+                date = _NO_DATE if date is None else date
+                if self.region_codes[pos] != code or self.published[pos] != date:
+                    if self.region_codes[pos] == _REMOVED:
+                        self.removed -= 1
+                    self.region_codes[pos] = code
+                    self.published[pos] = date
+                    updated += 1
+            gone = ~present & (self.region_codes[:n] != _REMOVED)
+            self.region_codes[:n][gone] = _REMOVED
+            removed = int(np.count_nonzero(gone))
+            self.removed += removed
+            return removed, updated
+
+    async def refresh(self, pool: Any) -> int:
+        """Pull embeddings changed since the watermark; returns rows applied."""
+        applied = 0
+        while True:
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(
+                    REFRESH_SQL, self.watermark, self.watermark_id, _REFRESH_BATCH
+                )
+            if not rows:
+                break
+            vectors = np.array([np.asarray(r["embedding"], dtype=np.float32) for r in rows])
+            await asyncio.to_thread(
+                self.upsert,
+                [r["id"] for r in rows],
+                vectors,
+                [r["region_id"] for r in rows],
+                [_to_epoch(r["published_at"]) for r in rows],
+            )
+            self.watermark = rows[-1]["changed_at"]
+            self.watermark_id = rows[-1]["id"]
+            applied += len(rows)
+            if len(rows) < _REFRESH_BATCH:
+                break
+        if applied:
+            await asyncio.to_thread(self._save)
+            logger.info("Vector index refreshed: %d rows applied, %d total", applied, self.count)
+        return applied
+
+    async def reconcile_from(self, pool: Any) -> None:
+        """Run ``reconcile`` against every embedded article in Postgres."""
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(RECONCILE_SQL)
+        removed, updated = await asyncio.to_thread(
+            self.reconcile,
+            [r["id"] for r in rows],
+            [r["region_id"] for r in rows],
+            [_to_epoch(r["published_at"]) for r in rows],
+        )
+        if removed or updated:
+            await asyncio.to_thread(self._save)
+            logger.info("Vector index reconciled: %d rows removed, %d updated", removed, updated)
+
+    # ── Search ────────────────────────────────────────────────────────
+
+    def _filter_mask(
+        self,
+        region: str | None,
+        date_from: str | None,
+        date_to: str | None,
+        exclude_ids: set[int] | None,
+    ) -> np.ndarray | None:
+        n = self.count
+        mask: np.ndarray | None = None
+
+        def _and(cond: np.ndarray) -> None:
+            nonlocal mask
+            mask = cond if mask is None else mask & cond
+
+        if region:
+            code = self.regions.get(region)
+            if code is None:
+                return np.zeros(n, dtype=bool)
+            _and(self.region_codes[:n] == code)
+        elif self.removed:
+            _and(self.region_codes[:n] != _REMOVED)
+        if date_from:
+            # _NO_DATE is below any real date
+            _and(self.published[:n] >= _to_epoch(date_from))
+        if date_to:
+            _and((self.published[:n] <= _to_epoch(date_to)) & (self.published[:n] != _NO_DATE))
+        if exclude_ids:
+            _and(~np.isin(self.ids[:n], np.fromiter(exclude_ids, dtype=np.int32)))
+        return mask
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int = 50,
+        region: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        exclude_ids: set[int] | None = None,
+    ) -> list[tuple[int, float]]:
+        """Exact cosine top-``limit`` over rows passing the filters.
+
+        Returns ``(article_id, cosine_distance)`` pairs, nearest first.
+        """
+        q = np.asarray(query, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        with self._lock:
+            n = self.count
+            mask = self._filter_mask(region, date_from, date_to, exclude_ids)
+            if mask is not None and mask.sum() < n // 2:
+                # Selective filters: score only the matching rows
+                positions = np.flatnonzero(mask)
+                scores = np.empty(len(positions), dtype=np.float32)
+                for start in range(0, len(positions), _SCAN_CHUNK):
+                    chunk = positions[start:start + _SCAN_CHUNK]
+                    scores[start:start + len(chunk)] = self.vectors[chunk].astype(np.float32) @ q
+            else:
+                positions = np.arange(n)
+                scores = np.empty(n, dtype=np.float32)
+                for start in range(0, n, _SCAN_CHUNK):
+                    end = min(start + _SCAN_CHUNK, n)
+                    block = np.asarray(self.vectors[start:end], dtype=np.float32)
+                    scores[start:end] = block @ q
+                if mask is not None:
+                    scores[~mask] = -np.inf
+
+            k = min(limit, len(scores))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (int(self.ids[positions[i]]), float(1.0 - scores[i]))
+                for i in top
+                if np.isfinite(scores[i])
+            ]
+
+
+# ── Module-level index + refresher ────────────────────────────────────
+
+_index: VectorIndex | None = None
+_refresh_task: asyncio.Task | None = None
+
+
+def get_index() -> VectorIndex | None:
+    """The process-wide index when enabled and populated, else None."""
+    if _index is None or not _index.ready:
+        return None
+    return _index
+
+
+async def _refresh_loop(pool: Any) -> None:
+    reconciled_at: float | None = None
+    while True:
+        try:
+            await _index.refresh(pool)
+            if reconciled_at is None or time.monotonic() - reconciled_at >= VECTOR_INDEX_RECONCILE_SECONDS:
+                await _index.reconcile_from(pool)
+                reconciled_at = time.monotonic()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Vector index refresh failed")
+        await asyncio.sleep(VECTOR_INDEX_REFRESH_SECONDS)
+
+
+async def start(pool: Any) -> None:
+    """Open the on-disk index and keep it refreshed in the background."""
+    global _index, _refresh_task
+    if not LOCAL_VECTOR_INDEX or _index is not None:
+        return
+    _index = VectorIndex(VECTOR_INDEX_DIR, VECTOR_INDEX_DTYPE)
+    logger.info("Vector index opened at %s with %d rows", VECTOR_INDEX_DIR, _index.count)
+    _refresh_task = asyncio.create_task(_refresh_loop(pool))
+
+
+async def stop() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
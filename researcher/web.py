@@ -12,6 +12,8 @@ from config import SEARXNG_URL, WEBREADER_URL, WEB_SEARCH_MAX_RESULTS, WEB_READ_
 logger = logging.getLogger(__name__)
 
 _TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+# Seconds a webreader batch may take (extraction + summarization)
+READ_TIMEOUT = 120.0
 
 
 # ── Health Checks ─────────────────────────────────────────────────────
@@ -94,12 +96,14 @@ async def searxng_search(
 async def read_web_pages(
     urls_with_queries: list[dict[str, str]],
     max_pages: int | None = None,
+    timeout: float | None = None,
 ) -> dict[str, dict[str, Any]]:
     """Send URLs to webreader for extraction + summarization.
 
     Args:
         urls_with_queries: list of {"url": "...", "query": "..."}
         max_pages: override for WEB_READ_MAX_PAGES
+        timeout: override for READ_TIMEOUT, e.g. when the task's time is running out
 
     Returns:
         dict mapping URL → {title, summary, key_points, extracted_length, success, error}
@@ -111,7 +115,7 @@ async def read_web_pages(
     batch = urls_with_queries[:limit]
 
     try:
-        async with httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=5.0)) as client:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(timeout or READ_TIMEOUT, connect=5.0)) as client:
             resp = await client.post(
                 f"{WEBREADER_URL}/read/batch",
                 json={"urls": batch},
@@ -2,12 +2,14 @@ import { NextRequest, NextResponse } from 'next/server';
 import { config } from '@/lib/config';
 
 export async function GET(
-  _request: NextRequest,
+  request: NextRequest,
   { params }: { params: Promise<{ id: string }> },
 ) {
   try {
     const { id } = await params;
-    const res = await fetch(`${config.researcher.url}/research/${id}`);
+    const fields = request.nextUrl.searchParams.get('fields');
+    const query = fields ? `?fields=${encodeURIComponent(fields)}` : '';
+    const res = await fetch(`${config.researcher.url}/research/${id}${query}`);
     const data = await res.json();
     return NextResponse.json(data, { status: res.status });
   } catch (err) {
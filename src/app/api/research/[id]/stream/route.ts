@@ -2,14 +2,19 @@ import { NextRequest } from 'next/server';
 import { config } from '@/lib/config';
 
 export async function GET(
-  _request: NextRequest,
+  request: NextRequest,
   { params }: { params: Promise<{ id: string }> },
 ) {
   const { id } = await params;
 
-  const upstream = await fetch(`${config.researcher.url}/research/${id}/stream`, {
-    headers: { Accept: 'text/event-stream' },
-  });
+  // Let the researcher resume from where a reconnecting EventSource left off
+  const headers: Record<string, string> = { Accept: 'text/event-stream' };
+  const lastEventId = request.headers.get('last-event-id');
+  if (lastEventId) {
+    headers['Last-Event-ID'] = lastEventId;
+  }
+
+  const upstream = await fetch(`${config.researcher.url}/research/${id}/stream`, { headers });
 
   if (!upstream.ok || !upstream.body) {
     return new Response(JSON.stringify({ error: 'Stream unavailable' }), {
@@ -1,13 +1,17 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { config } from '@/lib/config';
+import { auth } from '@/lib/auth';
 
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json();
+    // The researcher schedules queued runs fairly per user
+    const session = await auth();
+    const userId = session?.user?.id ?? null;
     const res = await fetch(`${config.researcher.url}/research`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify(body),
+      body: JSON.stringify({ ...body, user_id: userId }),
     });
     const data = await res.json();
     return NextResponse.json(data, { status: res.status });
@@ -20,11 +24,13 @@ export async function POST(request: NextRequest) {
 export async function GET(request: NextRequest) {
   try {
     const params = request.nextUrl.searchParams;
-    const limit = params.get('limit') ?? '20';
-    const offset = params.get('offset') ?? '0';
-    const res = await fetch(
-      `${config.researcher.url}/research?limit=${limit}&offset=${offset}`,
-    );
+    const query = new URLSearchParams({
+      limit: params.get('limit') ?? '20',
+      offset: params.get('offset') ?? '0',
+    });
+    const cursor = params.get('cursor');
+    if (cursor) query.set('cursor', cursor);
+    const res = await fetch(`${config.researcher.url}/research?${query}`);
     const data = await res.json();
     return NextResponse.json(data, { status: res.status });
   } catch (err) {
@@ -5,12 +5,17 @@ import type { ResearchEvent } from '@/hooks/useResearchStream';
 import type { ThinkingState } from '@/hooks/useResearchStream';
 
 const EVENT_PREFIX: Record<string, string> = {
+  queued: 'QUEUE',
+  seeded: 'REUSE',
+  resumed: 'RESUME',
   planning: 'PLAN',
   searching: 'SEARCH',
   found: 'FOUND',
   reading: 'READ',
   analyzing: 'ANALYZE',
   expanding: 'EXPAND',
+  saturated: 'SATURATED',
+  deadline: 'DEADLINE',
   compiling: 'COMPILE',
   web_searching: 'WEB:SEARCH',
   web_found: 'WEB:FOUND',
@@ -20,12 +25,17 @@ const EVENT_PREFIX: Record<string, string> = {
 };
 
 const EVENT_COLOR: Record<string, string> = {
+  queued: 'text-text-tertiary',
+  seeded: 'text-text-secondary',
+  resumed: 'text-yellow-400',
   planning: 'text-yellow-400',
   searching: 'text-accent-primary',
   found: 'text-text-secondary',
   reading: 'text-accent-primary',
   analyzing: 'text-yellow-400',
   expanding: 'text-text-tertiary',
+  saturated: 'text-text-tertiary',
+  deadline: 'text-yellow-400',
   compiling: 'text-yellow-400',
   web_searching: 'text-accent-primary',
   web_found: 'text-text-secondary',
@@ -47,6 +57,12 @@ function formatElapsed(startTime: number, ts: number): string {
 
 function EventDetail({ event }: { event: ResearchEvent }) {
   switch (event.type) {
+    case 'queued':
+      return <span className="text-text-tertiary">position {event.position as number} in queue</span>;
+    case 'seeded':
+      return <span className="text-text-primary">{event.count as number} articles from earlier research</span>;
+    case 'resumed':
+      return <span className="text-text-tertiary">interrupted run picked up at iteration {event.iteration as number}</span>;
     case 'planning':
       return <span className="text-text-tertiary">iteration {event.iteration as number}</span>;
     case 'searching':
@@ -67,6 +83,9 @@ function EventDetail({ event }: { event: ResearchEvent }) {
       return <span className="text-text-primary">{event.count as number} articles</span>;
     case 'analyzing':
       return <span className="text-text-tertiary">iteration {event.iteration as number}</span>;
+    case 'saturated':
+    case 'deadline':
+      return <span className="text-text-tertiary">{event.reason as string}</span>;
     case 'expanding':
       return (
         <span className="space-y-1">
@@ -1,4 +1,4 @@
-import { pgTable, serial, integer, text, boolean, timestamp, jsonb, index, primaryKey, uniqueIndex } from 'drizzle-orm/pg-core';
+import { pgTable, serial, integer, text, boolean, timestamp, jsonb, index, primaryKey, uniqueIndex, vector, customType } from 'drizzle-orm/pg-core';
 import { relations, sql } from 'drizzle-orm';
 
 // ─── Auth tables (NextAuth Drizzle Adapter) ─────────────────────────
@@ -232,7 +232,7 @@ export const researchTasks = pgTable('research_tasks', {
   userId: text('user_id').references(() => users.id),
   query: text('query').notNull(),
   filters: jsonb('filters'),
-  status: text('status', { enum: ['running', 'complete', 'error'] }).default('running').notNull(),
+  status: text('status', { enum: ['queued', 'running', 'complete', 'error'] }).default('running').notNull(),
   report: jsonb('report'),
   articles: jsonb('articles'),
   searchLog: jsonb('search_log'),
@@ -240,8 +240,113 @@ export const researchTasks = pgTable('research_tasks', {
   error: text('error'),
   createdAt: timestamp('created_at', { withTimezone: true }).defaultNow(),
   completedAt: timestamp('completed_at', { withTimezone: true }),
+
+  // Reuse of similar recent research (researcher/reuse.py)
+  queryEmbedding: vector('query_embedding', { dimensions: 384 }),
+  finalState: jsonb('final_state'),
+  reusedFrom: text('reused_from'),
+
+  // Queueing and claiming by researcher replicas (researcher/scheduler.py)
+  runOptions: jsonb('run_options'),
+  claimedBy: text('claimed_by'),
+  startedAt: timestamp('started_at', { withTimezone: true }),
+  heartbeatAt: timestamp('heartbeat_at', { withTimezone: true }),
+  attempts: integer('attempts').default(0).notNull(),
+
+  // Batch submissions (POST /research/batch)
+  batchId: text('batch_id'),
 }, (table) => [
   index('idx_research_tasks_user').on(table.userId, table.createdAt),
+  index('idx_research_tasks_created').on(table.createdAt.desc(), table.id.desc()),
+  index('idx_research_tasks_queued').on(table.createdAt, table.id).where(sql`${table.status} = 'queued'`),
+  index('idx_research_tasks_batch').on(table.batchId).where(sql`${table.batchId} IS NOT NULL`),
+]);
+
+// Owned by the researcher service (researcher/db.py); mirrored here so
+// drizzle-kit push leaves them alone
+
+export const researchTaskEvents = pgTable('research_task_events', {
+  taskId: text('task_id').notNull(),
+  seq: integer('seq').notNull(),
+  event: text('event').notNull(),
+  data: jsonb('data'),
+  ts: timestamp('ts', { withTimezone: true }).defaultNow().notNull(),
+}, (table) => [
+  primaryKey({ columns: [table.taskId, table.seq] }),
+]);
+
+export const llmCache = pgTable('llm_cache', {
+  key: text('key').primaryKey(),
+  model: text('model').notNull(),
+  response: text('response').notNull(),
+  createdAt: timestamp('created_at', { withTimezone: true }).defaultNow().notNull(),
+  lastHitAt: timestamp('last_hit_at', { withTimezone: true }).defaultNow().notNull(),
+  hits: integer('hits').default(0).notNull(),
+}, (table) => [
+  index('idx_llm_cache_last_hit').on(table.lastHitAt),
+]);
+
+// LangGraph checkpoints, written and read only by researcher/checkpoint.py
+const bytea = customType<{ data: Buffer }>({
+  dataType() {
+    return 'bytea';
+  },
+});
+
+export const researchCheckpoints = pgTable('research_checkpoints', {
+  threadId: text('thread_id').notNull(),
+  checkpointNs: text('checkpoint_ns').default('').notNull(),
+  checkpointId: text('checkpoint_id').notNull(),
+  parentCheckpointId: text('parent_checkpoint_id'),
+  type: text('type').notNull(),
+  checkpoint: bytea('checkpoint').notNull(),
+  metadataType: text('metadata_type').notNull(),
+  metadata: bytea('metadata').notNull(),
+  createdAt: timestamp('created_at', { withTimezone: true }).defaultNow().notNull(),
+}, (table) => [
+  primaryKey({ columns: [table.threadId, table.checkpointNs, table.checkpointId] }),
+  index('idx_research_checkpoints_created').on(table.createdAt),
+]);
+
+export const researchCheckpointBlobs = pgTable('research_checkpoint_blobs', {
+  threadId: text('thread_id').notNull(),
+  checkpointNs: text('checkpoint_ns').default('').notNull(),
+  channel: text('channel').notNull(),
+  version: text('version').notNull(),
+  type: text('type').notNull(),
+  blob: bytea('blob'),
+}, (table) => [
+  primaryKey({ columns: [table.threadId, table.checkpointNs, table.channel, table.version] }),
+]);
+
+export const researchCheckpointWrites = pgTable('research_checkpoint_writes', {
+  threadId: text('thread_id').notNull(),
+  checkpointNs: text('checkpoint_ns').default('').notNull(),
+  checkpointId: text('checkpoint_id').notNull(),
+  taskId: text('task_id').notNull(),
+  idx: integer('idx').notNull(),
+  channel: text('channel').notNull(),
+  type: text('type'),
+  blob: bytea('blob'),
+  taskPath: text('task_path').default('').notNull(),
+}, (table) => [
+  primaryKey({ columns: [table.threadId, table.checkpointNs, table.checkpointId, table.taskId, table.idx] }),
+]);
+
+export const researchBatches = pgTable('research_batches', {
+  id: text('id').primaryKey(),
+  userId: text('user_id'),
+  createdAt: timestamp('created_at', { withTimezone: true }).defaultNow().notNull(),
+  cacheStats: jsonb('cache_stats').default({}).notNull(),
+});
+
+export const researchBatchCache = pgTable('research_batch_cache', {
+  batchId: text('batch_id').notNull(),
+  kind: text('kind').notNull(),
+  key: text('key').notNull(),
+  value: jsonb('value').notNull(),
+}, (table) => [
+  primaryKey({ columns: [table.batchId, table.kind, table.key] }),
 ]);
 
 // ─── Relations ──────────────────────────────────────────────────────
@@ -92,10 +92,25 @@ export function useResearchStream() {
       const es = new EventSource(`/api/research/${id}/stream`);
       eventSourceRef.current = es;
 
+      // Progress arrives as { node, offset, delta } appended at `offset`,
+      // with an occasional { node, offset: 0, text } snapshot. A delta
+      // that doesn't line up means we missed one, so wait for a snapshot.
       es.addEventListener('progress', (e) => {
         try {
           const data = JSON.parse(e.data);
-          setThinking({ node: data.node, text: data.text });
+          setThinking((prev) => {
+            if (typeof data.text === 'string') {
+              return { node: data.node, text: data.text };
+            }
+            const text = prev?.node === data.node ? prev.text : '';
+            if (data.offset === text.length) {
+              return { node: data.node, text: text + data.delta };
+            }
+            if (data.offset < text.length && data.offset + data.delta.length > text.length) {
+              return { node: data.node, text: text + data.delta.slice(text.length - data.offset) };
+            }
+            return prev;
+          });
         } catch { /* ignore */ }
       });
 